@@ -0,0 +1,111 @@
+"""Téléchargements hors ligne contre le serveur local de bench_stream : durée
+selon le nombre de transferts simultanés (débit limité par connexion),
+reprise après coupures, vérification d'empreinte, éviction LRU du cache.
+
+    python -m benchmarks.bench_download [transferts_simultanés ...]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from benchmarks.bench_stream import StandInServer, payload
+from class_item.downloads import DownloadManager, OfflineCache
+
+
+FILE_BYTES = 2 * 1024 * 1024
+FILES = 6
+# débit par connexion du serveur
+BYTES_PER_S = 8 * 1024 * 1024
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _wait_all(manager, urls, sha256=None, timeout=60.0):
+    """Lance urls et attend leur fin ; retourne {url: chemin ou None (échec)}."""
+    results = {}
+    loop = QEventLoop()
+
+    def done(url, path=None):
+        results[url] = path
+        if len(results) == len(urls):
+            loop.quit()
+
+    manager.finished.connect(done)
+    manager.failed.connect(lambda url, message: done(url))
+    for url in urls:
+        manager.download(url, sha256)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    if len(results) < len(urls):
+        loop.exec()
+    manager.finished.disconnect()
+    manager.failed.disconnect()
+    return results
+
+
+def _file_ok(path, data):
+    if path is None:
+        return False
+    with open(path, "rb") as f:
+        return f.read() == data
+
+
+def run(concurrency, latency_ms=20.0):
+    """Retourne {nom de mesure: valeur} pour concurrency transferts simultanés."""
+    data = payload(FILE_BYTES, seed=1)
+    server = StandInServer(latency_ms / 1000.0, data).start()
+    server.bytes_per_s = BYTES_PER_S
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = OfflineCache(os.path.join(tmp, "offline.sqlite3"), tmp, max_bytes=4 * FILE_BYTES)
+        manager = DownloadManager(cache, max_concurrent=concurrency)
+        try:
+            urls = [f"{server.base_url}/track{i}.mp3" for i in range(FILES)]
+            t, paths = _timed(lambda: _wait_all(manager, urls))
+            results["seconds"] = t
+            results["mb_s"] = FILES * FILE_BYTES / t / 1e6
+            # cache plafonné à 4 fichiers : les plus anciens ont été évincés
+            results["files_ok"] = sum(_file_ok(cache.local_path(u), data) for u in urls)
+            results["cache_mb"] = cache.total_size() / 1e6
+
+            # reprise : chaque réponse est coupée après 512 Ko
+            server.bytes_per_s = None
+            server.cut_after = 512 * 1024
+            requests = server.requests
+            url = f"{server.base_url}/resumed.mp3"
+            paths = _wait_all(manager, [url])
+            results["resume_ok"] = float(_file_ok(paths[url], data))
+            results["resume_requests"] = server.requests - requests
+            server.cut_after = None
+
+            # empreinte attendue fausse : refusé, rien en cache
+            url = f"{server.base_url}/corrupt.mp3"
+            paths = _wait_all(manager, [url], hashlib.sha256(b"autre").hexdigest())
+            results["bad_hash_rejected"] = float(paths[url] is None and not cache.contains(url))
+        finally:
+            manager.close()
+            cache.close()
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def main(argv):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    counts = [int(a) for a in argv] or [1, DownloadManager.MAX_CONCURRENT]
+    for concurrency in counts:
+        print(f"--- {concurrency} transfert(s) simultané(s)")
+        for name, value in run(concurrency).items():
+            print(f"{name:32s} {value:12.4f}")
+    return app
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
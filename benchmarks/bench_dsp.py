@@ -0,0 +1,71 @@
+"""Micro-benchmarks du traitement audio : égaliseur par blocs, mélangeur complet
+(fondu, égaliseur, limiteur), comparés au temps réel.
+
+    python -m benchmarks.bench_dsp [bandes actives ...]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from class_item.dsp import EQ_BANDS, Mixer
+
+
+RATE = 48000
+BLOCK = 1024
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(bands, blocks=2000, seed=0):
+    """Retourne {nom de mesure: valeur} avec bands bandes d'égaliseur actives."""
+    rng = np.random.default_rng(seed)
+    chunk = rng.standard_normal((BLOCK, 2)) * 0.3
+    out = np.empty((BLOCK, 2))
+    mixer = Mixer(RATE, 2, BLOCK)
+    mixer.eq.set_gains([3.0 if i < bands else 0.0 for i in range(len(EQ_BANDS))])
+    results = {}
+
+    def steady():
+        for _ in range(blocks):
+            mixer.write(0, chunk)
+            mixer.render(out)
+
+    def crossfade():
+        mixer.switch(1, blocks * BLOCK)
+        for _ in range(blocks):
+            mixer.write(0, chunk)
+            mixer.write(1, chunk)
+            mixer.render(out)
+
+    steady()
+    t, _ = _timed(steady)
+    results["block_us"] = t / blocks * 1e6
+    results["realtime_factor"] = blocks * BLOCK / RATE / t
+    t, _ = _timed(crossfade)
+    results["crossfade_block_us"] = t / blocks * 1e6
+
+    # aucune allocation par bloc : la mémoire suivie ne doit pas croître
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    steady()
+    results["alloc_bytes_per_block"] = (tracemalloc.get_traced_memory()[0] - before) / blocks
+    tracemalloc.stop()
+    return results
+
+
+def main(argv):
+    counts = [int(a) for a in argv] or [0, 3, len(EQ_BANDS)]
+    for bands in counts:
+        print(f"--- {bands} bandes actives")
+        for name, value in run(bands).items():
+            print(f"{name:32s} {value:12.4f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
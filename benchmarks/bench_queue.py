@@ -0,0 +1,136 @@
+"""Micro-benchmarks de la file de lecture : Queue (tableau) contre l'ancienne
+liste chaînée circulaire.
+
+    python -m benchmarks.bench_queue [taille ...]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from class_item.song_queue import Queue
+
+
+class LegacyNodeSong:
+    def __init__(self, title, artist, album):
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.next = None
+        self.previous = None
+
+
+class LegacyQueue:
+    """Copie de la liste chaînée circulaire d'origine (référence de comparaison)."""
+
+    def __init__(self):
+        self.lenght = 0
+        self.origin = None
+        self.head = None
+
+    def is_empty(self):
+        return self.lenght == 0
+
+    def __len__(self):
+        return self.lenght
+
+    def add_song(self, title, artist, album):
+        new_node = LegacyNodeSong(title, artist, album)
+        if self.is_empty():
+            self.head = new_node
+            self.origin = new_node
+            self.head.next = self.origin
+            self.head.previous = self.origin
+        else:
+            self.head.next = new_node
+            new_node.previous = self.head
+            new_node.next = self.origin
+            self.head = new_node
+        self.lenght += 1
+        return new_node
+
+    def remove_song(self, node):
+        if not self.is_empty():
+            if len(self) == 1:
+                self.head = None
+                self.origin = None
+            else:
+                node.previous.next = node.next
+                node.next.previous = node.previous
+                if node == self.origin:
+                    self.origin = node.next
+                if node == self.head:
+                    self.head = node.previous
+            self.lenght -= 1
+
+    def at(self, index):
+        # seul moyen d'atteindre la piste N : parcourir les liens
+        node = self.origin
+        for _ in range(index):
+            node = node.next
+        return node
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _fill(queue_cls, n):
+    q = queue_cls()
+    add = q.add_song
+    nodes = [add("title", "artist", "album") for _ in range(n)]
+    return q, nodes
+
+
+def _peak_memory(queue_cls, n):
+    tracemalloc.start()
+    q, nodes = _fill(queue_cls, n)
+    del nodes
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del q
+    return peak
+
+
+def run(n, lookups=200, seed=0):
+    """Retourne {nom de mesure: valeur} pour une file de n entrées."""
+    rnd = random.Random(seed)
+    results = {}
+    positions = [rnd.randrange(n) for _ in range(lookups)]
+
+    for label, cls in (("legacy", LegacyQueue), ("queue", Queue)):
+        t, (q, nodes) = _timed(lambda: _fill(cls, n))
+        results[f"{label}.add_song_s"] = t
+
+        at = q.at if cls is LegacyQueue else q.__getitem__
+        t, _ = _timed(lambda: [at(p) for p in positions])
+        results[f"{label}.index_us"] = t / lookups * 1e6
+
+        victims = rnd.sample(nodes, min(n, 10_000))
+        t, _ = _timed(lambda: [q.remove_song(v) for v in victims])
+        results[f"{label}.remove_song_us"] = t / len(victims) * 1e6
+        del q, nodes, victims
+
+        results[f"{label}.peak_mb"] = _peak_memory(cls, n) / 1e6
+
+    q, nodes = _fill(Queue, n)
+    victims = rnd.sample(nodes, n // 10)
+    t, _ = _timed(lambda: q.remove_songs(victims))
+    results["queue.remove_songs_10pct_s"] = t
+    t, _ = _timed(lambda: q.insert_songs(len(q) // 2, [("t", "a", "b")] * (n // 10)))
+    results["queue.insert_songs_10pct_s"] = t
+    return results
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or [100_000, 1_000_000]
+    for n in sizes:
+        print(f"--- {n} entrées")
+        for name, value in run(n).items():
+            print(f"{name:32s} {value:12.4f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
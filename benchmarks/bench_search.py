@@ -0,0 +1,77 @@
+"""Micro-benchmarks de l'index de recherche : construction, frappe par frappe,
+mises à jour incrémentales.
+
+    python -m benchmarks.bench_search [taille ...]
+"""
+import random
+import sys
+import time
+
+from class_item.search_index import SearchIndex
+
+
+LETTERS = "abcdefghijklmnopqrstuvwxyzéèàç"
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _rows(n, rnd):
+    """n entrées synthétiques ; quelques mots très fréquents (loi de Pareto)."""
+    vocab = ["".join(rnd.choice(LETTERS) for _ in range(rnd.randint(3, 9))) for _ in range(60_000)]
+
+    def word():
+        if rnd.random() < 0.5:
+            return vocab[min(int(rnd.paretovariate(0.7)), len(vocab)) - 1]
+        return rnd.choice(vocab)
+
+    artists = [f"{word()} {word()}" for _ in range(max(1, n // 40))]
+    albums = [f"{word()} {word()}" for _ in range(max(1, n // 10))]
+    return [(f"/music/{i}.mp3", " ".join(word() for _ in range(rnd.randint(1, 4))),
+             rnd.choice(artists), rnd.choice(albums)) for i in range(n)]
+
+
+def run(n, queries=50, seed=0):
+    """Retourne {nom de mesure: valeur} pour un index de n entrées."""
+    rnd = random.Random(seed)
+    rows = _rows(n, rnd)
+    results = {}
+
+    index = SearchIndex()
+    t, _ = _timed(lambda: index.update(rows))
+    results["build_s"] = t
+
+    # une requête = titre d'une entrée tapé caractère par caractère
+    keystrokes = []
+    for key, title, artist, album in rnd.sample(rows, queries):
+        text = f"{title.split()[0]} {artist.split()[0]}"
+        for i in range(1, len(text) + 1):
+            t, _ = _timed(lambda: index.search(text[:i]))
+            keystrokes.append(t)
+    keystrokes.sort()
+    results["keystroke_median_ms"] = keystrokes[len(keystrokes) // 2] * 1e3
+    results["keystroke_p99_ms"] = keystrokes[int(len(keystrokes) * 0.99)] * 1e3
+    results["keystroke_max_ms"] = keystrokes[-1] * 1e3
+
+    victims = [key for key, *_ in rnd.sample(rows, min(n, 10_000))]
+    t, _ = _timed(lambda: index.remove_many(victims))
+    results["remove_us"] = t / len(victims) * 1e6
+    added = _rows(len(victims), rnd)
+    t, _ = _timed(lambda: index.update(added))
+    results["add_us"] = t / len(added) * 1e6
+    return results
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or [10_000, 300_000]
+    for n in sizes:
+        print(f"--- {n} entrées")
+        for name, value in run(n).items():
+            print(f"{name:32s} {value:12.4f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
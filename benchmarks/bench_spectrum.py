@@ -0,0 +1,75 @@
+"""Coût du visualiseur : copie des tampons, FFT par lots, peinture des barres,
+ramené à une fraction de cœur pour une lecture à 48 kHz affichée à 30 i/s.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_spectrum [barres ...]
+"""
+import sys
+import time
+
+import numpy as np
+from PySide6.QtGui import QGuiApplication, QImage, QPainter
+
+from class_item.spectrum import SpectrumAnalyzer, SpectrumWorker, bar_colors, paint_bars
+
+
+RATE = 48000
+# taille typique d'un tampon décodé
+BUFFER = 1024
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(bars, seconds=20, seed=0):
+    """Retourne {nom de mesure: valeur} pour seconds secondes de son."""
+    rng = np.random.default_rng(seed)
+    chunk = (rng.standard_normal((BUFFER, 2)) * 0.2).astype(np.float32)
+    analyzer = SpectrumAnalyzer(RATE, bars)
+    buffers = RATE * seconds // BUFFER
+    frames = SpectrumWorker.FPS * seconds
+    per_frame = buffers / frames
+    results = {}
+
+    t_push = t_compute = 0.0
+    pushed = 0
+    for i in range(frames):
+        while pushed < (i + 1) * per_frame:
+            t, _ = _timed(lambda: analyzer.push(chunk))
+            t_push += t
+            pushed += 1
+        t, bars_now = _timed(analyzer.compute)
+        t_compute += t
+    results["push_us"] = t_push / pushed * 1e6
+    results["compute_us"] = t_compute / frames * 1e6
+
+    image = QImage(1280, 600, QImage.Format_RGB32)
+    colors = bar_colors(bars)
+    painter = QPainter(image)
+
+    def paint():
+        for _ in range(frames):
+            paint_bars(painter, image.width(), image.height(), bars_now, colors)
+
+    t, _ = _timed(paint)
+    painter.end()
+    results["paint_us"] = t / frames * 1e6
+    results["cpu_fraction"] = (t_push + t_compute + t) / seconds
+    return results
+
+
+def main(argv):
+    # peinture sur QImage : une QGuiApplication suffit
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+    counts = [int(a) for a in argv] or [48, 96]
+    for bars in counts:
+        print(f"--- {bars} barres")
+        for name, value in run(bars).items():
+            print(f"{name:32s} {value:12.4f}")
+    return app
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
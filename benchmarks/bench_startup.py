@@ -0,0 +1,56 @@
+"""Temps jusqu'à la première fenêtre (démarrage à froid, processus neuf).
+
+    python -m benchmarks.bench_startup [--runs N] [--platform offscreen]
+
+Chaque essai lance main.py avec MYMP3_STARTUP_PROBE ; la fenêtre note
+l'instant de son premier paint et celui où le backend multimédia est prêt,
+puis quitte. Les durées sont comptées depuis le lancement du processus.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once(platform="offscreen", timeout=60):
+    """Retourne {"first_paint_s", "backend_ready_s"} pour un lancement."""
+    fd, probe = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    env = dict(os.environ, MYMP3_STARTUP_PROBE=probe, QT_QPA_PLATFORM=platform)
+    try:
+        start = time.time()
+        subprocess.run([sys.executable, "main.py"], cwd=ROOT, env=env,
+                       timeout=timeout, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(probe) as f:
+            marks = json.load(f)
+    finally:
+        os.remove(probe)
+    return {
+        "first_paint_s": marks["first_paint"] - start,
+        "backend_ready_s": marks["backend_ready"] - start,
+    }
+
+
+def run(runs=5, platform="offscreen"):
+    samples = [measure_once(platform) for _ in range(runs)]
+    return {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--platform", default="offscreen")
+    args = parser.parse_args(argv)
+    for name, value in run(args.runs, args.platform).items():
+        print(f"{name:20s} {value * 1000:10.1f} ms (médiane sur {args.runs})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,221 @@
+"""Lecture HTTP de bout en bout contre un serveur local (Range, keep-alive, latence
+simulée) : délai du premier octet à froid et après préchargement, débit,
+seeks, réutilisation des connexions. Le contenu lu est vérifié octet par octet.
+
+    python -m benchmarks.bench_stream [latence_ms ...]
+"""
+import base64
+import hashlib
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from class_item.http_stream import StreamService
+
+
+TRACK_BYTES = 8 * 1024 * 1024
+
+
+def payload(size, seed=0):
+    """Octets pseudo-aléatoires reproductibles (contenu d'une « piste »)."""
+    return np.random.default_rng(seed).integers(0, 256, size, dtype=np.uint8).tobytes()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Serveur HTTP/1.1 minimal : /<nom> sert payload(TRACK_BYTES), Range compris.
+
+    ETag, If-Range et Repr-Digest (SHA-256) sont pris en charge ; avec
+    cut_after, chaque réponse est coupée après autant d'octets (transferts
+    interrompus) ; avec bytes_per_s, le débit de chaque connexion est limité ;
+    avec hide_total, Content-Range n'annonce pas la taille (bytes a-b/*).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, data=None):
+        super().__init__(("127.0.0.1", 0), _RangeHandler)
+        self.latency = latency
+        self.data = data if data is not None else payload(TRACK_BYTES)
+        self.etag = '"' + hashlib.sha1(self.data).hexdigest() + '"'
+        self.digest = base64.b64encode(hashlib.sha256(self.data).digest()).decode("ascii")
+        self.cut_after = None
+        self.bytes_per_s = None
+        self.hide_total = False
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # connexions coupées par le client (seek) : attendu, rien à signaler
+        pass
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+        data = server.data
+        first, last = 0, len(data) - 1
+        ranged = self.headers.get("Range", "").startswith("bytes=")
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range != server.etag:
+            # contenu modifié depuis le début du transfert : tout, en 200
+            ranged = False
+        if ranged:
+            start, _, end = self.headers["Range"][6:].partition("-")
+            first = int(start or 0)
+            last = min(int(end), last) if end else last
+        if ranged and first >= len(data):
+            # plage au-delà de la fin
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(data)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = memoryview(data)[first:last + 1]
+        self.send_response(206 if ranged else 200)
+        if ranged:
+            total = "*" if server.hide_total else len(data)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{total}")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("ETag", server.etag)
+        self.send_header("Repr-Digest", f"sha-256=:{server.digest}:")
+        self.end_headers()
+        try:
+            if server.cut_after is not None and len(body) > server.cut_after:
+                self.wfile.write(body[:server.cut_after])
+                self.wfile.flush()
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            if server.bytes_per_s:
+                piece = 64 * 1024
+                for i in range(0, len(body), piece):
+                    self.wfile.write(body[i:i + piece])
+                    time.sleep(piece / server.bytes_per_s)
+            else:
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _read_all(device, size=32 * 1024):
+    parts = []
+    while True:
+        data = bytes(device.read(size))
+        if not data:
+            return b"".join(parts)
+        parts.append(data)
+
+
+def run(latency_ms, seeks=50, seed=0):
+    """Retourne {nom de mesure: valeur} pour une latence serveur de latency_ms."""
+    server = StandInServer(latency_ms / 1000.0).start()
+    service = StreamService()
+    data = server.data
+    results = {}
+    try:
+        # premier octet : à froid, puis depuis un préchargement
+        device = service.open(f"{server.base_url}/cold.mp3")
+        t, _ = _timed(lambda: device.read(4096))
+        results["first_byte_cold_ms"] = t * 1e3
+        device.close()
+
+        url = f"{server.base_url}/next.mp3"
+        done = threading.Event()
+        service.prefetched.connect(lambda u: done.set())
+        service.prefetch(url)
+        done.wait(10)
+        device = service.open(url)
+        t, first = _timed(lambda: bytes(device.read(4096)))
+        results["first_byte_prefetched_ms"] = t * 1e3
+
+        # lecture complète et vérification
+        t, rest = _timed(lambda: _read_all(device))
+        results["throughput_mb_s"] = len(rest) / t / 1e6
+        results["content_ok"] = float(first + rest == data)
+        results["stalls"] = device.stalls
+        results["read_ahead_kb"] = device.ahead / 1024
+        # lecture continue : une connexion par flux, réutilisée de fenêtre en fenêtre
+        results["sequential_requests"] = server.requests
+        results["sequential_connections"] = server.connections
+
+        # seeks aléatoires : proches (tampon) et lointains (nouvelle requête Range)
+        rnd = random.Random(seed)
+        ok = 0
+        start = time.perf_counter()
+        for _ in range(seeks):
+            pos = rnd.randrange(len(data) - 65536)
+            device.seek(pos)
+            chunk = bytes(device.read(65536))
+            while len(chunk) < 65536:
+                more = bytes(device.read(65536 - len(chunk)))
+                if not more:
+                    break
+                chunk += more
+            ok += chunk == data[pos:pos + 65536]
+        results["seek_ms"] = (time.perf_counter() - start) / seeks * 1e3
+        results["seeks_ok"] = ok / seeks
+        device.close()
+
+        # fenêtres courtes après un seek : la fin de la fenêtre en cours est lue, connexion gardée
+        results["seek_requests"] = server.requests - results["sequential_requests"]
+        results["seek_connections"] = server.connections - results["sequential_connections"]
+        results["pool_connections"] = service.pool.connections_opened
+
+        # taille non annoncée (Content-Range bytes a-b/*) : lu jusqu'au 416 final
+        server.hide_total = True
+        device = service.open(f"{server.base_url}/live.mp3")
+        results["unknown_total_ok"] = float(_read_all(device) == data)
+        device.close()
+        server.hide_total = False
+    finally:
+        service.close()
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def main(argv):
+    latencies = [float(a) for a in argv] or [0.0, 50.0]
+    for latency in latencies:
+        print(f"--- latence {latency:.0f} ms")
+        for name, value in run(latency).items():
+            print(f"{name:32s} {value:12.4f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,139 @@
+"""Débit du lecteur de tags sur des fichiers synthétiques (MP3, MP4, MKV, WAV, AVI).
+
+    python -m benchmarks.bench_tags [fichiers par format] [Mo de données par fichier]
+"""
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from class_item.tag_reader import read_tags
+
+
+TITLE, ARTIST, ALBUM = "Titre é", "Artiste", "Album ü"
+
+
+def _id3_frame(frame_id, text):
+    data = b"\x03" + text.encode("utf-8")
+    return frame_id + struct.pack(">IH", len(data), 0) + data
+
+
+def _synchsafe(n):
+    return bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+
+
+def make_mp3(payload):
+    frames = (_id3_frame(b"TIT2", TITLE) + _id3_frame(b"TPE1", ARTIST)
+              + _id3_frame(b"TALB", ALBUM)
+              # pochette : doit être sautée sans être lue
+              + b"APIC" + struct.pack(">IH", 200_000, 0) + bytes(200_000))
+    tag = b"ID3\x03\x00\x00" + _synchsafe(len(frames)) + frames
+    v1 = b"TAG" + b"v1".ljust(30, b"\0") * 3 + bytes(35)
+    return tag + payload + v1
+
+
+def _box(kind, body):
+    return struct.pack(">I", 8 + len(body)) + kind + body
+
+
+def make_mp4(payload):
+    def item(kind, text):
+        return _box(kind, _box(b"data", struct.pack(">II", 1, 0) + text.encode("utf-8")))
+    ilst = _box(b"ilst", item(b"\xa9nam", TITLE) + item(b"\xa9ART", ARTIST) + item(b"\xa9alb", ALBUM))
+    meta = _box(b"meta", bytes(4) + _box(b"hdlr", bytes(25)) + ilst)
+    moov = _box(b"moov", _box(b"mvhd", bytes(100)) + _box(b"udta", meta))
+    # moov en fin de fichier, après les données
+    return _box(b"ftyp", b"isom\x00\x00\x02\x00isom") + _box(b"mdat", payload) + moov
+
+
+def _ebml(element_id, body):
+    size = len(body)
+    return element_id + bytes([0x01]) + size.to_bytes(7, "big") + body
+
+
+def _uint(element_id, value):
+    return _ebml(element_id, value.to_bytes(1, "big"))
+
+
+def _string(element_id, text):
+    return _ebml(element_id, text.encode("utf-8"))
+
+
+def make_mkv(payload):
+    def simple(name, value):
+        return _ebml(b"\x67\xc8", _string(b"\x45\xa3", name) + _string(b"\x44\x87", value))
+    tags = _ebml(b"\x12\x54\xc3\x67",
+                 _ebml(b"\x73\x73", _ebml(b"\x63\xc0", _uint(b"\x68\xca", 50)) + simple("TITLE", ALBUM))
+                 + _ebml(b"\x73\x73", _ebml(b"\x63\xc0", _uint(b"\x68\xca", 30))
+                         + simple("TITLE", TITLE) + simple("ARTIST", ARTIST)))
+    info = _ebml(b"\x15\x49\xa9\x66", _string(b"\x7b\xa9", "segment"))
+    cluster = _ebml(b"\x1f\x43\xb6\x75", payload)
+
+    def seekhead(tags_pos):
+        seek = _ebml(b"\x4d\xbb", _ebml(b"\x53\xab", b"\x12\x54\xc3\x67")
+                     + _ebml(b"\x53\xac", tags_pos.to_bytes(8, "big")))
+        return _ebml(b"\x11\x4d\x9b\x74", seek)
+    head_len = len(seekhead(0))
+    body = seekhead(head_len + len(info) + len(cluster)) + info + cluster + tags
+    header = _ebml(b"\x1a\x45\xdf\xa3", _string(b"\x42\x82", "matroska"))
+    return header + _ebml(b"\x18\x53\x80\x67", body)
+
+
+def _chunk(chunk_id, body):
+    return chunk_id + struct.pack("<I", len(body)) + body + (b"\0" if len(body) & 1 else b"")
+
+
+def _info():
+    return _chunk(b"LIST", b"INFO" + _chunk(b"INAM", TITLE.encode("utf-8") + b"\0")
+                  + _chunk(b"IART", ARTIST.encode("utf-8") + b"\0")
+                  + _chunk(b"IPRD", ALBUM.encode("utf-8") + b"\0"))
+
+
+def make_wav(payload):
+    body = b"WAVE" + _chunk(b"fmt ", bytes(16)) + _chunk(b"data", payload) + _info()
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def make_avi(payload):
+    body = (b"AVI " + _chunk(b"LIST", b"hdrl" + _chunk(b"avih", bytes(56))) + _info()
+            + _chunk(b"LIST", b"movi" + payload))
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+MAKERS = {".mp3": make_mp3, ".mp4": make_mp4, ".mkv": make_mkv, ".wav": make_wav, ".avi": make_avi}
+
+
+def run(count=500, payload_mb=1):
+    """Retourne {format: fichiers par seconde} ; vérifie au passage les tags lus."""
+    payload = bytes(payload_mb * 1_000_000)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext, make in MAKERS.items():
+            data = make(payload)
+            paths = []
+            for i in range(count):
+                path = os.path.join(tmp, f"{i}{ext}")
+                with open(path, "wb") as f:
+                    f.write(data)
+                paths.append(path)
+            tags = read_tags(paths[0])
+            expected = {"title": TITLE, "artist": ARTIST, "album": ALBUM}
+            if {k: tags.get(k) for k in expected} != expected:
+                raise AssertionError(f"{ext} : tags inattendus {tags}")
+            start = time.perf_counter()
+            for path in paths:
+                read_tags(path)
+            results[ext] = count / (time.perf_counter() - start)
+    return results
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 500
+    payload_mb = int(argv[1]) if len(argv) > 1 else 1
+    for ext, rate in run(count, payload_mb).items():
+        print(f"{ext:6s} {rate:10.0f} fichiers/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
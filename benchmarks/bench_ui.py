@@ -0,0 +1,205 @@
+"""Interface sans affichage : construction de MainWindow, chemin des frames
+vidéo (VideoWidget.set_frame -> pipeline -> paintEvent) avec des QVideoFrame
+synthétiques, durée des images des animations de tiroirs.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_ui [window|frames|drawers ...]
+
+Les données de l'application (session, index) vont dans un dossier
+temporaire (MYMP3_HOME) : les mesures ne dépendent pas du profil courant.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PySide6.QtCore import QSize, QCoreApplication, QTimer
+from PySide6.QtGui import QImage, QColor
+from PySide6.QtWidgets import QApplication
+
+
+# fenêtres gardées jusqu'à shutdown() : leurs threads de travail ne s'arrêtent
+# qu'à aboutToQuit et ne peuvent pas être détruits en cours d'exécution
+_alive = []
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+
+def _pump(seconds=0.0):
+    """Traite les événements en attente (et ceux qui arrivent pendant seconds)."""
+    app = QCoreApplication.instance()
+    end = time.perf_counter() + seconds
+    while True:
+        app.processEvents()
+        if time.perf_counter() >= end:
+            return
+        time.sleep(0.001)
+
+
+# construction de la fenêtre principale
+def run_window(runs=4):
+    """Durée de MainWindow() (sans affichage ni backend multimédia)."""
+    from graphics.main_window import MainWindow
+    samples = []
+    for _ in range(runs):
+        t, window = _timed(MainWindow)
+        samples.append(t)
+        _alive.append(window)
+    _pump()
+    # la première construction paie aussi les imports et la feuille de style
+    return {"construct_first_ms": samples[0] * 1e3,
+            "construct_ms": statistics.median(samples[1:] or samples) * 1e3}
+
+
+# chemin des frames vidéo
+def synthetic_frames(size, count, pixel_format="bgra"):
+    """count QVideoFrame de taille size : BGRA (empaqueté) ou YUV420P (via toImage)."""
+    from PySide6.QtMultimedia import QVideoFrame, QVideoFrameFormat
+    frames = []
+    for i in range(count):
+        if pixel_format == "bgra":
+            image = QImage(size, QImage.Format_ARGB32)
+            image.fill(QColor.fromHsv(i * 360 // count, 200, 200))
+            frames.append(QVideoFrame(image))
+            continue
+        frame = QVideoFrame(QVideoFrameFormat(size, QVideoFrameFormat.Format_YUV420P))
+        if not frame.map(QVideoFrame.MapMode.WriteOnly):
+            raise RuntimeError("QVideoFrame.map impossible")
+        try:
+            for plane in range(frame.planeCount()):
+                bits = memoryview(frame.bits(plane))
+                n = frame.mappedBytes(plane)
+                bits[:n] = bytes([(i * 37 + plane * 80) % 256]) * n
+        finally:
+            frame.unmap()
+        frames.append(frame)
+    return frames
+
+
+def run_frames(pixel_format="bgra", fps=60, seconds=2.0, source=QSize(1920, 1080),
+               widget_size=QSize(1280, 720)):
+    """Frames source à fps pendant seconds, affichées dans un VideoWidget de widget_size."""
+    from class_item.media_player import VideoWidget
+    from class_item.perf_counters import PerfCounters
+    perf = PerfCounters()
+    widget = VideoWidget(perf=perf)
+    widget.resize(widget_size)
+    widget.show()
+    _pump(0.05)
+    frames = synthetic_frames(source, 8, pixel_format)
+    count = int(fps * seconds)
+    interval = 1.0 / fps
+    start = time.perf_counter()
+    for i in range(count):
+        widget.set_frame(frames[i % len(frames)])
+        # cadence de la source : les événements (images prêtes, paints) entre deux frames
+        _pump(max(0.0, start + (i + 1) * interval - time.perf_counter()))
+    _pump(0.1)
+    elapsed = time.perf_counter() - start
+    s = perf.snapshot()
+    results = {
+        "set_frame_us": s["set_frame_ms"]["mean"] * 1e3,
+        "convert_ms": s["convert_ms"]["mean"],
+        "convert_p95_ms": s["convert_ms"]["p95"],
+        "paint_ms": s["paint_ms"]["mean"],
+        "latency_p95_ms": s["latency_ms"]["p95"],
+        "painted_fps": s["frames_painted"] / elapsed,
+        "dropped_fraction": s["frames_dropped"] / max(1, s["frames_received"]),
+    }
+    widget.close()
+    widget._pipeline.stop()
+    return results
+
+
+# animations des tiroirs
+def _animate(window, toggle, animation, steps):
+    """Ouvre ou ferme un tiroir image par image ; retourne (durée du toggle, durées des images)."""
+    t_toggle, _ = _timed(toggle)
+    anim = getattr(window, animation)
+    # animation pilotée à la main : chaque pas = valueChanged + repaint synchrone
+    anim.pause()
+    duration = anim.duration()
+    frames = []
+    for i in range(1, steps + 1):
+        start = time.perf_counter()
+        anim.setCurrentTime(duration * i // steps)
+        window.repaint()
+        frames.append(time.perf_counter() - start)
+    _pump()
+    return t_toggle, frames
+
+
+def run_drawers(steps=30, queue_entries=5000):
+    """Durées des images des tiroirs menu et file, avec et sans image figée."""
+    from graphics.main_window import MainWindow
+    window = MainWindow()
+    _alive.append(window)
+    window.mediaPlayer.queue.extend(
+        [(f"Titre {i}", f"Artiste {i % 97}", f"Album {i % 389}", f"/music/{i}.mp3")
+         for i in range(queue_entries)])
+    window.show()
+    # premier paint et création du backend
+    _pump(0.2)
+    results = {}
+    for snapshot in (True, False):
+        window.snapshotAnimations = snapshot
+        label = "snapshot" if snapshot else "live"
+        toggles, frames = [], []
+        # file ouverte puis menu ouvert (la file suit sa largeur), puis fermetures
+        for toggle, animation in ((window.toggleQueueDrawer, "queueDrawerAnim"),
+                                  (window.toggleMenuDrawer, "menuDrawerAnim"),
+                                  (window.toggleMenuDrawer, "menuDrawerAnim"),
+                                  (window.toggleQueueDrawer, "queueDrawerAnim")):
+            t, f = _animate(window, toggle, animation, steps)
+            toggles.append(t)
+            frames += f
+        results[f"{label}.toggle_ms"] = max(toggles) * 1e3
+        results[f"{label}.frame_ms"] = statistics.mean(frames) * 1e3
+        results[f"{label}.frame_p95_ms"] = _p95(frames) * 1e3
+    return results
+
+
+def shutdown(app):
+    """Quitte par la boucle d'événements : aboutToQuit arrête les threads de travail."""
+    QTimer.singleShot(0, app.quit)
+    app.exec()
+    _alive.clear()
+
+
+def use_temporary_home():
+    """Données de l'application dans un dossier temporaire (sauf MYMP3_HOME déjà fixé)."""
+    if "MYMP3_HOME" not in os.environ:
+        os.environ["MYMP3_HOME"] = tempfile.mkdtemp(prefix="mymp3-bench-")
+    return os.environ["MYMP3_HOME"]
+
+
+RUNS = {
+    "window": run_window,
+    "frames": lambda: {**{f"bgra.{k}": v for k, v in run_frames("bgra").items()},
+                       **{f"yuv420p.{k}": v for k, v in run_frames("yuv420p").items()}},
+    "drawers": run_drawers,
+}
+
+
+def main(argv):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    use_temporary_home()
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name in argv or list(RUNS):
+        print(f"--- {name}")
+        for metric, value in RUNS[name]().items():
+            print(f"{metric:32s} {value:12.4f}")
+    shutdown(app)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,321 @@
+"""Suite de benchmarks sans affichage (plateforme Qt offscreen), comparée à une
+référence enregistrée.
+
+    python -m benchmarks.suite [cas ...] [--save] [--baseline FICHIER]
+                               [--threshold 0.25] [--repeat 3] [--output FICHIER]
+
+Chaque cas tourne dans un processus neuf (dossier de données temporaire,
+QApplication offscreen) : repeat exécutions, médiane de chaque mesure,
+puis pic de mémoire résidente du processus (peak_rss_mb). Les résultats
+sont écrits en JSON ; --save les enregistre comme référence. Sinon, une
+mesure qui se dégrade de plus de threshold par rapport à la référence
+(ou un indicateur de justesse qui change) fait échouer la commande :
+code de sortie 1, 2 si un cas n'a pas pu tourner.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+
+class Case:
+    """Un cas de la suite : run() -> {mesure: valeur}.
+
+    Par défaut une valeur plus petite est meilleure ; higher, exact et info
+    sont des motifs (fnmatch) de noms de mesures plus grandes = meilleures,
+    devant rester identiques, ou seulement informatives.
+    """
+
+    __slots__ = ("run", "higher", "exact", "info", "threshold", "optional")
+
+    def __init__(self, run, higher=(), exact=(), info=(), threshold=None, optional=False):
+        self.run = run
+        self.higher = higher
+        self.exact = exact
+        self.info = info
+        # seuil propre au cas (mesures bruitées), sinon celui de la ligne de commande
+        self.threshold = threshold
+        # lancé seulement s'il est nommé explicitement
+        self.optional = optional
+
+    def kind(self, metric):
+        for kind, patterns in (("info", self.info), ("exact", self.exact), ("higher", self.higher)):
+            if any(fnmatch.fnmatchcase(metric, p) for p in patterns):
+                return kind
+        return "lower"
+
+
+def _queue():
+    from benchmarks import bench_queue
+    return bench_queue.run(200_000)
+
+
+def _search():
+    from benchmarks import bench_search
+    return bench_search.run(50_000)
+
+
+def _tags():
+    from benchmarks import bench_tags
+    return bench_tags.run(100, 1)
+
+
+def _dsp():
+    from benchmarks import bench_dsp
+    return bench_dsp.run(len(bench_dsp.EQ_BANDS))
+
+
+def _spectrum():
+    from benchmarks import bench_spectrum
+    return bench_spectrum.run(48, seconds=5)
+
+
+def _stream():
+    from benchmarks import bench_stream
+    return bench_stream.run(10.0, seeks=20)
+
+
+def _download():
+    from benchmarks import bench_download
+    return bench_download.run(3)
+
+
+def _window():
+    from benchmarks import bench_ui
+    return bench_ui.run_window()
+
+
+def _frames():
+    from benchmarks import bench_ui
+    return bench_ui.RUNS["frames"]()
+
+
+def _drawers():
+    from benchmarks import bench_ui
+    return bench_ui.run_drawers()
+
+
+def _startup():
+    from benchmarks import bench_startup
+    return bench_startup.run(runs=3)
+
+
+CASES = {
+    "queue": Case(_queue, info=("legacy.*",)),
+    "search": Case(_search),
+    # fichiers par seconde, par format
+    "tags": Case(_tags, higher=("*",)),
+    "dsp": Case(_dsp, higher=("realtime_factor",)),
+    "spectrum": Case(_spectrum),
+    "stream": Case(_stream, threshold=0.5, higher=("throughput_mb_s",),
+                   exact=("content_ok", "seeks_ok", "unknown_total_ok",
+                          "sequential_connections"),
+                   info=("stalls", "read_ahead_kb", "*_requests", "seek_connections",
+                         "pool_connections")),
+    "download": Case(_download, threshold=0.5, higher=("mb_s",),
+                     exact=("files_ok", "resume_ok", "bad_hash_rejected"),
+                     info=("cache_mb", "resume_requests")),
+    "window": Case(_window),
+    "frames": Case(_frames, higher=("*.painted_fps",)),
+    "drawers": Case(_drawers),
+    # lance main.py plusieurs fois : plus lent
+    "startup": Case(_startup, optional=True),
+}
+
+
+# processus enfant : un cas
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Ko ; macOS : octets
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def _run_case(name, repeat, result_path):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from benchmarks.bench_ui import shutdown, use_temporary_home
+    use_temporary_home()
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    try:
+        samples = [CASES[name].run() for _ in range(repeat)]
+    except Exception as e:
+        # dépendance absente (QtMultimedia…), assertion d'un benchmark
+        result = {"error": f"{type(e).__name__}: {e}"}
+    else:
+        metrics = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+        peak = _peak_rss_mb()
+        if peak is not None:
+            metrics["peak_rss_mb"] = peak
+        result = {"metrics": metrics}
+    # écrit avant la sortie : un thread mal arrêté ne fait pas perdre la mesure
+    with open(result_path, "w") as f:
+        json.dump(result, f)
+    shutdown(app)
+    return 0 if "metrics" in result else 1
+
+
+# processus parent
+def measure(names, repeat=3, timeout=900):
+    """Lance chaque cas dans un processus neuf ; retourne (mesures, erreurs)."""
+    metrics, errors = {}, {}
+    for name in names:
+        fd, result_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        start = time.perf_counter()
+        proc = None
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.suite", "--child", name,
+                 "--repeat", str(repeat), "--output", result_path],
+                cwd=ROOT, env=dict(os.environ, QT_QPA_PLATFORM="offscreen"),
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+            with open(result_path) as f:
+                result = json.load(f)
+            values = result.get("metrics")
+            if values is None:
+                errors[name] = result["error"]
+        except subprocess.TimeoutExpired:
+            errors[name] = f"délai dépassé ({timeout} s)"
+            values = None
+        except (OSError, ValueError):
+            # pas de résultat : dernière ligne utile de la sortie d'erreur
+            stderr = proc.stderr.decode(errors="replace") if proc is not None else ""
+            lines = [line for line in stderr.splitlines() if line.strip()]
+            errors[name] = lines[-1] if lines else f"code de sortie {getattr(proc, 'returncode', None)}"
+            values = None
+        finally:
+            os.remove(result_path)
+        elapsed = time.perf_counter() - start
+        if values is None:
+            print(f"{name:12s} ERREUR  {errors[name]}")
+            continue
+        print(f"{name:12s} {elapsed:6.1f} s")
+        for key, value in values.items():
+            metrics[f"{name}.{key.lstrip('.')}"] = value
+    return metrics, errors
+
+
+def environment():
+    import PySide6
+    return {
+        "python": platform.python_version(),
+        "pyside6": PySide6.__version__,
+        "machine": platform.machine(),
+        "system": platform.platform(),
+        "processor": platform.processor(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(metrics, baseline, threshold, ran=()):
+    """Lignes (nom, référence, actuel, écart relatif, état) ; état : ok, mieux, RÉGRESSION, info."""
+    rows = []
+    for name, value in metrics.items():
+        case = CASES[name.split(".", 1)[0]]
+        kind = case.kind(name.split(".", 1)[1])
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, value, None, "nouveau"))
+            continue
+        change = (value - base) / abs(base) if base else (0.0 if value == base else float("inf"))
+        limit = case.threshold if case.threshold is not None else threshold
+        if kind == "info":
+            state = "info"
+        elif kind == "exact":
+            state = "ok" if value == base else "RÉGRESSION"
+        else:
+            # écart dans le sens défavorable (positif = plus mauvais)
+            worse = change if kind == "lower" else -change
+            state = "RÉGRESSION" if worse > limit else ("mieux" if worse < -limit else "ok")
+        rows.append((name, base, value, change, state))
+    # mesure de référence disparue d'un cas qui a tourné
+    ran = set(ran)
+    for name in baseline:
+        if name not in metrics and name.split(".", 1)[0] in ran:
+            rows.append((name, baseline[name], None, None, "absent"))
+    return rows
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="cas à lancer (par défaut : tous les non optionnels)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="enregistrer les résultats comme référence")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="dégradation relative tolérée (0.25 = 25 %%)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--list", action="store_true", help="afficher les cas disponibles")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return _run_case(args.child, args.repeat, args.output)
+    if args.list:
+        for name, case in CASES.items():
+            print(name + (" (optionnel)" if case.optional else ""))
+        return 0
+    unknown = [n for n in args.cases if n not in CASES]
+    if unknown:
+        parser.error(f"cas inconnus : {', '.join(unknown)}")
+    names = args.cases or [n for n, case in CASES.items() if not case.optional]
+
+    metrics, errors = measure(names, args.repeat)
+    report = {"environment": environment(), "metrics": metrics, "errors": errors}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        # seuls les cas lancés sont remplacés dans la référence
+        try:
+            with open(args.baseline) as f:
+                previous = json.load(f).get("metrics", {})
+        except (OSError, ValueError):
+            previous = {}
+        ran = set(names)
+        kept = {k: v for k, v in previous.items() if k.split(".", 1)[0] not in ran}
+        with open(args.baseline, "w") as f:
+            json.dump({**report, "metrics": {**kept, **metrics}}, f, indent=2, sort_keys=True)
+        print("référence écrite dans", args.baseline)
+        return 2 if errors else 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except OSError:
+        for name, value in metrics.items():
+            print(f"{name:44s} {value:12.4f}")
+        print(f"pas de référence ({args.baseline}) : --save pour l'enregistrer")
+        return 2 if errors else 0
+
+    ran = [name for name in names if name not in errors]
+    rows = compare(metrics, baseline.get("metrics", {}), args.threshold, ran)
+    print(f"{'mesure':44s} {'référence':>12s} {'actuel':>12s} {'écart':>8s}")
+    for name, base, value, change, state in rows:
+        base_s = f"{base:12.4f}" if base is not None else f"{'-':>12s}"
+        value_s = f"{value:12.4f}" if value is not None else f"{'-':>12s}"
+        change_s = f"{change * 100:+7.1f}%" if change is not None and abs(change) != float("inf") else f"{'':>8s}"
+        print(f"{name:44s} {base_s} {value_s} {change_s}  {state}")
+    regressions = [row for row in rows if row[4] in ("RÉGRESSION", "absent")]
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+        return 1
+    return 2 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,31 @@
+import hashlib
+import os
+
+
+def data_dir():
+    """Dossier des données persistantes de l'application (index, session…)."""
+    path = os.environ.get("MYMP3_HOME") or os.path.join(os.path.expanduser("~"), ".mymp3")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_dir(name=None):
+    """Dossier de cache (pouvant être vidé sans perte) ; sous-dossier optionnel."""
+    path = os.path.join(data_dir(), "cache")
+    if name:
+        path = os.path.join(path, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_key(path):
+    """Empreinte (sha1) d'un fichier : chemin absolu, taille et date de modification.
+
+    Retourne None si le fichier n'existe pas.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    raw = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()
@@ -0,0 +1,402 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import (Qt, QObject, QRect, QUrl, QTimer, Signal, QCoreApplication,
+                            QBuffer, QIODevice)
+from PySide6.QtGui import QImage
+
+from class_item.app_paths import cache_dir
+from class_item.tag_reader import read_cover
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi")
+
+
+def thumbnail(image, size):
+    """Vignette carrée size x size : mise à l'échelle puis recadrage centré."""
+    scaled = image.scaled(size, size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    x = (scaled.width() - size) // 2
+    y = (scaled.height() - size) // 2
+    fmt = QImage.Format_ARGB32_Premultiplied if image.hasAlphaChannel() else QImage.Format_RGB32
+    return scaled.copy(QRect(x, y, size, size)).convertToFormat(fmt)
+
+
+def encode(image):
+    """Octets JPEG (PNG si l'image a de la transparence) de image."""
+    buffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG" if image.hasAlphaChannel() else "JPG", 85)
+    return bytes(buffer.data())
+
+
+class ImageLRU:
+    """Images en mémoire, les moins récemment utilisées évincées au-delà de max_bytes.
+
+    Une image nulle est une entrée valide : « pas de pochette ».
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self.bytes = 0
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        image = self._items.get(key)
+        if image is not None:
+            self._items.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= max(64, old.sizeInBytes())
+        self._items[key] = image
+        self.bytes += max(64, image.sizeInBytes())
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.bytes -= max(64, evicted.sizeInBytes())
+
+
+class DiskCache:
+    """Vignettes encodées sur disque, taille totale bornée (éviction LRU).
+
+    Un fichier vide mémorise l'absence de pochette. L'ordre d'utilisation
+    est reconstitué au premier accès à partir des dates de modification,
+    mises à jour à chaque lecture.
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or cache_dir("artwork")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self.bytes = 0
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                found.append((st.st_mtime_ns, entry.name, st.st_size))
+        found.sort()
+        self._entries = OrderedDict((name, size) for _, name, size in found)
+        self.bytes = sum(self._entries.values())
+
+    def get(self, key):
+        """Octets en cache pour key (b"" : pas de pochette) ou None si absent."""
+        with self._lock:
+            self._load()
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.bytes -= self._entries.pop(key, 0)
+            return None
+        return data
+
+    def put(self, key, data):
+        path = os.path.join(self.directory, key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            self._load()
+            self.bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self.bytes > self.max_bytes and self._entries:
+                name, size = self._entries.popitem(last=False)
+                self.bytes -= size
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class ArtworkService(QObject):
+    """Pochettes et vignettes vidéo, prêtes à peindre.
+
+    image() ne fait jamais de décodage : il répond depuis un LRU mémoire de
+    QImage déjà mises à l'échelle, ou retourne None et planifie le calcul.
+    Les workers lisent d'abord le cache disque, sinon extraient la pochette
+    intégrée (tag_reader) ou, pour une vidéo, une image prise à 10 % de la
+    durée ; artworkReady(path, size) est émis quand le résultat est connu
+    (image ou absence de pochette).
+    Les demandes les plus récentes (lignes visibles) sont servies en premier.
+    """
+
+    artworkReady = Signal(str, int)
+    # usage interne : résultat d'un worker, traité dans le thread GUI
+    _produced = Signal(str, int, QImage)
+    _needPoster = Signal(str, int)
+
+    # demandes en attente au-delà desquelles les plus anciennes sont oubliées
+    MAX_PENDING = 256
+
+    def __init__(self, parent=None, memory_bytes=32 * 1024 * 1024,
+                 disk_bytes=256 * 1024 * 1024, workers=2, directory=None):
+        super().__init__(parent)
+        self.memory = ImageLRU(memory_bytes)
+        # cache disque ouvert par le premier worker
+        self.disk = None
+        self._directory = directory
+        self._disk_bytes = disk_bytes
+        self._workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._running = 0
+        self._in_flight = set()
+        self._closing = False
+        self._posters = None
+        self._poster_sizes = {}
+        self._produced.connect(self._store)
+        self._needPoster.connect(self._grab_poster)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    # interface
+    def image(self, path, size):
+        """Vignette size x size de path, ou None (pas de pochette / calcul en cours)."""
+        key = (path, size)
+        image = self.memory.get(key)
+        if image is not None:
+            return None if image.isNull() else image
+        self.request(path, size)
+        return None
+
+    def request(self, path, size):
+        key = (path, size)
+        if self._closing:
+            return
+        with self._lock:
+            if key in self._in_flight:
+                return
+            self._pending[key] = None
+            self._pending.move_to_end(key)
+            while len(self._pending) > self.MAX_PENDING:
+                self._pending.popitem(last=False)
+            start = self._running < self._workers
+            if start:
+                self._running += 1
+        if start:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="artwork")
+            self._executor.submit(self._drain)
+
+    def close(self):
+        self._closing = True
+        with self._lock:
+            self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._posters is not None:
+            self._posters.stop()
+
+    # workers
+    def _disk(self):
+        with self._lock:
+            if self.disk is None:
+                self.disk = DiskCache(self._directory, self._disk_bytes)
+            return self.disk
+
+    @staticmethod
+    def _disk_key(path, size, st):
+        raw = f"{path}\0{st.st_size}\0{st.st_mtime_ns}\0{size}".encode("utf-8", "surrogatepass")
+        return hashlib.sha1(raw).hexdigest()
+
+    def _drain(self):
+        while not self._closing:
+            with self._lock:
+                if not self._pending:
+                    self._running -= 1
+                    return
+                key, _ = self._pending.popitem(last=True)
+                self._in_flight.add(key)
+            path, size = key
+            try:
+                image = self._produce(path, size)
+            except Exception as e:
+                print("artwork:", path, e)
+                image = QImage()
+            if image is not None:
+                self._produced.emit(path, size, image)
+        with self._lock:
+            self._running -= 1
+
+    def _produce(self, path, size):
+        """QImage (nulle si pas de pochette), ou None si une image vidéo est demandée."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return QImage()
+        disk = self._disk()
+        key = self._disk_key(path, size, st)
+        data = disk.get(key)
+        if data is not None:
+            return QImage.fromData(data) if data else QImage()
+        cover = read_cover(path)
+        source = QImage.fromData(cover) if cover else QImage()
+        if source.isNull():
+            if path.lower().endswith(VIDEO_EXTENSIONS):
+                self._needPoster.emit(path, size)
+                return None
+            disk.put(key, b"")
+            return QImage()
+        return self._save(key, thumbnail(source, size))
+
+    def _save(self, key, image):
+        data = encode(image)
+        if data:
+            self._disk().put(key, data)
+        return image
+
+    def _poster_done(self, path, sizes, frame):
+        # worker : vignette(s) d'une image vidéo capturée par PosterGrabber
+        source = frame.toImage() if frame is not None else QImage()
+        for size in sizes:
+            try:
+                key = self._disk_key(path, size, os.stat(path))
+                if source.isNull():
+                    self._disk().put(key, b"")
+                    image = QImage()
+                else:
+                    image = self._save(key, thumbnail(source, size))
+            except OSError:
+                image = QImage()
+            self._produced.emit(path, size, image)
+
+    # thread GUI
+    def _store(self, path, size, image):
+        self.memory.put((path, size), image)
+        with self._lock:
+            self._in_flight.discard((path, size))
+        self.artworkReady.emit(path, size)
+
+    def _grab_poster(self, path, size):
+        if self._closing:
+            return
+        sizes = self._poster_sizes.setdefault(path, set())
+        sizes.add(size)
+        if len(sizes) > 1:
+            return  # capture déjà demandée pour une autre taille
+        if self._posters is None:
+            self._posters = PosterGrabber(self)
+            self._posters.grabbed.connect(self._on_poster)
+        self._posters.grab(path)
+
+    def _on_poster(self, path, frame):
+        sizes = self._poster_sizes.pop(path, ())
+        if self._executor is not None and not self._closing:
+            self._executor.submit(self._poster_done, path, sizes, frame)
+
+
+class PosterGrabber(QObject):
+    """Capture une image d'une vidéo (à 10 % de sa durée), une vidéo à la fois.
+
+    Utilise un QMediaPlayer muet relié à un QVideoSink ; rien n'est affiché.
+    """
+
+    # chemin, QVideoFrame capturée (None en cas d'échec) ; la conversion
+    # en QImage est laissée au destinataire
+    grabbed = Signal(str, object)
+
+    TIMEOUT_MS = 5000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._queue = []
+        self._current = None
+        self._player = None
+        self._sink = None
+        self._target = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(lambda: self._finish(None))
+
+    def _ensure_player(self):
+        if self._player is not None:
+            return
+        from PySide6.QtMultimedia import QMediaPlayer, QVideoSink
+        self._player = QMediaPlayer(self)
+        self._sink = QVideoSink(self)
+        self._player.setVideoSink(self._sink)
+        self._player.mediaStatusChanged.connect(self._on_status)
+        self._player.errorOccurred.connect(lambda *a: self._finish(None))
+        self._sink.videoFrameChanged.connect(self._on_frame)
+
+    def grab(self, path):
+        if path not in self._queue and path != self._current:
+            self._queue.append(path)
+        if self._current is None:
+            self._next()
+
+    def stop(self):
+        self._queue.clear()
+        self._timer.stop()
+        if self._player is not None:
+            self._player.stop()
+        self._current = None
+
+    def _next(self):
+        if not self._queue:
+            self._current = None
+            return
+        self._ensure_player()
+        self._current = self._queue.pop(0)
+        self._target = 0
+        self._timer.start(self.TIMEOUT_MS)
+        self._player.setSource(QUrl.fromLocalFile(self._current))
+
+    def _on_status(self, status):
+        from PySide6.QtMultimedia import QMediaPlayer
+        if self._current is None:
+            return
+        if status == QMediaPlayer.LoadedMedia:
+            self._target = self._player.duration() // 10
+            if self._target > 0:
+                self._player.setPosition(self._target)
+            self._player.play()
+        elif status in (QMediaPlayer.InvalidMedia, QMediaPlayer.EndOfMedia):
+            self._finish(None)
+
+    def _on_frame(self, frame):
+        if self._current is None or not frame.isValid():
+            return
+        # ignorer les images antérieures au point de capture
+        if frame.startTime() // 1000 + 500 < self._target:
+            return
+        self._finish(frame)
+
+    def _finish(self, frame):
+        if self._current is None:
+            return
+        path = self._current
+        self._timer.stop()
+        self._player.stop()
+        self._player.setSource(QUrl())
+        self._current = None
+        self.grabbed.emit(path, frame)
+        self._next()
@@ -0,0 +1,131 @@
+"""Moteur audio optionnel : le son des lecteurs passe par le mélangeur numpy.
+
+Les deux QMediaPlayer du GaplessController gardent le décodage, l'horloge
+et la vidéo ; leur QAudioOutput est remplacée par une QAudioBufferOutput
+qui livre le PCM décodé (float, 48 kHz, stéréo) au rythme de la lecture.
+Le Mixer (class_item.dsp) mélange les deux platines, égalise et limite ;
+les blocs rendus sont rangés dans un anneau de tampons alloués une fois,
+d'où ils sont écrits dans un QAudioSink en mode push.
+"""
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Qt
+from PySide6.QtMultimedia import QAudioBufferOutput, QAudioFormat, QAudioSink, QMediaDevices
+
+from class_item.dsp import Mixer
+from class_item.peaks import buffer_frames
+
+
+class AudioEngine(QObject):
+    """Sortie audio commune aux lecteurs, avec fondu enchaîné et égaliseur."""
+
+    RATE = 48000
+    CHANNELS = 2
+    BLOCK = 1024
+    # blocs rendus d'avance (anneau de sortie) : ~170 ms à 48 kHz
+    SLOTS = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mixer = Mixer(self.RATE, self.CHANNELS, self.BLOCK)
+        self._players = ()
+        self._bufferOutputs = []
+        # callable(frames) recevant chaque bloc mixé (visualiseur), ou None
+        self.tap = None
+
+        decoded = QAudioFormat()
+        decoded.setSampleRate(self.RATE)
+        decoded.setChannelCount(self.CHANNELS)
+        decoded.setSampleFormat(QAudioFormat.Float)
+        self._decodedFormat = decoded
+
+        device = QMediaDevices.defaultAudioOutput()
+        fmt = QAudioFormat(decoded)
+        if not device.isFormatSupported(fmt):
+            fmt.setSampleFormat(QAudioFormat.Int16)
+        self._float_out = fmt.sampleFormat() == QAudioFormat.Float
+        dtype = np.float32 if self._float_out else np.int16
+        slot_bytes = self.BLOCK * self.CHANNELS * np.dtype(dtype).itemsize
+        # anneau de sortie : chaque case est un bytearray (accepté tel quel
+        # par QIODevice.write) avec sa vue numpy
+        self._slots = [bytearray(slot_bytes) for _ in range(self.SLOTS)]
+        self._views = [np.frombuffer(slot, dtype).reshape(self.BLOCK, self.CHANNELS)
+                       for slot in self._slots]
+        self._head = 0
+        self._filled = 0
+        self._mix = np.zeros((self.BLOCK, self.CHANNELS))
+        self._slot_bytes = slot_bytes
+
+        self.sink = QAudioSink(device, fmt, self)
+        self.sink.setBufferSize(4 * slot_bytes)
+        self._io = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        # moitié de la durée d'un bloc
+        self._timer.setInterval(max(1, self.BLOCK * 500 // self.RATE))
+        self._timer.timeout.connect(self._pump)
+
+    # raccordement aux lecteurs
+    def attach(self, players):
+        """Détourne le son de players (liste indexée comme les platines du mélangeur)."""
+        self._players = tuple(players)
+        for i, player in enumerate(self._players):
+            output = QAudioBufferOutput(self._decodedFormat, self)
+            output.audioBufferReceived.connect(lambda buffer, i=i: self._on_buffer(i, buffer))
+            player.setAudioOutput(None)
+            player.setAudioBufferOutput(output)
+            self._bufferOutputs.append(output)
+        self._io = self.sink.start()
+        self._timer.start()
+
+    def close(self):
+        self._timer.stop()
+        self.sink.stop()
+        self._io = None
+
+    # commandes (relayées au mélangeur)
+    def set_level(self, deck, level):
+        self.mixer.set_level(deck, level)
+
+    def set_eq(self, gains_db):
+        self.mixer.eq.set_gains(gains_db)
+
+    def cut(self, deck):
+        self.mixer.cut(deck)
+        self._filled = 0
+
+    def switch(self, deck, fade_ms=0):
+        self.mixer.switch(deck, fade_ms * self.RATE // 1000)
+
+    def flush(self, deck):
+        self.mixer.flush(deck)
+
+    # flux
+    def _on_buffer(self, deck, buffer):
+        if buffer.format().sampleRate() != self.RATE:
+            return
+        frames = buffer_frames(buffer)
+        if frames.shape[1] != self.CHANNELS:
+            # conversion refusée par le lecteur : canaux ramenés à ceux du mélangeur
+            frames = frames[:, np.arange(self.CHANNELS) % frames.shape[1]]
+        self.mixer.write(deck, frames)
+
+    def _pump(self):
+        io = self._io
+        if io is None:
+            return
+        # rendu des blocs manquants, puis écriture de ce que la carte accepte
+        while self._filled < self.SLOTS:
+            mix = self.mixer.render(self._mix)
+            if self.tap is not None:
+                self.tap(mix)
+            view = self._views[(self._head + self._filled) % self.SLOTS]
+            if self._float_out:
+                np.copyto(view, mix, casting="unsafe")
+            else:
+                mix *= 32767.0
+                np.copyto(view, mix, casting="unsafe")
+            self._filled += 1
+        while self._filled and self.sink.bytesFree() >= self._slot_bytes:
+            io.write(self._slots[self._head])
+            self._head = (self._head + 1) % self.SLOTS
+            self._filled -= 1
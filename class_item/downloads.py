@@ -0,0 +1,448 @@
+"""Téléchargements hors ligne des favoris en ligne.
+
+DownloadManager télécharge au plus MAX_CONCURRENT fichiers à la fois
+(pool de threads) dans des fichiers .part. Un transfert interrompu
+reprend là où il s'était arrêté (requête Range avec If-Range : si la
+ressource a changé, le serveur renvoie tout et on repart de zéro).
+L'empreinte SHA-256 est calculée pendant l'écriture et comparée à celle
+attendue (fournie, ou annoncée par le serveur : Repr-Digest / Digest).
+
+Les fichiers complets sont rangés dans OfflineCache, dont la taille
+totale est plafonnée : les copies les moins récemment lues sont
+supprimées en premier (LRU) et notées comme évincées, pour ne pas être
+retéléchargées automatiquement (sinon des favoris plus gros que le cache
+s'évinceraient l'un l'autre à chaque lancement). Les favoris eux-mêmes
+(OnlineFavorites) sont gardés dans la même base SQLite.
+"""
+import base64
+import hashlib
+import http.client
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from PySide6.QtCore import QCoreApplication, QObject, Signal
+
+from class_item.app_paths import cache_dir, data_dir
+from class_item.http_stream import HttpPool
+
+
+def default_db_path():
+    return os.path.join(data_dir(), "offline.sqlite3")
+
+
+def url_key(url):
+    """Nom de fichier stable pour url (sha1 de l'URL, extension conservée)."""
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    if not ext[1:].isalnum() or len(ext) > 6:
+        ext = ""
+    return hashlib.sha1(url.encode("utf-8", "surrogatepass")).hexdigest() + ext
+
+
+def announced_sha256(response):
+    """Empreinte SHA-256 (hex) annoncée par le serveur pour la ressource entière, ou None."""
+    # Repr-Digest (RFC 9530) : sha-256=:base64: ; Digest (RFC 3230) : SHA-256=base64
+    for header in ("Repr-Digest", "Digest"):
+        value = response.getheader(header)
+        if not value:
+            continue
+        for item in value.split(","):
+            name, _, encoded = item.strip().partition("=")
+            if name.lower() != "sha-256":
+                continue
+            try:
+                return base64.b64decode(encoded.strip(":")).hex()
+            except ValueError:
+                return None
+    return None
+
+
+def _validator(response):
+    """ETag fort ou Last-Modified : valeur d'If-Range pour reprendre ce contenu."""
+    etag = response.getheader("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.getheader("Last-Modified")
+
+
+class OfflineCache:
+    """Copies locales complètes des flux, plafonnées à max_bytes (éviction LRU).
+
+    Une connexion ne doit être utilisée que dans le thread qui l'a ouverte.
+    """
+
+    MAX_BYTES = 2 * 1024 ** 3
+
+    def __init__(self, path=None, directory=None, max_bytes=None):
+        self.path = path or default_db_path()
+        self.directory = directory or cache_dir("offline")
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS offline (
+                url TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS offline_used ON offline(used);
+            CREATE TABLE IF NOT EXISTS evicted (
+                url TEXT PRIMARY KEY,
+                at REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def partial_path(self, url):
+        """Fichier .part d'un téléchargement en cours de url."""
+        return os.path.join(self.directory, url_key(url) + ".part")
+
+    def _file(self, url, touch):
+        row = self._db.execute("SELECT file, size FROM offline WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        path = os.path.join(self.directory, row[0])
+        try:
+            present = os.path.getsize(path) == row[1]
+        except OSError:
+            present = False
+        if not present:
+            # copie effacée (cache vidé) ou tronquée : oubliée
+            self._db.execute("DELETE FROM offline WHERE url = ?", (url,))
+            self._db.commit()
+            return None
+        if touch:
+            self._db.execute("UPDATE offline SET used = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return path
+
+    def local_path(self, url):
+        """Copie locale de url (marquée comme lue), ou None."""
+        return self._file(url, True)
+
+    def contains(self, url):
+        return self._file(url, False) is not None
+
+    def sha256(self, url):
+        row = self._db.execute("SELECT sha256 FROM offline WHERE url = ?", (url,)).fetchone()
+        return row[0] if row is not None else None
+
+    def was_evicted(self, url):
+        """Vrai si la copie de url a été supprimée pour faire de la place (pas encore remplacée)."""
+        return self._db.execute("SELECT 1 FROM evicted WHERE url = ?", (url,)).fetchone() is not None
+
+    def total_size(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM offline").fetchone()[0]
+
+    def put(self, url, source, sha256):
+        """Range le fichier complet source comme copie de url ; retourne son chemin."""
+        name = url_key(url)
+        path = os.path.join(self.directory, name)
+        os.replace(source, path)
+        self._db.execute("INSERT OR REPLACE INTO offline(url, file, size, sha256, used) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (url, name, os.path.getsize(path), sha256, time.time()))
+        self._db.execute("DELETE FROM evicted WHERE url = ?", (url,))
+        self._db.commit()
+        self.evict(keep=url)
+        return path
+
+    def remove(self, url):
+        """Supprime la copie de url (et l'oubli d'une éviction)."""
+        self._db.execute("DELETE FROM evicted WHERE url = ?", (url,))
+        row = self._db.execute("SELECT file FROM offline WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            self._db.commit()
+            return
+        self._db.execute("DELETE FROM offline WHERE url = ?", (url,))
+        self._db.commit()
+        try:
+            os.remove(os.path.join(self.directory, row[0]))
+        except OSError:
+            pass
+
+    def evict(self, keep=None):
+        """Supprime les copies les moins récemment lues jusqu'à repasser sous max_bytes."""
+        excess = self.total_size() - self.max_bytes
+        if excess <= 0:
+            return []
+        evicted = []
+        for url, size in self._db.execute(
+                "SELECT url, size FROM offline ORDER BY used").fetchall():
+            if excess <= 0:
+                break
+            if url == keep:
+                continue
+            self.remove(url)
+            self._db.execute("INSERT OR REPLACE INTO evicted(url, at) VALUES (?, ?)",
+                             (url, time.time()))
+            self._db.commit()
+            evicted.append(url)
+            excess -= size
+        return evicted
+
+
+class OnlineFavorites:
+    """Liste persistante des favoris en ligne (url, titre), dans la base d'OfflineCache."""
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS favorites (
+                url TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                sha256 TEXT,
+                added REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def add(self, url, title, sha256=None):
+        self._db.execute("INSERT OR IGNORE INTO favorites(url, title, sha256, added) "
+                         "VALUES (?, ?, ?, ?)", (url, title, sha256, time.time()))
+        self._db.commit()
+
+    def remove(self, url):
+        self._db.execute("DELETE FROM favorites WHERE url = ?", (url,))
+        self._db.commit()
+
+    def entries(self):
+        """[(url, titre, sha256 attendu ou None)] dans l'ordre d'ajout."""
+        return self._db.execute("SELECT url, title, sha256 FROM favorites ORDER BY added").fetchall()
+
+
+def _remove_partial(part):
+    """Efface un .part et son .part.json (s'ils existent)."""
+    for path in (part, part + ".json"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class _Job:
+    __slots__ = ("url", "expected", "part", "cancel", "ended", "after", "discard")
+
+    def __init__(self, url, expected, part, after=None):
+        self.url = url
+        self.expected = expected
+        self.part = part
+        self.cancel = threading.Event()
+        self.ended = threading.Event()
+        # job annulé de la même url, qui écrit peut-être encore dans part
+        self.after = after
+        # annulé avec discard : .part et .part.json effacés à la sortie du thread
+        self.discard = False
+
+
+class DownloadManager(QObject):
+    """Téléchargements concurrents (bornés), reprenables et vérifiés vers un OfflineCache.
+
+    Les signaux sont émis dans le thread de l'objet ; le cache n'est
+    touché que depuis ce thread.
+    """
+
+    # url, octets reçus, taille totale (-1 si inconnue)
+    progress = Signal(str, int, int)
+    # url, chemin de la copie locale
+    finished = Signal(str, str)
+    # url, message
+    failed = Signal(str, str)
+    # depuis les threads de téléchargement : job terminé, empreinte
+    _completed = Signal(object, str)
+    _failed = Signal(object, str)
+
+    MAX_CONCURRENT = 3
+    CHUNK = 64 * 1024
+    # nouvelles tentatives (avec reprise) après une erreur réseau
+    RETRIES = 4
+    # intervalle minimal entre deux signaux progress d'un même téléchargement
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, cache, pool=None, parent=None, max_concurrent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.pool = pool or HttpPool()
+        self._jobs = {}
+        # jobs annulés dont le thread n'a peut-être pas encore rendu la main
+        self._cancelled = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent or self.MAX_CONCURRENT,
+                                            thread_name_prefix="download")
+        self._completed.connect(self._on_completed)
+        self._failed.connect(self._on_failed)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    def is_active(self, url):
+        return url in self._jobs
+
+    def download(self, url, sha256=None):
+        """Planifie le téléchargement de url (sans effet s'il est en cache ou déjà prévu)."""
+        if url in self._jobs or self.cache.contains(url):
+            return False
+        job = _Job(url, sha256.lower() if sha256 else None, self.cache.partial_path(url),
+                   self._cancelled.pop(url, None))
+        self._jobs[url] = job
+        self._executor.submit(self._run, job)
+        return True
+
+    def cancel(self, url, discard=False):
+        """Interrompt le téléchargement de url ; discard : oublie aussi la partie reçue."""
+        job = self._jobs.pop(url, None)
+        if job is not None:
+            job.cancel.set()
+            self._cancelled[url] = job
+        if discard:
+            running = self._cancelled.get(url)
+            if running is not None:
+                # le thread a pu garder le fichier ouvert (Windows) : effacé à sa sortie
+                running.discard = True
+            _remove_partial(self.cache.partial_path(url))
+
+    def close(self):
+        for job in self._jobs.values():
+            job.cancel.set()
+        self._jobs.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # thread de l'objet
+    def _on_completed(self, job, sha256):
+        if self._jobs.get(job.url) is not job:
+            return
+        del self._jobs[job.url]
+        try:
+            path = self.cache.put(job.url, job.part, sha256)
+        except OSError as e:
+            self.failed.emit(job.url, str(e))
+            return
+        try:
+            os.remove(job.part + ".json")
+        except OSError:
+            pass
+        self.finished.emit(job.url, path)
+
+    def _on_failed(self, job, message):
+        if self._jobs.get(job.url) is job:
+            del self._jobs[job.url]
+            self.failed.emit(job.url, message)
+
+    # threads de téléchargement
+    def _run(self, job):
+        try:
+            if job.after is not None:
+                job.after.ended.wait()
+                job.after = None
+            self._attempts(job)
+        finally:
+            # avant ended : un job suivant de la même url ne reprend pas ces octets
+            if job.discard:
+                _remove_partial(job.part)
+            job.ended.set()
+
+    def _attempts(self, job):
+        delay = 0.5
+        for attempt in range(self.RETRIES + 1):
+            if job.cancel.is_set():
+                return
+            try:
+                sha256 = self._transfer(job)
+            except (OSError, http.client.HTTPException) as e:
+                if job.cancel.is_set():
+                    return
+                if attempt == self.RETRIES:
+                    print("téléchargement impossible:", job.url, e)
+                    self._failed.emit(job, str(e))
+                    return
+                # la prochaine tentative reprend à la fin du .part
+                job.cancel.wait(delay)
+                delay = min(8.0, delay * 2)
+                continue
+            except ValueError as e:
+                self._failed.emit(job, str(e))
+                return
+            if sha256 is not None:
+                self._completed.emit(job, sha256)
+            return
+
+    def _load_state(self, job):
+        try:
+            with open(job.part + ".json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _transfer(self, job):
+        """Télécharge (ou reprend) job.part ; retourne l'empreinte, ou None si annulé."""
+        state = self._load_state(job)
+        try:
+            have = os.path.getsize(job.part)
+        except OSError:
+            have = 0
+        headers = {}
+        if have:
+            if not state.get("validator"):
+                # rien pour garantir que la partie reçue est toujours valable
+                have = 0
+            else:
+                headers["If-Range"] = state["validator"]
+        response = self.pool.open(job.url, have, None, headers)
+        try:
+            if response.start != have:
+                # Range ignoré ou ressource modifiée (If-Range) : tout depuis le début
+                have = 0
+            total = response.total
+            if total is not None and total > self.cache.max_bytes:
+                raise ValueError(f"fichier plus grand que le cache ({total} octets)")
+            expected = job.expected or announced_sha256(response) or state.get("expected")
+            state = {"validator": _validator(response), "expected": expected}
+            with open(job.part + ".json", "w", encoding="utf-8") as f:
+                json.dump(state, f)
+
+            digest = hashlib.sha256()
+            with open(job.part, "r+b" if have else "wb") as f:
+                # empreinte de la partie déjà reçue, puis suite du fichier
+                while f.tell() < have:
+                    digest.update(f.read(min(self.CHUNK * 16, have - f.tell())))
+                f.truncate(have)
+                done = have
+                last = 0.0
+                while True:
+                    if job.cancel.is_set():
+                        response.abort()
+                        return None
+                    chunk = response.read(self.CHUNK)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    digest.update(chunk)
+                    done += len(chunk)
+                    now = time.monotonic()
+                    if now - last >= self.PROGRESS_INTERVAL:
+                        last = now
+                        self.progress.emit(job.url, done, -1 if total is None else total)
+        finally:
+            response.close()
+        if total is not None and done < total:
+            raise OSError(f"transfert interrompu à {done}/{total} octets")
+        self.progress.emit(job.url, done, done)
+        sha256 = digest.hexdigest()
+        if expected and sha256 != expected.lower():
+            # contenu corrompu : la prochaine demande repart de zéro
+            _remove_partial(job.part)
+            raise ValueError(f"empreinte incorrecte : {sha256} au lieu de {expected}")
+        return sha256
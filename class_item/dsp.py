@@ -0,0 +1,353 @@
+"""Traitement du signal du moteur audio : égaliseur, fondu enchaîné, limiteur.
+
+Tout travaille par blocs de frames (float64, forme (frames, canaux)) dans
+des tableaux alloués une fois : aucun bloc traité n'alloue de mémoire
+(ufuncs et matmul avec out=).
+
+L'égaliseur est une cascade de biquads (formules RBJ) réunie en un seul
+système d'état (A, B, C, D). Un filtre récursif ne se vectorise pas
+échantillon par échantillon ; on le découpe donc en sous-blocs de L
+frames, pour lesquels la sortie vaut
+
+    y = Obs · x + Toe · u        et l'état suivant  x' = A^L · x + Ctl · u
+
+(Toe : matrice de Toeplitz de la réponse impulsionnelle tronquée à L).
+Les produits Toe · u et Ctl · u de tous les sous-blocs d'un bloc sont
+de simples matmul ; seule la propagation de l'état (S valeurs, S = deux
+par bande active) reste une boucle Python, d'un tour par sous-bloc.
+"""
+import math
+
+import numpy as np
+
+
+# bandes de l'égaliseur graphique (Hz) et leur facteur de qualité
+EQ_BANDS = (31.25, 62.5, 125.0, 250.0, 500.0, 1000.0, 2000.0, 4000.0, 8000.0, 16000.0)
+EQ_Q = 1.41
+
+
+def peaking(freq, gain_db, q, rate):
+    """Coefficients (b0, b1, b2, a1, a2) d'un filtre en cloche, a0 normalisé à 1."""
+    a = 10.0 ** (gain_db / 40.0)
+    w = 2.0 * math.pi * freq / rate
+    alpha = math.sin(w) / (2.0 * q)
+    cos_w = math.cos(w)
+    a0 = 1.0 + alpha / a
+    return ((1.0 + alpha * a) / a0, -2.0 * cos_w / a0, (1.0 - alpha * a) / a0,
+            -2.0 * cos_w / a0, (1.0 - alpha / a) / a0)
+
+
+def state_space(sections):
+    """Système d'état (A, B, C, D) de la cascade de biquads sections.
+
+    Chaque biquad est pris sous forme directe II transposée :
+    s1' = -a1·s1 + s2 + (b1 - a1·b0)·u,  s2' = -a2·s1 + (b2 - a2·b0)·u,  y = s1 + b0·u.
+    """
+    A = np.zeros((0, 0))
+    B = np.zeros(0)
+    C = np.zeros(0)
+    D = 1.0
+    for b0, b1, b2, a1, a2 in sections:
+        a_s = np.array([[-a1, 1.0], [-a2, 0.0]])
+        b_s = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        c_s = np.array([1.0, 0.0])
+        # la sortie de la cascade précédente (C·x + D·u) attaque ce biquad
+        n = len(B)
+        A_next = np.zeros((n + 2, n + 2))
+        A_next[:n, :n] = A
+        A_next[n:, :n] = np.outer(b_s, C)
+        A_next[n:, n:] = a_s
+        A = A_next
+        B = np.concatenate((B, b_s * D))
+        C = np.concatenate((C * b0, c_s))
+        D = D * b0
+    return A, B, C, D
+
+
+class BlockFilter:
+    """Filtre d'état linéaire appliqué par blocs de block frames (block multiple de sub)."""
+
+    def __init__(self, sections, block, channels, sub=64):
+        if block % sub:
+            raise ValueError("block doit être un multiple de sub")
+        self.block = block
+        self.channels = channels
+        self.sub = sub
+        A, B, C, D = state_space(sections)
+        s = len(B)
+        self.order = s
+        # réponse impulsionnelle sur un sous-bloc : h[0] = D, h[k] = C·A^(k-1)·B
+        powers = [np.eye(s)]
+        for _ in range(sub):
+            powers.append(A @ powers[-1])
+        h = np.empty(sub)
+        h[0] = D
+        for k in range(1, sub):
+            h[k] = C @ powers[k - 1] @ B
+        idx = np.arange(sub)
+        lag = idx[:, None] - idx[None, :]
+        self._toe = np.where(lag >= 0, h[np.maximum(lag, 0)], 0.0)
+        self._obs = np.array([C @ powers[n] for n in range(sub)]).reshape(sub, s)
+        self._ctl = np.array([powers[sub - 1 - m] @ B for m in range(sub)]).reshape(sub, s).T.copy()
+        self._a_sub = powers[sub]
+
+        k = block // sub
+        self._states = np.zeros((k + 1, s, channels))
+        self._inputs = np.empty((k, s, channels))
+        self._free = np.empty((k, sub, channels))
+
+    def reset(self):
+        self._states[0] = 0.0
+
+    def process(self, x, out):
+        """Filtre x (block, canaux) dans out (tableau distinct de x)."""
+        k = self.block // self.sub
+        u = x.reshape(k, self.sub, self.channels)
+        y = out.reshape(k, self.sub, self.channels)
+        states = self._states
+        if self.order:
+            np.matmul(self._ctl, u, out=self._inputs)
+            for i in range(k):
+                np.matmul(self._a_sub, states[i], out=states[i + 1])
+                states[i + 1] += self._inputs[i]
+            np.matmul(self._obs, states[:k], out=self._free)
+        np.matmul(self._toe, u, out=y)
+        if self.order:
+            y += self._free
+            states[0] = states[k]
+        return out
+
+
+class Equalizer:
+    """Égaliseur graphique EQ_BANDS ; seules les bandes à gain non nul sont filtrées."""
+
+    def __init__(self, rate, block, channels):
+        self.rate = rate
+        self.block = block
+        self.channels = channels
+        self.gains = [0.0] * len(EQ_BANDS)
+        self._filter = None
+        # résultat intermédiaire (le filtre n'écrit pas sur son entrée)
+        self._tmp = np.empty((block, channels))
+
+    def set_gains(self, gains_db):
+        """Gains en dB par bande ; à appeler hors du chemin de traitement (alloue)."""
+        gains = [float(g) for g in gains_db]
+        if len(gains) != len(EQ_BANDS):
+            raise ValueError(f"{len(EQ_BANDS)} gains attendus")
+        self.gains = gains
+        nyquist = self.rate / 2.0
+        sections = [peaking(f, g, EQ_Q, self.rate)
+                    for f, g in zip(EQ_BANDS, gains) if abs(g) > 0.05 and f < nyquist * 0.95]
+        self._filter = BlockFilter(sections, self.block, self.channels) if sections else None
+
+    def process(self, x):
+        """Filtre x (block, canaux) sur place."""
+        filt = self._filter
+        if filt is not None:
+            filt.process(x, self._tmp)
+            np.copyto(x, self._tmp)
+        return x
+
+
+class FrameRing:
+    """Tampon circulaire de frames float64 pré-alloué (un producteur, un consommateur).
+
+    Plein, il écrase les frames les plus anciennes (le producteur est en
+    avance sur la sortie : mieux vaut perdre du retard que grossir).
+    """
+
+    def __init__(self, capacity, channels):
+        self._data = np.zeros((capacity, channels))
+        self.capacity = capacity
+        self._read = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._read = 0
+        self._count = 0
+
+    def write(self, frames):
+        n = len(frames)
+        cap = self.capacity
+        if n >= cap:
+            frames = frames[n - cap:]
+            self._read = 0
+            self._count = 0
+            n = cap
+        overflow = self._count + n - cap
+        if overflow > 0:
+            self._read = (self._read + overflow) % cap
+            self._count -= overflow
+        start = (self._read + self._count) % cap
+        first = min(n, cap - start)
+        self._data[start:start + first] = frames[:first]
+        if first < n:
+            self._data[:n - first] = frames[first:]
+        self._count += n
+
+    def read_into(self, out):
+        """Copie au plus len(out) frames dans out ; retourne le nombre copié."""
+        n = min(len(out), self._count)
+        start = self._read
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        if first < n:
+            out[first:n] = self._data[:n - first]
+        self._read = (start + n) % self.capacity
+        self._count -= n
+        return n
+
+
+class Mixer:
+    """Mélange deux platines (lecteur actif et lecteur suivant) en blocs de sortie.
+
+    Chaque platine reçoit ses frames décodées par write(). switch() fait
+    passer la sortie d'une platine à l'autre : sans fondu, la fin déjà
+    reçue de la platine sortante est jouée d'abord (enchaînement sans
+    blanc) ; avec fondu, les deux sont mélangées selon des courbes à
+    puissance constante. Suivent l'égaliseur puis le limiteur de crêtes.
+    """
+
+    DECKS = 2
+    # une platine n'est lue qu'une fois ce nombre de blocs reçu (gigue des tampons)
+    PREBUFFER_BLOCKS = 2
+    # plafond du limiteur et remontée du gain par bloc
+    CEILING = 0.98
+    RELEASE = 1.02
+
+    def __init__(self, rate, channels=2, block=1024, buffer_s=1.0):
+        self.rate = rate
+        self.channels = channels
+        self.block = block
+        capacity = max(4 * block, int(rate * buffer_s))
+        self.decks = [FrameRing(capacity, channels) for _ in range(self.DECKS)]
+        self.levels = [1.0] * self.DECKS
+        self.eq = Equalizer(rate, block, channels)
+        self.current = 0
+        self._draining = None
+        self._primed = [False] * self.DECKS
+        # fondu en cours : platine sortante, position et longueur en frames
+        self._fade_from = None
+        self._fade_pos = 0
+        self._fade_len = 0
+        self._limit_gain = 1.0
+
+        self._deck_buf = np.zeros((block, channels))
+        self._ramp = np.empty(block)
+        self._gain_in = np.empty(block)
+        self._gain_out = np.empty(block)
+        self._steps = np.arange(block, dtype=np.float64)
+        self._peak = np.empty((block, channels))
+
+    # côté producteur
+    def write(self, deck, frames):
+        self.decks[deck].write(frames)
+
+    def set_level(self, deck, level):
+        self.levels[deck] = float(level)
+
+    def flush(self, deck):
+        """Oublie les frames reçues par deck (recherche, arrêt)."""
+        self.decks[deck].clear()
+        self._primed[deck] = False
+        if self._draining == deck:
+            self._draining = None
+
+    def cut(self, deck):
+        """deck devient la seule platine audible, sans transition."""
+        for i in range(self.DECKS):
+            self.flush(i)
+        self.current = deck
+        self._draining = None
+        self._fade_from = None
+
+    def switch(self, deck, fade_frames=0):
+        """Passe la sortie sur deck, avec un fondu de fade_frames frames (0 : enchaînement)."""
+        if deck == self.current:
+            return
+        previous, self.current = self.current, deck
+        # enchaînement : la fin de la platine sortante laisse le temps de
+        # remplir deck, qui est lu dès ses premières frames
+        self._primed[deck] = fade_frames <= 0
+        if fade_frames > 0:
+            self._fade_from = previous
+            self._fade_pos = 0
+            self._fade_len = int(fade_frames)
+            self._draining = None
+        else:
+            self._fade_from = None
+            self._draining = previous
+
+    # côté sortie
+    def _take(self, deck, out, first=0):
+        """Lit deck dans out[first:] ; retourne le nombre de frames lues."""
+        ring = self.decks[deck]
+        if not self._primed[deck]:
+            if len(ring) < self.PREBUFFER_BLOCKS * self.block:
+                return 0
+            self._primed[deck] = True
+        return ring.read_into(out[first:])
+
+    def render(self, out):
+        """Remplit out (block, canaux) avec le bloc suivant, silence compris."""
+        out[:] = 0.0
+        n = 0
+        if self._draining is not None:
+            # fin de la piste sortante d'abord
+            n = self.decks[self._draining].read_into(out)
+            out[:n] *= self.levels[self._draining]
+            if n < self.block:
+                self._draining = None
+        if self._fade_from is not None:
+            self._render_fade(out)
+        elif n < self.block:
+            got = self._take(self.current, self._deck_buf[:self.block - n])
+            np.multiply(self._deck_buf[:got], self.levels[self.current], out=out[n:n + got])
+        self.eq.process(out)
+        self._limit(out)
+        return out
+
+    def _render_fade(self, out):
+        # position dans le fondu de chaque frame du bloc, bornée à [0, 1]
+        ramp = self._ramp
+        np.add(self._steps, self._fade_pos, out=ramp)
+        ramp *= 1.0 / self._fade_len
+        np.clip(ramp, 0.0, 1.0, out=ramp)
+        ramp *= math.pi / 2.0
+        np.sin(ramp, out=self._gain_in)
+        np.cos(ramp, out=self._gain_out)
+        buf = self._deck_buf
+        for deck, gains in ((self._fade_from, self._gain_out), (self.current, self._gain_in)):
+            buf[:] = 0.0
+            self._take(deck, buf)
+            gains *= self.levels[deck]
+            buf *= gains[:, None]
+            out += buf
+        self._fade_pos += self.block
+        if self._fade_pos >= self._fade_len:
+            self.flush(self._fade_from)
+            self._fade_from = None
+
+    def _limit(self, out):
+        """Limiteur de crêtes : gain par bloc, attaque immédiate, remontée progressive."""
+        np.abs(out, out=self._peak)
+        peak = float(self._peak.max())
+        target = min(1.0, self.CEILING / peak) if peak > 0.0 else 1.0
+        start = self._limit_gain
+        end = min(target, start * self.RELEASE)
+        if start == 1.0 and end == 1.0:
+            return
+        if end < start:
+            # rampe sur le bloc, puis écrêtage des frames qui dépassent avant la fin
+            ramp = self._ramp
+            np.multiply(self._steps, (end - start) / self.block, out=ramp)
+            ramp += start
+            out *= ramp[:, None]
+            np.clip(out, -self.CEILING, self.CEILING, out=out)
+        else:
+            out *= end
+        self._limit_gain = end
@@ -0,0 +1,171 @@
+"""Recherche de doublons (contenu identique) dans la bibliothèque.
+
+Trois étapes, chacune ne traitant que ce qui collisionne encore :
+1. regroupement par taille (depuis l'index, sans accès disque) ;
+2. empreinte du début et de la fin du fichier (lecture par mmap) ;
+3. empreinte complète des candidats restants.
+Les étapes 2 et 3 tournent dans un pool de processus, par lots.
+"""
+import hashlib
+import mmap
+import multiprocessing
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from PySide6.QtCore import QThread, Signal
+
+from class_item.library_scanner import LibraryIndex, default_index_path
+
+
+# octets lus au début et à la fin de chaque fichier à l'étape 2
+EDGE = 64 * 1024
+# fichiers par tâche envoyée au pool
+BATCH = 64
+
+
+def _edge_digest(path, size):
+    """Empreinte du début et de la fin ; complète si le fichier tient dans 2 * EDGE."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        if size <= 2 * EDGE:
+            h.update(f.read())
+            return h.digest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            h.update(m[:EDGE])
+            h.update(m[-EDGE:])
+    return h.digest()
+
+
+def _full_digest(path, size):
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            h.update(m)
+    return h.digest()
+
+
+def _hash_batch(full, items):
+    """Empreintes de (path, size) ; None pour un fichier illisible ou modifié."""
+    digest = _full_digest if full else _edge_digest
+    results = []
+    for path, size in items:
+        try:
+            if os.path.getsize(path) != size:
+                results.append((path, None))
+                continue
+            results.append((path, digest(path, size)))
+        except (OSError, ValueError):
+            results.append((path, None))
+    return results
+
+
+def group_by_size(entries):
+    """{taille: [path, …]} limité aux tailles partagées par au moins deux fichiers."""
+    buckets = defaultdict(list)
+    for path, size in entries:
+        if size > 0:
+            buckets[size].append(path)
+    return {size: paths for size, paths in buckets.items() if len(paths) > 1}
+
+
+class DuplicateFinder(QThread):
+    """Cherche les doublons des fichiers indexés en arrière-plan.
+
+    progress(étape, faits, total) est émis au fil des lots ; groupsReady
+    (groupes), une liste de listes de chemins au contenu identique, les plus
+    gros fichiers en premier, ou failed(message) précède finished. Rien
+    n'est émis après une annulation.
+    """
+
+    progress = Signal(str, int, int)
+    groupsReady = Signal(list)
+    failed = Signal(str)
+
+    def __init__(self, index_path=None, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.index_path = index_path or default_index_path()
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            groups = self._find()
+        except Exception as e:
+            # index illisible, pool de processus cassé…
+            print("duplicates:", e)
+            self.failed.emit(str(e))
+            return
+        if groups is not None:
+            self.groupsReady.emit(groups)
+
+    def _find(self):
+        """Groupes de doublons, ou None si annulé."""
+        index = LibraryIndex(self.index_path)
+        try:
+            entries = index.sizes()
+        finally:
+            index.close()
+        buckets = group_by_size(entries)
+        self.progress.emit("taille", len(entries), len(entries))
+        if not buckets:
+            return []
+
+        # spawn : pas de copie de l'état Qt du processus principal
+        pool = ProcessPoolExecutor(self.max_workers,
+                                   mp_context=multiprocessing.get_context("spawn"))
+        try:
+            candidates = [(path, size) for size, paths in buckets.items() for path in paths]
+            edges = self._hash_all(pool, "début/fin", False, candidates)
+            if edges is None:
+                return None
+            groups, to_verify = [], []
+            for (size, _), paths in self._collisions(candidates, edges).items():
+                if size <= 2 * EDGE:
+                    # empreinte déjà complète
+                    groups.append(paths)
+                else:
+                    to_verify.extend((path, size) for path in paths)
+            fulls = self._hash_all(pool, "contenu", True, to_verify)
+            if fulls is None:
+                return None
+            groups.extend(self._collisions(to_verify, fulls).values())
+        finally:
+            # annulation ou erreur : les lots en cours (jusqu'à BATCH fichiers
+            # entiers) finissent dans leurs processus, sans être attendus
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        sizes = dict(entries)
+        groups.sort(key=lambda paths: (-sizes[paths[0]], paths[0]))
+        return [sorted(paths) for paths in groups]
+
+    @staticmethod
+    def _collisions(items, digests):
+        """{(taille, empreinte): [path, …]} pour les empreintes partagées."""
+        groups = defaultdict(list)
+        for path, size in items:
+            digest = digests.get(path)
+            if digest is not None:
+                groups[(size, digest)].append(path)
+        return {key: paths for key, paths in groups.items() if len(paths) > 1}
+
+    def _hash_all(self, pool, stage, full, items):
+        """{path: empreinte} de items, ou None si annulé."""
+        digests = {}
+        total = len(items)
+        jobs = {pool.submit(_hash_batch, full, items[i:i + BATCH]) for i in range(0, total, BATCH)}
+        while jobs:
+            if self._cancel.is_set():
+                for job in jobs:
+                    job.cancel()
+                return None
+            done, jobs = wait(jobs, timeout=0.2, return_when=FIRST_COMPLETED)
+            for job in done:
+                digests.update(job.result())
+            if done:
+                self.progress.emit(stage, len(digests), total)
+        return digests
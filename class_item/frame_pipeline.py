@@ -0,0 +1,144 @@
+import threading
+import time
+
+from PySide6.QtCore import Qt, QSize, QThread, Signal, QCoreApplication
+from PySide6.QtGui import QImage
+
+from class_item.tracing import tracer
+
+
+def _packed_formats():
+    """Formats QVideoFrame à un seul plan, lisibles tels quels par QImage."""
+    from PySide6.QtMultimedia import QVideoFrameFormat as F
+    table = {
+        F.Format_BGRA8888: QImage.Format_ARGB32,
+        F.Format_BGRA8888_Premultiplied: QImage.Format_ARGB32_Premultiplied,
+        F.Format_BGRX8888: QImage.Format_RGB32,
+        F.Format_RGBA8888: QImage.Format_RGBA8888,
+        F.Format_RGBX8888: QImage.Format_RGBX8888,
+    }
+    return table
+
+
+def frame_to_scaled_image(frame, size, formats=None):
+    """Convertit un QVideoFrame en QImage RGB32 ajusté (KeepAspectRatio) à size.
+
+    Pour les formats 32 bits empaquetés, le plan est mappé et lu en place :
+    la seule copie est celle produite par la mise à l'échelle. Les autres
+    formats (YUV…) passent par QVideoFrame.toImage().
+    """
+    from PySide6.QtMultimedia import QVideoFrame
+    if formats is None:
+        formats = _packed_formats()
+    img = None
+    qfmt = formats.get(frame.pixelFormat())
+    if qfmt is not None and _is_upright(frame) and frame.map(QVideoFrame.ReadOnly):
+        try:
+            src = QImage(frame.bits(0), frame.width(), frame.height(),
+                         frame.bytesPerLine(0), qfmt)
+            if not src.isNull():
+                # scaled() copie : l'image ne référence plus le plan après unmap
+                img = src.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        except Exception:
+            img = None
+        finally:
+            frame.unmap()
+    if img is None:
+        src = frame.toImage()
+        if src.isNull():
+            return QImage()
+        img = src.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if img.format() != QImage.Format_RGB32:
+        img = img.convertToFormat(QImage.Format_RGB32)
+    return img
+
+
+def _is_upright(frame):
+    # rotation / miroir : laisser toImage() appliquer la transformation
+    try:
+        from PySide6.QtMultimedia import QtVideo
+        return frame.rotation() == QtVideo.Rotation.None_ and not frame.mirrored()
+    except Exception:
+        return False
+
+
+class FramePipeline(QThread):
+    """Conversion et mise à l'échelle des frames hors du thread GUI.
+
+    Une seule frame est en attente à la fois : une frame qui arrive avant
+    que la précédente ait été traitée la remplace (frame dépassée, comptée
+    dans dropped). Le résultat est émis via imageReady.
+    """
+
+    # image prête à peindre, numéro de la frame source, instant d'arrivée
+    # de la frame (time.perf_counter)
+    imageReady = Signal(QImage, int, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._frame = None
+        self._size = QSize()
+        self._serial = 0
+        self._pending = False
+        self._stopping = False
+        self._last_frame = None
+        self._stamp = 0.0
+        self.dropped = 0
+        # PerfCounters optionnel (durée de conversion, frames perdues)
+        self.perf = None
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def submit(self, frame, size, stamp=None):
+        """Confie une frame à convertir pour une cible de taille size (pixels)."""
+        with self._cond:
+            if self._pending:
+                self.dropped += 1
+                if self.perf is not None:
+                    self.perf.on_dropped()
+            self._stamp = time.perf_counter() if stamp is None else stamp
+            self._frame = frame
+            self._last_frame = frame
+            self._size = QSize(size)
+            self._serial += 1
+            self._pending = True
+            self._cond.notify()
+
+    def rescale(self, size):
+        """Recalcule la dernière frame pour une nouvelle taille (ex. redimensionnement)."""
+        with self._cond:
+            if self._last_frame is None or QSize(size) == self._size:
+                return
+        self.submit(self._last_frame, size)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        formats = _packed_formats()
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                frame, size, serial, stamp = self._frame, self._size, self._serial, self._stamp
+                self._frame = None
+                self._pending = False
+            if size.isEmpty():
+                continue
+            start = time.perf_counter()
+            try:
+                with tracer.span("FramePipeline.convert", "video"):
+                    img = frame_to_scaled_image(frame, size, formats)
+            except Exception:
+                continue
+            if self.perf is not None:
+                self.perf.convert_ms.add((time.perf_counter() - start) * 1000.0)
+            if not img.isNull():
+                self.imageReady.emit(img, serial, stamp)
@@ -0,0 +1,277 @@
+import time
+from collections import deque
+
+from PySide6.QtCore import QObject, QUrl, Signal
+from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+from class_item.http_stream import is_remote
+from class_item.song_queue import QueueListener
+from class_item.tracing import traced
+
+
+class GaplessController(QObject, QueueListener):
+    """Lecture sans blanc entre pistes à l'aide de deux QMediaPlayer.
+
+    Le lecteur actif joue la piste courante ; peu avant sa fin
+    (preload_ms), l'entrée suivante fournie par next_entry() est chargée
+    dans le lecteur en attente. À EndOfMedia on bascule simplement sur ce
+    lecteur déjà prêt (source chargée, démuxeur et décodeur ouverts).
+
+    La latence de transition mesurée est le temps entre EndOfMedia de la
+    piste sortante et la première position non nulle de la piste entrante.
+
+    gain_for(path), optionnel, donne le gain de normalisation d'une piste ;
+    il est appliqué à la sortie audio du lecteur qui la charge.
+
+    Avec un moteur audio (attach_engine), le son des deux lecteurs passe
+    par son mélangeur : crossfade_ms > 0 lance alors la piste suivante
+    autant avant la fin de la courante, en fondu enchaîné.
+
+    Les entrées dont le chemin est une URL http(s) sont lues depuis leur
+    copie locale si local_copy(url) en donne une, sinon par un StreamDevice
+    de streams (class_item.http_stream), si fourni.
+    """
+
+    # QMediaPlayer devenu actif (après une bascule)
+    activePlayerChanged = Signal(object)
+    # NodeSong en cours de lecture
+    trackChanged = Signal(object)
+    # latence de la dernière transition, en ms
+    transitionMeasured = Signal(float)
+
+    def __init__(self, video_sink, next_entry, preload_ms=5000, parent=None, gain_for=None):
+        QObject.__init__(self, parent)
+        self.video_sink = video_sink
+        self._next_entry = next_entry
+        self._gain_for = gain_for
+        # volume utilisateur et gain de la piste chargée, par lecteur
+        self._volume = 1.0
+        self._gains = [1.0, 1.0]
+        self.preload_ms = preload_ms
+        # mode sans blanc ; désactivé, la piste suivante est chargée à la fin
+        self.enabled = True
+        # moteur audio optionnel (class_item.audio_engine) et durée du fondu
+        self.engine = None
+        self.crossfade_ms = 0
+        # lecteur sortant encore audible pendant un fondu
+        self._fading = None
+        # StreamService optionnel (entrées distantes) et flux ouvert par lecteur
+        self.streams = None
+        self._devices = [None, None]
+        # callable(url) -> copie locale téléchargée, ou None
+        self.local_copy = None
+
+        self.players = (QMediaPlayer(self), QMediaPlayer(self))
+        self.outputs = (QAudioOutput(self), QAudioOutput(self))
+        for i, (player, output) in enumerate(zip(self.players, self.outputs)):
+            player.setAudioOutput(output)
+            player.positionChanged.connect(lambda pos, i=i: self._on_position_changed(i, pos))
+            player.mediaStatusChanged.connect(lambda s, i=i: self._on_media_status_changed(i, s))
+        self._active = 0
+        self.players[0].setVideoOutput(video_sink)
+
+        self.current = None
+        self._standby_entry = None
+        self._pending_position = None
+        self._switch_started = None
+        self.last_transition_ms = None
+        self.transition_history = deque(maxlen=100)
+
+    @property
+    def active(self):
+        return self.players[self._active]
+
+    @property
+    def active_output(self):
+        return self.outputs[self._active]
+
+    @property
+    def standby(self):
+        return self.players[1 - self._active]
+
+    def attach_engine(self, engine):
+        """Fait passer le son des deux lecteurs par engine."""
+        self.engine = engine
+        engine.attach(self.players)
+        engine.cut(self._active)
+        for i in range(len(self.players)):
+            self._apply_volume(i)
+
+    def set_volume(self, volume):
+        self._volume = volume
+        for i in range(len(self.outputs)):
+            self._apply_volume(i)
+
+    def _apply_volume(self, i):
+        level = self._volume * self._gains[i]
+        if self.engine is not None:
+            # le limiteur du moteur autorise un gain au-delà de 1
+            self.engine.set_level(i, level)
+        else:
+            self.outputs[i].setVolume(min(1.0, level))
+
+    def _set_gain(self, i, entry):
+        gain = 1.0
+        if self._gain_for is not None and entry is not None:
+            gain = self._gain_for(entry.path)
+        self._gains[i] = gain
+        self._apply_volume(i)
+
+    def update_gain(self, path):
+        """Gain de path devenu connu : appliqué s'il est préchargé (pas en cours de lecture)."""
+        if self._standby_entry is not None and self._standby_entry.path == path:
+            self._set_gain(1 - self._active, self._standby_entry)
+
+    def play_entry(self, entry):
+        """Charge et lance entry dans le lecteur actif (chargement complet)."""
+        self._reset_standby(end_fade=True)
+        if self.engine is not None:
+            self.engine.cut(self._active)
+        self.current = entry
+        self._pending_position = None
+        self._set_gain(self._active, entry)
+        self._load(self._active, entry.path)
+        self.active.play()
+        self.trackChanged.emit(entry)
+
+    def cue_entry(self, entry, position=0):
+        """Charge entry dans le lecteur actif sans lancer la lecture."""
+        self._reset_standby(end_fade=True)
+        if self.engine is not None:
+            self.engine.cut(self._active)
+        self.current = entry
+        self._pending_position = position or None
+        self._set_gain(self._active, entry)
+        self._load(self._active, entry.path)
+        self.trackChanged.emit(entry)
+
+    def invalidate(self):
+        """À appeler quand la piste suivante a pu changer (file réordonnée…)."""
+        if self._standby_entry is not None and self._next_entry() is not self._standby_entry:
+            self._reset_standby()
+
+    # la file a changé : la piste préchargée n'est peut-être plus la suivante
+    def queue_inserted(self, first, count):
+        self.invalidate()
+
+    def queue_removed(self, first, last):
+        self.invalidate()
+
+    def queue_moved(self, first, count, destination):
+        self.invalidate()
+
+    def queue_reset(self):
+        self.invalidate()
+
+    def _reset_standby(self, end_fade=False):
+        """Oublie la piste préchargée ; end_fade : coupe aussi un fondu en cours.
+
+        Pendant un fondu, l'autre lecteur joue encore la piste sortante : il
+        n'est pas touché (le préchargement reprend à la fin du fondu).
+        """
+        self._standby_entry = None
+        if self._fading is not None:
+            if not end_fade:
+                return
+            self._fading = None
+        self.standby.stop()
+        self._load(1 - self._active, None)
+
+    def _load(self, i, path):
+        """Source de players[i] : fichier local, flux HTTP, ou rien (path None)."""
+        player = self.players[i]
+        previous, self._devices[i] = self._devices[i], None
+        if path is not None and is_remote(path) and self.local_copy is not None:
+            path = self.local_copy(path) or path
+        if path is None:
+            player.setSource(QUrl())
+        elif self.streams is not None and is_remote(path):
+            device = self.streams.open(path, parent=self)
+            self._devices[i] = device
+            player.setSourceDevice(device, QUrl(path))
+        else:
+            player.setSource(QUrl.fromLocalFile(path))
+        if previous is not None:
+            # après le changement de source : le lecteur ne lit plus l'ancien flux
+            previous.close()
+            previous.deleteLater()
+
+    def _preload(self):
+        if self._fading is not None:
+            # l'autre lecteur finit la piste sortante : réessayé à la position suivante
+            return
+        entry = self._next_entry()
+        if entry is None or not entry.path:
+            return
+        self._standby_entry = entry
+        self._set_gain(1 - self._active, entry)
+        # setSource ouvre la source et sonde le démuxeur de façon asynchrone ;
+        # pause() amène le pipeline de décodage à l'état prêt sans son
+        self._load(1 - self._active, entry.path)
+        self.standby.pause()
+
+    def _on_position_changed(self, i, pos):
+        if i != self._active:
+            return
+        if self._switch_started is not None and pos > 0:
+            latency = (time.perf_counter() - self._switch_started) * 1000.0
+            self._switch_started = None
+            self.last_transition_ms = latency
+            self.transition_history.append(latency)
+            self.transitionMeasured.emit(latency)
+        if not self.enabled:
+            return
+        duration = self.active.duration()
+        if duration <= 0:
+            return
+        fade = self._fade_ms()
+        if self._standby_entry is None:
+            if duration - pos <= self.preload_ms + fade:
+                self._preload()
+        elif fade and duration - pos <= fade:
+            self._advance(fade)
+
+    def _fade_ms(self):
+        return self.crossfade_ms if self.engine is not None else 0
+
+    def _on_media_status_changed(self, i, status):
+        if i != self._active:
+            if status == QMediaPlayer.EndOfMedia and self.players[i] is self._fading:
+                # fin du fondu : la piste sortante s'est tue
+                self._fading = None
+                self.players[i].stop()
+            return
+        if status == QMediaPlayer.LoadedMedia and self._pending_position is not None:
+            self.active.setPosition(self._pending_position)
+            self._pending_position = None
+        elif status == QMediaPlayer.EndOfMedia:
+            self._advance()
+
+    @traced("media", "GaplessController.advance")
+    def _advance(self, fade_ms=0):
+        """Bascule sur la piste préchargée ; fade_ms > 0 : la sortante continue en fondu."""
+        self._switch_started = time.perf_counter()
+        entry = self._standby_entry
+        if entry is None or self._next_entry() is not entry:
+            # rien de préchargé (ou plus d'actualité) : chargement classique
+            entry = self._next_entry()
+            if entry is None:
+                self._switch_started = None
+                return
+            self.play_entry(entry)
+            return
+        outgoing = self.active
+        self._active = 1 - self._active
+        self._standby_entry = None
+        if self.engine is not None:
+            self.engine.switch(self._active, fade_ms)
+        self.active.setVideoOutput(self.video_sink)
+        self.active.play()
+        outgoing.setVideoOutput(None)
+        if fade_ms:
+            self._fading = outgoing
+        else:
+            outgoing.stop()
+        self.current = entry
+        self.activePlayerChanged.emit(self.active)
+        self.trackChanged.emit(entry)
@@ -0,0 +1,551 @@
+"""Lecture de flux HTTP(S) : connexions persistantes, préchargement, tampon d'avance.
+
+HttpPool garde les connexions ouvertes (keep-alive) par hôte : une
+requête Range réutilise une connexion libre plutôt que de refaire la
+poignée de main TCP/TLS. StreamService précharge dans un cache mémoire
+borné les premiers octets du prochain flux de la file. StreamDevice est
+le QIODevice confié à QMediaPlayer : il sert d'abord le préchargement,
+puis ce qu'un thread télécharge en tâche de fond. L'avance visée double
+à chaque famine (lecture bloquée faute de données), jusqu'à MAX_AHEAD ;
+les octets déjà lus au-delà de KEEP_BEHIND sont libérés.
+"""
+import http.client
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlsplit
+
+from PySide6.QtCore import QCoreApplication, QIODevice, QObject, Signal
+
+
+REMOTE_SCHEMES = ("http://", "https://")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def is_remote(path):
+    return bool(path) and path.lower().startswith(REMOTE_SCHEMES)
+
+
+def url_title(url):
+    """Titre par défaut d'un flux : dernier segment du chemin, sans extension."""
+    parts = urlsplit(url)
+    name = unquote(parts.path.rstrip("/").rsplit("/", 1)[-1])
+    return name.rsplit(".", 1)[0] if "." in name else (name or parts.hostname or url)
+
+
+def _content_range(value):
+    """« bytes a-b/total » -> (a, total ou None)."""
+    try:
+        span, _, total = value.split(" ", 1)[1].partition("/")
+        return int(span.split("-", 1)[0]), (None if total.strip() == "*" else int(total))
+    except (IndexError, ValueError):
+        return 0, None
+
+
+class RangeNotSatisfiable(OSError):
+    """HTTP 416 : la plage demandée commence après la fin de la ressource."""
+
+
+class RangeResponse:
+    """Réponse à une requête Range.
+
+    start : position (octets) du premier octet reçu ; total : taille de la
+    ressource si connue ; partial : réponse 206 (une plage), sinon la
+    ressource entière. close() rend la connexion au pool si la réponse a
+    été lue jusqu'au bout.
+    """
+
+    def __init__(self, pool, key, conn, response, start, total, partial=False):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.start = start
+        self.total = total
+        self.partial = partial
+        self._aborted = False
+
+    @property
+    def remaining(self):
+        """Octets restant à recevoir (None si inconnu)."""
+        return self._response.length
+
+    def getheader(self, name, default=None):
+        return self._response.getheader(name, default)
+
+    def read(self, n):
+        return self._response.read(n)
+
+    def finish(self, limit):
+        """Lit et jette la fin de la réponse si elle fait au plus limit octets, puis close().
+
+        Une réponse terminée laisse sa connexion réutilisable : moins cher
+        qu'une nouvelle connexion tant que la fin est courte.
+        """
+        remaining = self.remaining
+        if remaining is not None and 0 < remaining <= limit and not self._aborted:
+            try:
+                self._response.read()
+            except (OSError, http.client.HTTPException):
+                self._aborted = True
+        self.close()
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self._response.isclosed() and not self._response.will_close and not self._aborted:
+            self._pool.release(self._key, conn)
+        else:
+            conn.close()
+
+    def abort(self):
+        """Interrompt une lecture en cours depuis un autre thread."""
+        self._aborted = True
+        conn = self._conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(2)
+            except OSError:
+                pass
+
+
+class HttpPool:
+    """Connexions HTTP persistantes réutilisées d'une requête à l'autre (thread-safe)."""
+
+    # connexions libres gardées par hôte
+    MAX_IDLE = 4
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout=10.0, user_agent="MyMp3"):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._idle = {}
+        self._lock = threading.Lock()
+        # statistiques : connexions ouvertes et requêtes envoyées
+        self.connections_opened = 0
+        self.requests = 0
+
+    def _connect(self, key):
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        with self._lock:
+            self.connections_opened += 1
+        return cls(host, port, timeout=self.timeout)
+
+    def _acquire(self, key):
+        """(connexion, réutilisée)."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.MAX_IDLE:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _send(self, key, target, headers):
+        conn, reused = self._acquire(key)
+        with self._lock:
+            self.requests += 1
+        try:
+            conn.request("GET", target, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+        # connexion libre fermée entre-temps par le serveur : une seule nouvelle tentative
+        conn = self._connect(key)
+        try:
+            conn.request("GET", target, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            raise
+
+    def open(self, url, start=0, end=None, headers=None):
+        """Requête GET des octets start..end (inclus ; end None : jusqu'à la fin).
+
+        headers : en-têtes supplémentaires (If-Range…). Lève OSError (statut HTTP inattendu, réseau ;
+        RangeNotSatisfiable si start est au-delà de la fin) ou http.client.HTTPException.
+        """
+        for _ in range(self.MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in _DEFAULT_PORTS or not parts.hostname:
+                raise OSError(f"URL non prise en charge : {url}")
+            key = (scheme, parts.hostname, parts.port or _DEFAULT_PORTS[scheme])
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            request_headers = {
+                "Range": f"bytes={start}-{'' if end is None else end}",
+                "Accept-Encoding": "identity",
+                "User-Agent": self.user_agent,
+                **(headers or {}),
+            }
+            conn, response = self._send(key, target, request_headers)
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader("Location")
+                response.read()
+                RangeResponse(self, key, conn, response, 0, None).close()
+                if not location:
+                    raise OSError(f"redirection sans destination : {url}")
+                url = urljoin(url, location)
+                continue
+            if response.status == 206:
+                first, total = _content_range(response.getheader("Content-Range", ""))
+                return RangeResponse(self, key, conn, response, first, total, partial=True)
+            if response.status == 200:
+                # Range ignoré : la ressource entière, depuis le début
+                length = response.getheader("Content-Length")
+                total = int(length) if length and length.isdigit() else None
+                return RangeResponse(self, key, conn, response, 0, total)
+            response.read()
+            RangeResponse(self, key, conn, response, 0, None).close()
+            if response.status == 416:
+                raise RangeNotSatisfiable(f"HTTP 416 : {url}")
+            raise OSError(f"HTTP {response.status} : {url}")
+        raise OSError(f"trop de redirections : {url}")
+
+
+class StreamService(QObject):
+    """Pool HTTP partagé, préchargement du début des flux et ouverture des StreamDevice."""
+
+    # url dont le début est désormais en cache
+    prefetched = Signal(str)
+
+    # octets préchargés par flux (quelques secondes d'un MP3 à 320 kbit/s)
+    PREFETCH_BYTES = 256 * 1024
+    # mémoire totale des préchargements
+    CACHE_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = HttpPool()
+        self._heads = OrderedDict()
+        self._cache_size = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.pool.close()
+
+    def head(self, url):
+        """(octets préchargés, taille totale ou None), ou None."""
+        with self._lock:
+            entry = self._heads.get(url)
+            if entry is not None:
+                self._heads.move_to_end(url)
+            return entry
+
+    def prefetch(self, url):
+        """Précharge en arrière-plan le début de url (sans effet s'il est déjà en cache)."""
+        if not is_remote(url):
+            return
+        with self._lock:
+            if url in self._heads or url in self._pending:
+                return
+            self._pending.add(url)
+        self._executor.submit(self._prefetch, url)
+
+    def _prefetch(self, url):
+        try:
+            response = self.pool.open(url, 0, self.PREFETCH_BYTES - 1)
+            try:
+                data = response.read(self.PREFETCH_BYTES)
+            finally:
+                response.close()
+            self._store(url, data, response.total)
+            self.prefetched.emit(url)
+        except (OSError, http.client.HTTPException) as e:
+            print("préchargement impossible:", url, e)
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def _store(self, url, data, total):
+        with self._lock:
+            old = self._heads.pop(url, None)
+            if old is not None:
+                self._cache_size -= len(old[0])
+            self._heads[url] = (data, total)
+            self._cache_size += len(data)
+            while self._cache_size > self.CACHE_BYTES and len(self._heads) > 1:
+                _, (dropped, _) = self._heads.popitem(last=False)
+                self._cache_size -= len(dropped)
+
+    def open(self, url, parent=None):
+        """StreamDevice ouvert sur url, téléchargement lancé."""
+        return StreamDevice(url, self, parent).start()
+
+
+class StreamDevice(QIODevice):
+    """QIODevice en lecture seule sur un flux HTTP, alimenté par un thread de téléchargement.
+
+    readData() bloque (au plus READ_TIMEOUT) tant que les octets demandés
+    ne sont pas arrivés : QMediaPlayer lit depuis son propre thread.
+    Les octets sont demandés par fenêtres bornées (requêtes Range d'au
+    plus WINDOW octets) : une fenêtre lue jusqu'au bout rend sa connexion
+    au pool pour la suivante. Après un seek, les fenêtres ne font que
+    DRAIN_MAX octets tant que la lecture n'a pas avancé de WINDOW : un
+    nouveau seek trouve alors une fin de fenêtre assez courte pour être
+    lue (la connexion est gardée) plutôt qu'abandonnée.
+    """
+
+    MIN_AHEAD = 256 * 1024
+    MAX_AHEAD = 8 * 1024 * 1024
+    KEEP_BEHIND = 512 * 1024
+    CHUNK = 64 * 1024
+    WINDOW = 1024 * 1024
+    # fin de fenêtre lue plutôt qu'abandonnée après un seek (connexion
+    # conservée) ; aussi première fenêtre après un seek
+    DRAIN_MAX = WINDOW // 4
+    # saut en avant encore servi par le téléchargement en cours
+    SKIP_AHEAD = 256 * 1024
+    READ_TIMEOUT = 15.0
+
+    def __init__(self, url, service, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self._service = service
+        self._cond = threading.Condition()
+        # octets [_base, _base + len(_buf)) de la ressource
+        self._buf = bytearray()
+        self._base = 0
+        self._pos = 0
+        self._total = None
+        self._eof = False
+        self._error = None
+        self._closed = False
+        self._headers = threading.Event()
+        self._restart = True
+        self._response = None
+        # position du dernier seek (None : lecture continue depuis l'ouverture)
+        self._seek_pos = None
+        self.ahead = self.MIN_AHEAD
+        # mesures : famines, délai du premier octet (0 : préchargé)
+        self.stalls = 0
+        self.opened_at = time.perf_counter()
+        self.first_byte_ms = None
+        head = service.head(url)
+        if head is not None:
+            data, total = head
+            self._buf += data
+            self._total = total
+            self._eof = total is not None and len(data) >= total
+            self.first_byte_ms = 0.0
+            if total is not None:
+                self._headers.set()
+        self._thread = threading.Thread(target=self._fetch_loop, name="stream", daemon=True)
+
+    def start(self):
+        self.open(QIODevice.ReadOnly | QIODevice.Unbuffered)
+        self._thread.start()
+        return self
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            response = self._response
+            self._cond.notify_all()
+        if response is not None:
+            response.abort()
+        self._headers.set()
+        super().close()
+
+    # interface QIODevice
+    def isSequential(self):
+        # la taille (réponse aux en-têtes) décide si le flux est navigable
+        self._headers.wait(self.READ_TIMEOUT)
+        return self._total is None
+
+    def size(self):
+        self._headers.wait(self.READ_TIMEOUT)
+        return self._total if self._total is not None else super().size()
+
+    def bytesAvailable(self):
+        with self._cond:
+            ahead = self._base + len(self._buf) - self._pos
+        return max(0, ahead) + super().bytesAvailable()
+
+    def atEnd(self):
+        with self._cond:
+            return self._eof and self._pos >= self._base + len(self._buf)
+
+    def seek(self, pos):
+        if not super().seek(pos):
+            return False
+        with self._cond:
+            self._pos = pos
+            end = self._base + len(self._buf)
+            if pos < self._base or pos > end + self.SKIP_AHEAD:
+                self._base = pos
+                self._buf = bytearray()
+                self._eof = False
+                self._error = None
+                self._restart = True
+                self._seek_pos = pos
+                response = self._response
+                self._cond.notify_all()
+            else:
+                response = None
+        if response is not None:
+            remaining = response.remaining
+            if remaining is None or remaining > self.DRAIN_MAX:
+                response.abort()
+        return True
+
+    def readData(self, maxlen):
+        with self._cond:
+            stalled = False
+            while True:
+                if self._closed:
+                    return b""
+                offset = self._pos - self._base
+                available = len(self._buf) - offset
+                if available > 0:
+                    break
+                if self._eof or self._error is not None:
+                    return b""
+                if not stalled and self.first_byte_ms is not None:
+                    # famine : l'avance n'a pas suffi, elle double
+                    stalled = True
+                    self.stalls += 1
+                    self.ahead = min(self.MAX_AHEAD, self.ahead * 2)
+                    self._cond.notify_all()
+                if not self._cond.wait(self.READ_TIMEOUT):
+                    return b""
+            n = min(maxlen, available)
+            data = bytes(self._buf[offset:offset + n])
+            self._pos += n
+            behind = self._pos - self._base
+            if behind > 2 * self.KEEP_BEHIND:
+                # libère par paquets (del en tête de bytearray : copie du reste)
+                drop = behind - self.KEEP_BEHIND
+                del self._buf[:drop]
+                self._base += drop
+            self._cond.notify_all()
+        return data
+
+    def writeData(self, data):
+        return -1
+
+    # téléchargement
+    def _fetch_loop(self):
+        response = None
+        skip = 0
+        while True:
+            with self._cond:
+                while not self._closed and not self._restart and (
+                        self._eof or self._error is not None
+                        or self._base + len(self._buf) - self._pos >= self.ahead):
+                    self._cond.wait()
+                if self._closed:
+                    break
+                reopen = self._restart or response is None
+                self._restart = False
+                start = self._base + len(self._buf)
+                if self._total is not None and start >= self._total:
+                    # déjà tout reçu (tête préchargée complète, seek en fin) :
+                    # une requête Range au-delà de la fin serait refusée (416)
+                    self._eof = True
+                    self._headers.set()
+                    self._cond.notify_all()
+                    continue
+                # fenêtres courtes juste après un seek (suivi probable d'un autre)
+                seeking = self._seek_pos is not None and self._pos - self._seek_pos < self.WINDOW
+                window = self.DRAIN_MAX if seeking else self.WINDOW
+            try:
+                if reopen:
+                    if response is not None:
+                        response.finish(self.DRAIN_MAX)
+                        response = None
+                    end = start + window - 1
+                    if self._total is not None:
+                        end = min(end, self._total - 1)
+                    response = self._service.pool.open(self.url, start, end)
+                    # serveur sans Range : octets à sauter jusqu'à start
+                    skip = start - response.start
+                    with self._cond:
+                        if self._closed or self._restart:
+                            continue
+                        self._response = response
+                        if self.first_byte_ms is None:
+                            self.first_byte_ms = (time.perf_counter() - self.opened_at) * 1000.0
+                        if response.total is not None:
+                            self._total = response.total
+                        self._headers.set()
+                chunk = response.read(self.CHUNK)
+            except RangeNotSatisfiable:
+                # taille inconnue : la fenêtre précédente finissait la ressource
+                with self._cond:
+                    if self._closed:
+                        break
+                    if not self._restart:
+                        self._eof = True
+                        self._headers.set()
+                        self._cond.notify_all()
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                with self._cond:
+                    if self._closed:
+                        break
+                    interrupted = self._restart
+                    if not interrupted:
+                        self._error = str(e)
+                        self._headers.set()
+                        self._cond.notify_all()
+                if response is not None:
+                    response.close()
+                    response = None
+                if not interrupted:
+                    # sinon : lecture interrompue par un seek
+                    print("flux interrompu:", self.url, e)
+                continue
+            with self._cond:
+                if self._closed:
+                    break
+                if self._restart:
+                    # seek pendant la lecture : ce morceau n'est plus à sa place
+                    continue
+                if not chunk:
+                    # fin de la fenêtre : la connexion retourne au pool
+                    response.close()
+                    position = self._base + len(self._buf)
+                    # taille inconnue : fin seulement après une réponse entière
+                    # (200) ; sinon fenêtre suivante, 416 au-delà de la fin
+                    ended = (position >= self._total if self._total is not None
+                             else not response.partial)
+                    response = None
+                    if ended:
+                        self._eof = True
+                        self._headers.set()
+                        self._cond.notify_all()
+                    continue
+                if skip:
+                    cut = min(skip, len(chunk))
+                    chunk = chunk[cut:]
+                    skip -= cut
+                self._buf += chunk
+                self._cond.notify_all()
+            self.readyRead.emit()
+        if response is not None:
+            response.close()
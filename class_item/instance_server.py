@@ -0,0 +1,130 @@
+"""Instance unique et socket de contrôle local.
+
+La première instance écoute sur un QLocalServer ; un second lancement lui
+transmet ses arguments puis quitte aussitôt. Le même canal accepte des
+commandes de scripts, par lots :
+
+    une ligne JSON par requête, objet ou liste d'objets
+        [{"cmd": "enqueue", "paths": ["/a.mp3", "/b.mp3"]}, {"cmd": "play"}]
+    une ligne JSON par réponse
+        {"ok": true, "results": [...]}  ou  {"ok": false, "error": "..."}
+
+Une connexion peut rester ouverte pour enchaîner les requêtes.
+"""
+import getpass
+import json
+
+from PySide6.QtCore import QObject, QCoreApplication
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+
+def server_name():
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "user"
+    return f"mymp3-{user}"
+
+
+def send_commands(commands, timeout_ms=1000, name=None):
+    """Envoie une liste de commandes à l'instance en cours.
+
+    Retourne sa réponse (dict), ou None si aucune instance n'écoute.
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(name or server_name())
+    if not socket.waitForConnected(timeout_ms):
+        return None
+    socket.write(json.dumps(commands).encode("utf-8") + b"\n")
+    socket.flush()
+    reply = b""
+    while not reply.endswith(b"\n") and socket.waitForReadyRead(timeout_ms):
+        reply += bytes(socket.readAll())
+    socket.disconnectFromServer()
+    try:
+        return json.loads(reply) if reply else {"ok": True}
+    except ValueError:
+        return {"ok": False, "error": "réponse illisible"}
+
+
+class InstanceServer(QObject):
+    """Écoute les requêtes et les exécute via handler(commande) -> résultat.
+
+    handler reçoit chaque commande (dict avec au moins "cmd") ; une
+    exception interrompt le lot et est renvoyée comme erreur.
+    """
+
+    # taille maximale d'une requête non terminée (octets)
+    MAX_LINE = 4 * 1024 * 1024
+
+    def __init__(self, handler, parent=None, name=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.name = name or server_name()
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    def listen(self):
+        """Commence à écouter ; False si une autre instance écoute déjà."""
+        if self._server.listen(self.name):
+            return True
+        if self._server.serverError() == QLocalSocket.AddressInUseError:
+            # personne ne répond : socket laissé par une instance qui a planté
+            probe = QLocalSocket()
+            probe.connectToServer(self.name)
+            if probe.waitForConnected(200):
+                probe.disconnectFromServer()
+                return False
+            QLocalServer.removeServer(self.name)
+            if self._server.listen(self.name):
+                return True
+        print("instance: écoute impossible:", self._server.errorString())
+        return False
+
+    def close(self):
+        self._server.close()
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _on_disconnected(self, socket):
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        data = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        *lines, rest = data.split(b"\n")
+        if len(rest) > self.MAX_LINE:
+            socket.abort()
+            return
+        self._buffers[socket] = rest
+        for line in lines:
+            if line.strip():
+                reply = self._execute(line)
+                socket.write(json.dumps(reply).encode("utf-8") + b"\n")
+        socket.flush()
+
+    def _execute(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"JSON invalide : {e}"}
+        commands = request if isinstance(request, list) else [request]
+        results = []
+        for command in commands:
+            if not isinstance(command, dict) or "cmd" not in command:
+                return {"ok": False, "error": "commande sans « cmd »", "results": results}
+            try:
+                results.append(self.handler(command))
+            except Exception as e:
+                return {"ok": False, "error": f"{command['cmd']}: {e}", "results": results}
+        return {"ok": True, "results": results}
@@ -0,0 +1,245 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from PySide6.QtCore import QThread, Signal
+
+from class_item.app_paths import data_dir
+from class_item.tag_reader import read_tags
+
+
+# mêmes extensions que le filtre de MediaPlayer.open_and_play
+MEDIA_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mp3", ".wav")
+
+
+def default_index_path():
+    return os.path.join(data_dir(), "library.sqlite3")
+
+
+def read_metadata(path):
+    """Retourne (title, artist, album) pour un fichier média."""
+    tags = read_tags(path)
+    # à défaut de tags : le nom du fichier comme titre
+    title = tags.get("title") or os.path.splitext(os.path.basename(path))[0]
+    return title, tags.get("artist") or tags.get("albumartist", ""), tags.get("album", "")
+
+
+class LibraryIndex:
+    """Index persistant (SQLite) des fichiers de la bibliothèque.
+
+    Une connexion ne doit être utilisée que dans le thread qui l'a ouverte.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tracks (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                artist TEXT NOT NULL DEFAULT '',
+                album TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE IF NOT EXISTS roots (
+                path TEXT PRIMARY KEY
+            );
+        """)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    # racines
+    def roots(self):
+        return [r for (r,) in self._db.execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, path):
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO roots(path) VALUES (?)", (os.path.abspath(path),))
+
+    def remove_root(self, path):
+        with self._db:
+            self._db.execute("DELETE FROM roots WHERE path = ?", (os.path.abspath(path),))
+
+    # pistes
+    def signatures(self, root):
+        """{path: (size, mtime_ns)} des fichiers indexés sous root."""
+        prefix = os.path.join(os.path.abspath(root), "")
+        cur = self._db.execute(
+            "SELECT path, size, mtime_ns FROM tracks WHERE substr(path, 1, ?) = ?",
+            (len(prefix), prefix))
+        return {p: (s, m) for p, s, m in cur}
+
+    def upsert(self, rows):
+        """rows : tuples (path, size, mtime_ns, title, artist, album)."""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tracks(path, size, mtime_ns, title, artist, album) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def remove(self, paths):
+        with self._db:
+            self._db.executemany("DELETE FROM tracks WHERE path = ?", ((p,) for p in paths))
+
+    def iter_tracks(self, batch_size=1000):
+        """Parcourt l'index par lots de tuples (path, title, artist, album)."""
+        cur = self._db.execute("SELECT path, title, artist, album FROM tracks ORDER BY path")
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def sizes(self):
+        """[(path, size)] de toutes les pistes indexées."""
+        return self._db.execute("SELECT path, size FROM tracks").fetchall()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+
+def _scan_dir(path):
+    """Liste un dossier : (sous-dossiers, [(path, size, mtime_ns)] des fichiers média, complet).
+
+    complet est faux si le dossier ou une de ses entrées n'a pas pu être lu
+    (partage hors ligne, droits, erreur passagère) : la liste est partielle.
+    """
+    dirs, files = [], []
+    complete = True
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                        st = entry.stat()
+                        files.append((entry.path, st.st_size, st.st_mtime_ns))
+                except OSError:
+                    complete = False
+    except OSError:
+        complete = False
+    return dirs, files, complete
+
+
+def _extract(path, size, mtime_ns):
+    try:
+        title, artist, album = read_metadata(path)
+    except Exception:
+        title, artist, album = os.path.splitext(os.path.basename(path))[0], "", ""
+    return path, size, mtime_ns, title, artist, album
+
+
+class LibraryScanner(QThread):
+    """Parcourt les racines en arrière-plan avec un pool de threads borné.
+
+    Au premier passage le contenu déjà indexé est diffusé, puis seuls les
+    fichiers dont la taille ou le mtime a changé sont relus. Les résultats
+    arrivent par lots via batchReady (connexion en file côté interface).
+    """
+
+    # lots de tuples (path, title, artist, album)
+    batchReady = Signal(list)
+    # chemins disparus du disque
+    removed = Signal(list)
+    # (fichiers vus, fichiers relus)
+    progress = Signal(int, int)
+
+    def __init__(self, roots, index_path=None, max_workers=None, batch_size=500, parent=None):
+        super().__init__(parent)
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.index_path = index_path or default_index_path()
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        self.batch_size = batch_size
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        index = LibraryIndex(self.index_path)
+        try:
+            for root in self.roots:
+                index.add_root(root)
+            # contenu connu d'abord : l'interface se remplit sans attendre le disque
+            for rows in index.iter_tracks(self.batch_size):
+                if self._cancel.is_set():
+                    return
+                self.batchReady.emit(rows)
+            for root in self.roots:
+                if self._cancel.is_set():
+                    return
+                self._scan_root(index, root)
+        finally:
+            index.close()
+
+    def _scan_root(self, index, root):
+        known = index.signatures(root)
+        seen = reread = 0
+        pending_rows = []
+        # nombre de lectures de métadonnées en vol, pour borner la mémoire
+        max_in_flight = self.max_workers * 4
+
+        def flush():
+            if pending_rows:
+                index.upsert(pending_rows)
+                self.batchReady.emit([(r[0], r[3], r[4], r[5]) for r in pending_rows])
+                pending_rows.clear()
+                self.progress.emit(seen, reread)
+
+        # dossiers illisibles : leur contenu indexé n'est pas considéré comme disparu
+        unreadable = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # tâche -> dossier listé
+            dir_jobs = {pool.submit(_scan_dir, root): root}
+            meta_jobs = set()
+            while dir_jobs or meta_jobs:
+                if self._cancel.is_set():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return
+                done, _ = wait(dir_jobs.keys() | meta_jobs, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    if fut in dir_jobs:
+                        directory = dir_jobs.pop(fut)
+                        dirs, files, complete = fut.result()
+                        if not complete:
+                            unreadable.append(directory)
+                        for d in dirs:
+                            dir_jobs[pool.submit(_scan_dir, d)] = d
+                        for path, size, mtime_ns in files:
+                            seen += 1
+                            if known.pop(path, None) == (size, mtime_ns):
+                                continue
+                            meta_jobs.add(pool.submit(_extract, path, size, mtime_ns))
+                    else:
+                        meta_jobs.discard(fut)
+                        pending_rows.append(fut.result())
+                        reread += 1
+                        if len(pending_rows) >= self.batch_size:
+                            flush()
+                # trop de lectures en attente : on les draine avant de lister plus loin
+                while len(meta_jobs) > max_in_flight and not self._cancel.is_set():
+                    done, meta_jobs = wait(meta_jobs, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        pending_rows.append(fut.result())
+                        reread += 1
+                    if len(pending_rows) >= self.batch_size:
+                        flush()
+        flush()
+        self.progress.emit(seen, reread)
+
+        # ce qui reste dans known n'existe plus sur le disque, sauf sous un
+        # dossier illisible (racine injoignable comprise) : on n'en sait rien
+        if unreadable:
+            prefixes = tuple(os.path.join(d, "") for d in unreadable)
+            for path in [p for p in known if p.startswith(prefixes)]:
+                del known[path]
+        if known:
+            gone = list(known)
+            index.remove(gone)
+            self.removed.emit(gone)
@@ -0,0 +1,401 @@
+"""Analyse de sonie (EBU R128 / ITU-R BS.1770) et gain par piste.
+
+Les pistes sont décodées dans un pool de processus (un QAudioDecoder par
+processus). Le signal est découpé en segments de 100 ms ; l'énergie
+pondérée K de chaque segment est calculée d'un bloc par numpy, via la
+FFT et la réponse en fréquence du filtre K (Parseval). Les blocs de
+400 ms (4 segments, recouvrement de 75 %) sont ensuite filtrés par les
+portes absolue et relative de BS.1770.
+
+La sonie intégrée et la crête de chaque piste sont conservées dans une
+base SQLite ; la lecture n'y fait qu'une lecture de cache.
+"""
+import math
+import multiprocessing
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from PySide6.QtCore import QObject, QCoreApplication, QTimer, Signal
+
+from class_item.app_paths import data_dir
+from class_item.http_stream import is_remote
+from class_item.peaks import to_frames
+from class_item.song_queue import QueueListener
+
+
+# niveau visé (référence ReplayGain 2) et bornes du gain appliqué
+TARGET_LUFS = -18.0
+MAX_GAIN_DB = 12.0
+MIN_GAIN_DB = -24.0
+
+SEGMENT_S = 0.1
+SEGMENTS_PER_BLOCK = 4
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+# filtre K de BS.1770 à 48 kHz : pré-filtre (plateau haut) puis passe-haut RLB
+_K_STAGES = (
+    ((1.53512485958697, -2.69169618940638, 1.19839281085285),
+     (1.0, -1.69065929318241, 0.73248077421585)),
+    ((1.0, -2.0, 1.0),
+     (1.0, -1.99004745483398, 0.99007225036621)),
+)
+_K_RATE = 48000.0
+
+
+def k_weights(n, rate):
+    """|H(f)|² du filtre K pour les n // 2 + 1 raies d'une rfft de n points à rate Hz.
+
+    Au-delà de 24 kHz (fréquences d'échantillonnage > 48 kHz), le gain du
+    plateau haut est prolongé.
+    """
+    freqs = np.minimum(np.fft.rfftfreq(n, 1.0 / rate), _K_RATE / 2)
+    z = np.exp(-2j * np.pi * freqs / _K_RATE)
+    power = np.ones(len(freqs))
+    for b, a in _K_STAGES:
+        h = (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+        power *= np.abs(h) ** 2
+    return power
+
+
+class LoudnessAccumulator:
+    """Énergie pondérée K par segment de 100 ms, au fil des tampons décodés."""
+
+    def __init__(self, rate, channels):
+        self.rate = rate
+        self.channels = channels
+        self.segment = max(1, int(round(rate * SEGMENT_S)))
+        # Parseval pour une rfft : raies intérieures comptées deux fois
+        weights = k_weights(self.segment, rate)
+        weights[1:(self.segment + 1) // 2] *= 2.0
+        self._weights = weights / (self.segment * self.segment)
+        self._carry = np.empty((0, channels), np.float32)
+        self._energies = []
+        self.peak = 0.0
+
+    def add(self, frames):
+        """frames : tableau float32 (n, channels)."""
+        if not len(frames):
+            return
+        self.peak = max(self.peak, float(np.abs(frames).max()))
+        if len(self._carry):
+            frames = np.concatenate((self._carry, frames))
+        n = len(frames) - len(frames) % self.segment
+        if n:
+            segments = frames[:n].reshape(-1, self.segment, self.channels)
+            spectrum = np.fft.rfft(segments, axis=1)
+            power = spectrum.real ** 2 + spectrum.imag ** 2
+            # moyenne quadratique pondérée, sommée sur les canaux (poids 1)
+            self._energies.append(np.einsum("sfc,f->s", power, self._weights))
+        self._carry = frames[n:].copy()
+
+    def finish(self):
+        """(sonie intégrée en LUFS ou None si silence, crête d'échantillon)."""
+        if not self._energies:
+            return None, self.peak
+        return integrated_loudness(np.concatenate(self._energies)), self.peak
+
+
+def integrated_loudness(energies):
+    """Sonie intégrée (LUFS) à partir des énergies par segment de 100 ms."""
+    n = len(energies) - SEGMENTS_PER_BLOCK + 1
+    if n <= 0:
+        # piste plus courte qu'un bloc : un seul bloc partiel
+        blocks = np.array([energies.mean()])
+    else:
+        csum = np.concatenate(([0.0], np.cumsum(energies)))
+        blocks = (csum[SEGMENTS_PER_BLOCK:] - csum[:n]) / SEGMENTS_PER_BLOCK
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10.0 * np.log10(blocks)
+    gated = blocks[levels > ABSOLUTE_GATE]
+    if not len(gated):
+        return None
+    relative = -0.691 + 10.0 * math.log10(gated.mean()) + RELATIVE_GATE
+    gated = blocks[(levels > ABSOLUTE_GATE) & (levels > relative)]
+    return -0.691 + 10.0 * math.log10(gated.mean())
+
+
+def track_gain(loudness, peak):
+    """Gain (facteur linéaire) ramenant la piste à TARGET_LUFS sans écrêter."""
+    if loudness is None:
+        return 1.0
+    gain_db = min(MAX_GAIN_DB, max(MIN_GAIN_DB, TARGET_LUFS - loudness))
+    if peak > 0:
+        gain_db = min(gain_db, -20.0 * math.log10(peak))
+    return 10.0 ** (gain_db / 20.0)
+
+
+# décodage (processus du pool)
+_worker_app = None
+
+
+def _init_worker():
+    # l'analyse ne doit pas disputer le processeur à la lecture
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def analyze_file(path):
+    """Décode path et retourne (sonie, crête), ou None si le décodage échoue.
+
+    Exécutée dans un processus du pool : crée au besoin sa propre
+    QCoreApplication et fait tourner le décodeur dans une boucle locale.
+    """
+    global _worker_app
+    from PySide6.QtCore import QEventLoop, QUrl
+    from PySide6.QtMultimedia import QAudioDecoder, QAudioFormat
+    if QCoreApplication.instance() is None:
+        _worker_app = QCoreApplication([])
+    state = {"acc": None, "error": None}
+    loop = QEventLoop()
+    decoder = QAudioDecoder()
+    fmt = QAudioFormat()
+    fmt.setSampleFormat(QAudioFormat.Float)
+    decoder.setAudioFormat(fmt)
+    decoder.setSource(QUrl.fromLocalFile(path))
+
+    def on_buffer():
+        while decoder.bufferAvailable():
+            buffer = decoder.read()
+            f = buffer.format()
+            if state["acc"] is None:
+                state["acc"] = LoudnessAccumulator(f.sampleRate(), f.channelCount())
+            state["acc"].add(to_frames(buffer.constData(), f.sampleFormat().name, f.channelCount()))
+
+    def on_error(*args):
+        state["error"] = decoder.errorString()
+        loop.quit()
+
+    decoder.bufferReady.connect(on_buffer)
+    decoder.finished.connect(loop.quit)
+    decoder.error.connect(on_error)
+    decoder.start()
+    loop.exec()
+    decoder.stop()
+    if state["acc"] is None:
+        if state["error"]:
+            print("loudness:", path, state["error"])
+        return None
+    return state["acc"].finish()
+
+
+# cache persistant
+def default_cache_path():
+    return os.path.join(data_dir(), "loudness.sqlite3")
+
+
+class LoudnessCache:
+    """Sonie et crête par fichier (SQLite), invalidées par taille et date.
+
+    Une connexion ne doit être utilisée que dans le thread qui l'a ouverte.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_cache_path()
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS loudness (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                lufs REAL,
+                peak REAL NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path):
+        """(sonie, crête) à jour pour path, ou None."""
+        signature = self._signature(path)
+        if signature is None:
+            return None
+        row = self._db.execute("SELECT size, mtime_ns, lufs, peak FROM loudness WHERE path = ?",
+                               (os.path.abspath(path),)).fetchone()
+        if row is None or tuple(row[:2]) != signature:
+            return None
+        return row[2], row[3]
+
+    def put(self, path, loudness, peak):
+        signature = self._signature(path)
+        if signature is None:
+            return
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO loudness(path, size, mtime_ns, lufs, peak) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (os.path.abspath(path), *signature, loudness, peak))
+
+
+class LoudnessAnalyzer(QObject, QueueListener):
+    """Analyse en arrière-plan les pistes ajoutées à la file ; gain_for() ne lit que le cache.
+
+    Les chemins demandés attendent dans une file : à chaque tour de boucle
+    d'événements, quelques millisecondes au plus sont passées à consulter le
+    cache, et au plus IN_FLIGHT_PER_WORKER analyses par processus sont en
+    cours (la fin d'une analyse relance le remplissage).
+
+    analyzed(path, gain) est émis (thread principal) à la fin de chaque analyse.
+    """
+
+    analyzed = Signal(str, float)
+    # résultat d'un processus, relayé vers le thread principal
+    _done = Signal(str, object)
+
+    # durée de consultation du cache par tour de boucle d'événements
+    LOOKUP_BUDGET_S = 0.004
+    IN_FLIGHT_PER_WORKER = 2
+    # nouvelles tentatives d'une piste en cours quand un processus du pool meurt
+    MAX_RETRIES = 2
+
+    def __init__(self, queue=None, parent=None, workers=None, cache_path=None):
+        QObject.__init__(self, parent)
+        self.cache = LoudnessCache(cache_path)
+        self._workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self._executor = None
+        # chemin en cours d'analyse -> pool qui l'analyse
+        self._pending = {}
+        self._backlog = deque()
+        self._queued = set()
+        self._scheduled = False
+        # chemin -> analyses perdues (pool cassé)
+        self._retries = {}
+        self._gains = {}
+        self._done.connect(self._on_done)
+        self.queue = queue
+        if queue is not None:
+            queue.subscribe(self)
+            self.queue_reset()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    def gain_for(self, path):
+        """Gain linéaire de path s'il est connu, sinon 1.0 (sans analyse)."""
+        if not path:
+            return 1.0
+        gain = self._gains.get(path)
+        if gain is None:
+            cached = self.cache.get(path)
+            if cached is None:
+                return 1.0
+            gain = self._gains[path] = track_gain(*cached)
+        return gain
+
+    def request(self, paths):
+        """Planifie l'analyse des chemins absents du cache (consulté plus tard, par tranches)."""
+        for path in paths:
+            if (not path or is_remote(path) or path in self._pending
+                    or path in self._gains or path in self._queued):
+                # flux distants : pas d'analyse (il faudrait tout télécharger)
+                continue
+            self._queued.add(path)
+            self._backlog.append(path)
+        self._schedule()
+
+    def _schedule(self):
+        if self._backlog and not self._scheduled:
+            self._scheduled = True
+            QTimer.singleShot(0, self._fill)
+
+    def _fill(self):
+        """Consulte le cache pour les chemins en attente et lance les analyses manquantes."""
+        self._scheduled = False
+        limit = self._workers * self.IN_FLIGHT_PER_WORKER
+        deadline = time.perf_counter() + self.LOOKUP_BUDGET_S
+        while self._backlog and len(self._pending) < limit:
+            if time.perf_counter() >= deadline:
+                self._schedule()
+                return
+            path = self._backlog.popleft()
+            self._queued.discard(path)
+            if path in self._gains or path in self._pending:
+                continue
+            cached = self.cache.get(path)
+            if cached is not None:
+                self._gains[path] = track_gain(*cached)
+                continue
+            if self._executor is None:
+                # spawn : pas de copie de l'état Qt du processus principal
+                self._executor = ProcessPoolExecutor(
+                    self._workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker)
+            self._pending[path] = self._executor
+            future = self._executor.submit(analyze_file, path)
+            future.add_done_callback(lambda f, p=path: self._done.emit(p, f))
+        # file pleine : _on_done relance le remplissage
+
+    def _on_done(self, path, future):
+        executor = self._pending.pop(path, None)
+        try:
+            if future.cancelled():
+                return
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # processus tué : pool à recréer (une seule fois), piste remise
+                # en attente, sauf si elle a déjà cassé le pool trop souvent
+                if executor is not None and executor is self._executor:
+                    self._shutdown_pool()
+                retries = self._retries.get(path, 0) + 1
+                if retries <= self.MAX_RETRIES:
+                    self._retries[path] = retries
+                    if path not in self._queued:
+                        self._queued.add(path)
+                        self._backlog.append(path)
+                    return
+                print("loudness:", path, e)
+                # comme un fichier non décodable : plus réessayé
+                self._retries.pop(path, None)
+                self.cache.put(path, None, 0.0)
+                self._gains[path] = track_gain(None, 0.0)
+                return
+            except Exception as e:
+                print("loudness:", path, e)
+                return
+            self._retries.pop(path, None)
+            # fichier non décodable : enregistré sans sonie pour ne pas le réessayer
+            loudness, peak = result if result is not None else (None, 0.0)
+            self.cache.put(path, loudness, peak)
+            gain = self._gains[path] = track_gain(loudness, peak)
+            self.analyzed.emit(path, gain)
+        finally:
+            self._schedule()
+
+    def _shutdown_pool(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        self._shutdown_pool()
+        self._pending.clear()
+        self._backlog.clear()
+        self._queued.clear()
+        self._retries.clear()
+
+    # nouvelles entrées de la file : analyse anticipée
+    def queue_inserted(self, first, count):
+        self.request([node.path for node in self.queue[first:first + count]])
+
+    def queue_reset(self):
+        # l'ancienne file n'a plus à être examinée
+        self._backlog.clear()
+        self._queued.clear()
+        self.request([node.path for node in self.queue])
@@ -1,72 +1,52 @@
-from PySide6.QtCore import Qt, QUrl, Slot, Signal, QTimer
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput, QVideoSink
-from PySide6.QtGui import QImage, QPainter
+import os
+import time
+from collections import deque
+
+from PySide6.QtCore import Qt, QUrl, Slot, Signal, QTimer, QRect, QThread
+from PySide6.QtGui import QImage, QPainter, QColor, QFont, QKeySequence, QShortcut
 from PySide6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout,
                                 QVBoxLayout, QGridLayout, QPushButton,
                                 QLineEdit, QStackedWidget, QTableWidget, QSlider, QFileDialog)
+from class_item.song_queue import NodeSong, Queue
+from class_item.play_order import PlayOrder, REPEAT_MODES
+from class_item.playlists import PlaylistImporter, PLAYLIST_EXTENSIONS, write_playlist
+from class_item.library_scanner import read_metadata
+from class_item.frame_pipeline import FramePipeline
+from class_item.downloads import DownloadManager, OfflineCache
+from class_item.http_stream import StreamService, is_remote, url_title
+from class_item.peaks import buffer_frames
+from class_item.spectrum import SpectrumWorker, bar_colors, paint_bars
+from class_item.perf_counters import PerfCounters
+from class_item.tracing import tracer, traced
+from class_item.trickplay import TrickplayWorker, load_sprite, VIDEO_EXTENSIONS
+from graphics.waveform_slider import WaveformSlider
+from graphics.trickplay_popup import TrickplayPopup
 
 
 
-class NodeSong:
-    def __init__(self, title, artist, album):
-        self.title = title
-        self.artist = artist
-        self.album = album
-        self.next = None
-        self.previous = None
-
-
-class Queue:
-    def __init__(self):
-        self.lenght = 0
-        self.origin = None
-        self.head = None
-
-    def is_empty(self):
-        return self.lenght == 0
-    
-    def __len__(self):
-        return self.lenght
-    
-    def add_song(self, title, artist, album):
-        new_node = NodeSong(title, artist, album)
-        if self.is_empty():
-            self.head = new_node
-            self.origin = new_node
-            self.head.next = self.origin
-            self.head.previous = self.origin
-        else:
-            self.head.next = new_node
-            new_node.previous = self.head
-            new_node.next = self.origin
-            self.head = new_node
-        self.lenght += 1
-
-    def remove_song(self, node:NodeSong):
-        if not self.is_empty():
-            
-            if len(self) == 1:
-                self.head = None
-                self.origin = None
-            else:
-                node.previous.next = node.next
-                node.next.previous = node.previous
-                if node == self.origin:
-                    self.origin = node.next
-                if node == self.head:
-                    self.head = node.previous
-            self.lenght -= 1
-
-
 class VideoWidget(QWidget):
     """Peint les frames reçues via QVideoSink — pas de surface native."""
     # signal émis lors d'un double-clic sur le widget vidéo
     doubleClicked = Signal()
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, perf=None):
         super().__init__(parent)
+        # dernière image déjà mise à l'échelle par le pipeline
         self._image = QImage()
+        self._image_stamp = None
+        self._paint_pending = False
         self.setAttribute(Qt.WA_OpaquePaintEvent)
+        # compteurs de performance et overlay (désactivé par défaut)
+        self.perf = perf or PerfCounters()
+        self._overlay = False
+        self._overlay_timer = QTimer(self)
+        self._overlay_timer.setInterval(250)
+        self._overlay_timer.timeout.connect(self.update)
+        # conversion / mise à l'échelle des frames dans un thread dédié
+        self._pipeline = FramePipeline(self)
+        self._pipeline.perf = self.perf
+        self._pipeline.imageReady.connect(self._on_image_ready)
+        self._pipeline.start()
         # suivi de la souris pour cacher le curseur après une courte inactivité
         self.setMouseTracking(True)
         self._idle_timer = QTimer(self)
@@ -74,6 +54,10 @@ class VideoWidget(QWidget):
         self._idle_timer.setInterval(1000)  # ms avant de masquer le curseur
         self._idle_timer.timeout.connect(self._on_mouse_idle_timeout)
         self._cursor_hidden = False
+        # visualiseur (pistes sans vidéo) : dernières barres du spectre
+        self._visualizer = False
+        self._bars = None
+        self._bar_colors = []
 
     def mouseDoubleClickEvent(self, event):
         # émettre le signal pour que l'appelant puisse basculer le plein écran
@@ -91,17 +75,81 @@ class VideoWidget(QWidget):
         except Exception:
             pass
 
+    def _target_size(self):
+        return self.size() * self.devicePixelRatioF()
+
+    @traced("video")
     def set_frame(self, frame):
-        # frame est un QVideoFrame ; conversion en QImage si possible
-        try:
-            img = frame.toImage()
-        except Exception:
+        # frame est un QVideoFrame ; conversion et mise à l'échelle hors thread GUI
+        start = time.perf_counter()
+        if frame.isValid():
+            self._pipeline.submit(frame, self._target_size(), start)
+        if self.perf.enabled:
+            self.perf.on_frame()
+            self.perf.set_frame_ms.add((time.perf_counter() - start) * 1000.0)
+
+    @traced("video")
+    def _on_image_ready(self, img, serial, stamp):
+        img.setDevicePixelRatio(self.devicePixelRatioF())
+        # si un paint est déjà prévu, l'image précédente est simplement remplacée
+        if self._paint_pending and self._image_stamp is not None and self.perf.enabled:
+            self.perf.on_dropped()
+        self._image = img
+        self._image_stamp = stamp
+        if not self._paint_pending:
+            self._paint_pending = True
+            self.update()
+
+    def set_visualizer(self, enabled):
+        """Mode visualiseur : l'image vidéo est oubliée, le spectre est peint à la place."""
+        if enabled == self._visualizer:
             return
-        if not img.isNull():
-            # garder un format rapide pour QPainter
-            self._image = img.convertToFormat(QImage.Format_RGB32)
+        self._visualizer = enabled
+        self._bars = None
+        if enabled:
+            self._image = QImage()
+            self._image_stamp = None
+        self.update()
+
+    def set_bars(self, bars):
+        """Barres (valeurs dans [0, 1]) calculées par SpectrumWorker."""
+        if not self._visualizer:
+            return
+        self._bars = bars
+        if not self._paint_pending:
+            self._paint_pending = True
             self.update()
 
+    def overlay_visible(self):
+        return self._overlay
+
+    def set_overlay_visible(self, visible):
+        """Affiche / masque l'overlay des compteurs de performance."""
+        self._overlay = visible
+        if visible:
+            self._overlay_timer.start()
+        else:
+            self._overlay_timer.stop()
+        self.update()
+
+    def toggle_overlay(self):
+        self.set_overlay_visible(not self._overlay)
+
+    def _paint_overlay(self, painter):
+        lines = self.perf.overlay_lines()
+        painter.setFont(QFont("monospace", 9))
+        metrics = painter.fontMetrics()
+        h = metrics.height()
+        w = max(metrics.horizontalAdvance(line) for line in lines)
+        painter.fillRect(QRect(8, 8, w + 12, h * len(lines) + 8), QColor(0, 0, 0, 170))
+        painter.setPen(QColor(220, 220, 220))
+        for i, line in enumerate(lines):
+            painter.drawText(14, 12 + metrics.ascent() + i * h, line)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._pipeline.rescale(self._target_size())
+
     def mouseMoveEvent(self, event):
         # réafficher le curseur si nécessaire et relancer le timer d'inactivité
         if self._cursor_hidden:
@@ -136,15 +184,41 @@ class VideoWidget(QWidget):
             self._cursor_hidden = False
         super().leaveEvent(event)
 
+    @traced("video", "VideoWidget.paintEvent")
     def paintEvent(self, event):
+        start = time.perf_counter()
+        self._paint_pending = False
         painter = QPainter(self)
-        if not self._image.isNull():
-            scaled = self._image.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            x = (self.width() - scaled.width()) // 2
-            y = (self.height() - scaled.height()) // 2
-            painter.drawImage(x, y, scaled)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._visualizer:
+            if self._bars is not None:
+                if len(self._bar_colors) != len(self._bars):
+                    self._bar_colors = bar_colors(len(self._bars))
+                paint_bars(painter, self.width(), self.height(), self._bars, self._bar_colors)
+        elif not self._image.isNull():
+            self._paint_image(painter)
+        if self.perf.enabled and self._image_stamp is not None:
+            end = time.perf_counter()
+            self.perf.on_painted((end - start) * 1000.0, (end - self._image_stamp) * 1000.0)
+            # latence comptée une seule fois par frame
+            self._image_stamp = None
+        if self._overlay:
+            self._paint_overlay(painter)
+
+    def _paint_image(self, painter):
+        size = self._image.deviceIndependentSize().toSize()
+        if size.width() > self.width() or size.height() > self.height() or (
+                size.width() != self.width() and size.height() != self.height()):
+            # taille obsolète (redimensionnement en cours) : étirement rapide
+            # en attendant l'image recalculée par le pipeline
+            size.scale(self.size(), Qt.KeepAspectRatio)
+            x = (self.width() - size.width()) // 2
+            y = (self.height() - size.height()) // 2
+            painter.drawImage(QRect(x, y, size.width(), size.height()), self._image)
         else:
-            painter.fillRect(self.rect(), Qt.black)
+            x = (self.width() - size.width()) // 2
+            y = (self.height() - size.height()) // 2
+            painter.drawImage(x, y, self._image)
 
 
 class FullscreenVideoWindow(QWidget):
@@ -166,23 +240,59 @@ class FullscreenVideoWindow(QWidget):
 
 
 class MediaPlayer(QWidget):
+    # NodeSong devenue la piste courante
+    trackChanged = Signal(object)
+    # délai lancement -> premier son de la piste lancée, en ms
+    firstAudioMeasured = Signal(float)
+    # état des imports de playlists, à afficher (progression, fin, erreur)
+    importStatus = Signal(str)
+
+    REPEAT_LABELS = {"off": "Répéter : non", "all": "Répéter : tout", "one": "Répéter : un"}
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.player = QMediaPlayer(self)
-        self.audio = QAudioOutput(self)
-        # connecter l'audio au player et initialiser le volume
         self.queue = Queue()
-        self.player.setAudioOutput(self.audio)
-        self.audio.setVolume(0.5)  # 0.0 .. 1.0
-        # debug rapide pour voir erreurs / statut
-        self.player.errorOccurred.connect(lambda err, msg="": print("player error:", err, msg))
-        self.player.mediaStatusChanged.connect(lambda s: print("mediaStatus:", s))
-        # utilisation de QVideoSink + VideoWidget (aucune surface native)
-        self.videoSink = QVideoSink(self)
-        self.videoWidget = VideoWidget(self)
-        # connexion sink -> widget
-        self.videoSink.videoFrameChanged.connect(self.videoWidget.set_frame)
-        self.player.setVideoOutput(self.videoSink)
+        self.current = None
+        # ordre de lecture (aléatoire / répétition) au-dessus de la file
+        self.playOrder = PlayOrder(self.queue)
+        self._playlistImporter = None
+        # playlists en attente d'import, lues l'une après l'autre
+        self._pendingImports = deque()
+        self.importStatusText = ""
+        # backend multimédia créé à la demande (init_backend), après le premier affichage
+        self.videoSink = None
+        self.gapless = None
+        self.player = None
+        self.audio = None
+        # normalisation de sonie (gains en cache appliqués au chargement des pistes)
+        self.loudness = None
+        self.loudnessNormalization = True
+        # moteur audio optionnel (fondu enchaîné, égaliseur) ; MYMP3_AUDIO_ENGINE=1 l'active au démarrage
+        self.audioEngine = None
+        # flux HTTP : connexions persistantes et préchargement du début de la piste suivante
+        self.streams = StreamService(self)
+        self._playStarted = None
+        # copies hors ligne (favoris en ligne) : préférées au flux à la lecture
+        self.offline = OfflineCache()
+        self.downloads = DownloadManager(self.offline, self.streams.pool, self)
+        # instrumentation : F3 affiche l'overlay, Ctrl+Maj+D écrit les compteurs
+        self.perf = PerfCounters()
+        self.videoWidget = VideoWidget(self, perf=self.perf)
+        # visualiseur des pistes sans vidéo : spectre calculé dans un thread,
+        # seulement quand le widget est visible
+        self.spectrum = SpectrumWorker(parent=self)
+        self.spectrum.perf = self.perf
+        self.spectrum.barsReady.connect(self.videoWidget.set_bars)
+        self.spectrum.start(QThread.LowPriority)
+        self._spectrumOutputs = []
+        self._spectrumTapped = False
+        self._visualizerTimer = QTimer(self)
+        self._visualizerTimer.setInterval(500)
+        self._visualizerTimer.timeout.connect(self._update_visualizer)
+        self._visualizerTimer.start()
+        QShortcut(QKeySequence("F3"), self, self.videoWidget.toggle_overlay)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self,
+                  lambda: print("compteurs écrits dans", self.perf.dump()))
 
         # double-clic sur la vidéo -> basculer plein écran
         self.videoWidget.doubleClicked.connect(self._on_video_double_clicked)
@@ -190,11 +300,24 @@ class MediaPlayer(QWidget):
         self.playToggleBtn = QPushButton("Play/Pause", self)
         self.playToggleBtn.clicked.connect(self.open_and_play)
         self.stopBtn = QPushButton("Stop", self)
+        self.shuffleBtn = QPushButton("Aléatoire", self)
+        self.shuffleBtn.setCheckable(True)
+        self.shuffleBtn.toggled.connect(self.set_shuffle)
+        self.repeatBtn = QPushButton(self)
+        self.repeatBtn.clicked.connect(self._cycle_repeat)
+        self._update_repeat_button()
         self.menuBtn = QPushButton("Menu", self)
         self.queueBtn = QPushButton("Queue", self)
 
-        self.positionSlider = QSlider(Qt.Horizontal, self)
+        # barre de position : forme d'onde du morceau courant, clic/glisser pour chercher
+        self.positionSlider = WaveformSlider(self)
         self.positionSlider.setRange(0, 0)
+        self.positionSlider.sliderMoved.connect(self._seek)
+        # vignettes de prévisualisation au survol (vidéos)
+        self.trickplay = TrickplayPopup(self)
+        self._trickplayWorker = None
+        self.positionSlider.hovered.connect(self.trickplay.show_at)
+        self.positionSlider.hoverLeft.connect(self.trickplay.hide)
 
         self.volumeSlider = QSlider(Qt.Horizontal, self)
         self.volumeSlider.setFixedWidth(100)
@@ -202,13 +325,15 @@ class MediaPlayer(QWidget):
         self.volumeSlider.setValue(50)
 
         # relier le slider de volume à l'audio output
-        self.volumeSlider.valueChanged.connect(lambda v: self.audio.setVolume(v / 100.0))
+        self.volumeSlider.valueChanged.connect(self._on_volume_changed)
 
         controlsLayout = QHBoxLayout()
         controlsLayout.addStretch()
         controlsLayout.addWidget(self.queueBtn)
         controlsLayout.addWidget(self.playToggleBtn)
         controlsLayout.addWidget(self.stopBtn)
+        controlsLayout.addWidget(self.shuffleBtn)
+        controlsLayout.addWidget(self.repeatBtn)
         controlsLayout.addWidget(self.volumeSlider)
         controlsLayout.addStretch()
         controlsLayout.addWidget(self.menuBtn)
@@ -222,17 +347,387 @@ class MediaPlayer(QWidget):
         self._mainLayout = mainLayout
         self._fullscreen_window = None
 
+    def init_backend(self):
+        """Crée QVideoSink et les lecteurs ; QtMultimedia n'est importé qu'ici."""
+        if self.gapless is not None:
+            return
+        from PySide6.QtMultimedia import QVideoSink
+        from class_item.gapless import GaplessController
+        from class_item.loudness import LoudnessAnalyzer
+        # utilisation de QVideoSink + VideoWidget (aucune surface native)
+        self.videoSink = QVideoSink(self)
+        # connexion sink -> widget
+        self.videoSink.videoFrameChanged.connect(self.videoWidget.set_frame)
+        # sonie des pistes de la file analysée en arrière-plan ; la lecture
+        # n'applique que des gains déjà en cache
+        self.loudness = LoudnessAnalyzer(self.queue, self)
+        # deux lecteurs : le suivant de la file est préchargé avant la fin
+        self.gapless = GaplessController(self.videoSink, self._next_entry, parent=self,
+                                         gain_for=self._gain_for)
+        self.gapless.streams = self.streams
+        self.gapless.local_copy = self.offline.local_path
+        self.loudness.analyzed.connect(lambda path, gain: self.gapless.update_gain(path))
+        self.gapless.activePlayerChanged.connect(self._on_active_player_changed)
+        self.gapless.trackChanged.connect(self._on_track_changed)
+        self.queue.subscribe(self.gapless)
+        self.player = self.gapless.active
+        self.audio = self.gapless.active_output
+        self.gapless.set_volume(self.volumeSlider.value() / 100.0)  # 0.0 .. 1.0
+        self.gapless.transitionMeasured.connect(self.perf.on_transition)
+        # debug rapide pour voir erreurs / statut
+        for player in self.gapless.players:
+            player.errorOccurred.connect(lambda err, msg="": print("player error:", err, msg))
+            player.mediaStatusChanged.connect(lambda s: print("mediaStatus:", s))
+            player.mediaStatusChanged.connect(
+                lambda s: tracer.instant("mediaStatus", "media", {"status": s.name}))
+            # compteurs : seulement pour le lecteur actif
+            player.mediaStatusChanged.connect(
+                lambda s, p=player: p is self.player and self.perf.on_media_status(s.name))
+            player.bufferProgressChanged.connect(
+                lambda v, p=player: p is self.player and self.perf.on_buffer_progress(v))
+            # barre de position : suit le lecteur actif
+            player.positionChanged.connect(
+                lambda pos, p=player: p is self.player and self._on_position_changed(pos))
+            player.durationChanged.connect(
+                lambda d, p=player: p is self.player and self.positionSlider.setRange(0, d))
+        if os.environ.get("MYMP3_AUDIO_ENGINE") == "1":
+            self.enable_audio_engine()
+
+    def enable_audio_engine(self):
+        """Fait passer le son par le moteur audio (irréversible jusqu'au redémarrage)."""
+        self.init_backend()
+        if self.audioEngine is not None:
+            return self.audioEngine
+        from class_item.audio_engine import AudioEngine
+        self.audioEngine = AudioEngine(self)
+        self.gapless.attach_engine(self.audioEngine)
+        # le moteur a remplacé les sorties de tampons des lecteurs
+        self._spectrumTapped = False
+        self._update_visualizer()
+        return self.audioEngine
+
+    def set_crossfade(self, ms):
+        """Durée du fondu enchaîné entre pistes (0 : enchaînement sans blanc)."""
+        ms = max(0, int(ms))
+        if ms:
+            self.enable_audio_engine()
+        if self.gapless is not None:
+            self.gapless.crossfade_ms = ms
+
+    def set_equalizer(self, gains_db):
+        """Gains de l'égaliseur en dB, un par bande de class_item.dsp.EQ_BANDS."""
+        self.enable_audio_engine().set_eq(gains_db)
+
+    def _gain_for(self, path):
+        if not self.loudnessNormalization:
+            return 1.0
+        return self.loudness.gain_for(path)
+
+    def _on_volume_changed(self, value):
+        if self.gapless is not None:
+            self.gapless.set_volume(value / 100.0)
+
     @Slot()
     def open_and_play(self):
         path, _ = QFileDialog.getOpenFileName(self, "Ouvrir une vidéo",
                                               filter="Vidéo/Audio (*.mp4 *.mkv *.avi *.mp3 *.wav);;Tous fichiers (*)")
         if not path:
             return
-        # charge et lance la lecture
-        self.player.setSource(QUrl.fromLocalFile(path))
-        print("audioAvailable:", getattr(self.player, "isAudioAvailable", lambda: None)(),
-              " videoAvailable:", getattr(self.player, "isVideoAvailable", lambda: None)())
-        self.player.play()
+        self.play_file(path)
+
+    @Slot(str)
+    def play_file(self, path):
+        # ajoute le fichier à la file (avec ses tags) puis lance la lecture
+        title, artist, album = read_metadata(path)
+        self.play_node(self.queue.add_song(title, artist, album, path))
+
+    def play_url(self, url):
+        """Ajoute un flux HTTP(S) à la file et le lit."""
+        self.play_node(self.enqueue_urls([url])[0])
+
+    def enqueue_urls(self, urls):
+        """Ajoute des flux HTTP(S) en fin de file ; retourne les NodeSong."""
+        return self.queue.extend([(url_title(url), "", "", url) for url in urls])
+
+    @traced("media")
+    def play_node(self, node):
+        """Lit une entrée de la file (chargement complet)."""
+        self.init_backend()
+        # mesuré jusqu'à la première position non nulle
+        self._playStarted = time.perf_counter()
+        self.gapless.play_entry(node)
+
+    def enqueue_files(self, paths):
+        """Ajoute des fichiers en fin de file en une seule insertion ; retourne les NodeSong."""
+        return self.queue.extend([(url_title(path), "", "", path) if is_remote(path)
+                                  else (*read_metadata(path), path) for path in paths])
+
+    def import_playlist(self, path):
+        """Ajoute en fin de file le contenu d'une playlist, lue en arrière-plan.
+
+        Une playlist demandée pendant un import attend la fin du précédent :
+        plusieurs playlists sont ajoutées en entier, dans l'ordre demandé.
+        """
+        self._pendingImports.append(path)
+        if self._playlistImporter is None:
+            self._start_next_import()
+
+    def _start_next_import(self):
+        self._playlistImporter = None
+        if not self._pendingImports:
+            return
+        path = self._pendingImports.popleft()
+        name = os.path.basename(path)
+        importer = PlaylistImporter(path, parent=self)
+
+        def on_batch(batch):
+            # lot déjà en file d'événements quand l'import a été arrêté : ignoré
+            if self._playlistImporter is not importer:
+                return
+            self.queue.extend(batch)
+            importer.ack()
+
+        importer.batchReady.connect(on_batch)
+        importer.progress.connect(lambda added, skipped: self._set_import_status(
+            f"{name} : {added} pistes…"))
+        importer.done.connect(lambda added, skipped: self._set_import_status(
+            f"{name} : {added} pistes ajoutées, {skipped} introuvables"))
+        importer.failed.connect(lambda message: self._set_import_status(
+            f"{name} : lecture impossible ({message})"))
+        importer.finished.connect(self._on_import_finished)
+        importer.finished.connect(importer.deleteLater)
+        self._playlistImporter = importer
+        importer.start(QThread.LowPriority)
+
+    def _on_import_finished(self):
+        # import arrêté par stop_import : rien à enchaîner
+        if self.sender() is self._playlistImporter:
+            self._start_next_import()
+
+    def _set_import_status(self, text):
+        if self._pendingImports:
+            text += f" ({len(self._pendingImports)} playlist(s) en attente)"
+        self.importStatusText = text
+        self.importStatus.emit(text)
+
+    def stop_import(self):
+        """Arrête l'import en cours et oublie ceux en attente."""
+        self._pendingImports.clear()
+        if self._playlistImporter is not None:
+            try:
+                # plus de lots ni de messages après l'arrêt
+                for signal in (self._playlistImporter.batchReady, self._playlistImporter.progress,
+                               self._playlistImporter.done, self._playlistImporter.failed):
+                    signal.disconnect()
+                self._playlistImporter.cancel()
+                self._playlistImporter.wait()
+            except RuntimeError:
+                # déjà détruit (import terminé)
+                pass
+            self._playlistImporter = None
+
+    def export_queue(self, path):
+        """Écrit la file dans une playlist (format selon l'extension) ; retourne le nombre d'entrées."""
+        return write_playlist(path, self.queue)
+
+    def run_command(self, command):
+        """Exécute une commande de contrôle (dict {"cmd": …}) ; voir instance_server."""
+        name = command["cmd"]
+        if name in ("open", "enqueue"):
+            paths = [p if is_remote(p) else os.path.abspath(p) for p in command.get("paths", ())]
+            for path in paths:
+                if path.lower().endswith(PLAYLIST_EXTENSIONS):
+                    self.import_playlist(path)
+            nodes = self.enqueue_files([p for p in paths if not p.lower().endswith(PLAYLIST_EXTENSIONS)])
+            if name == "open" and nodes:
+                self.play_node(nodes[0])
+            return len(nodes)
+        if name == "play":
+            if self.current is None:
+                if not self.queue.is_empty():
+                    self.play_node(self.queue[0])
+            else:
+                self.player.play()
+        elif name == "pause":
+            if self.player is not None:
+                self.player.pause()
+        elif name == "toggle":
+            if self.player is not None and self.player.isPlaying():
+                self.player.pause()
+            else:
+                return self.run_command({"cmd": "play"})
+        elif name == "stop":
+            if self.player is not None:
+                self.player.stop()
+        elif name == "seek":
+            self._seek(int(command["position"]))
+        elif name in ("next", "previous"):
+            if name == "next":
+                entry = self.playOrder.next_entry(auto=False)
+            else:
+                entry = self.playOrder.previous_entry()
+            if entry is not None:
+                self.play_node(entry)
+        elif name == "shuffle":
+            self.set_shuffle(bool(command.get("enabled", True)))
+        elif name == "repeat":
+            self.set_repeat(command["mode"])
+        elif name == "import":
+            self.import_playlist(os.path.abspath(command["path"]))
+        elif name == "export":
+            return self.export_queue(os.path.abspath(command["path"]))
+        elif name == "crossfade":
+            self.set_crossfade(command["ms"])
+        elif name == "eq":
+            self.set_equalizer(command["gains"])
+        elif name == "volume":
+            self.volumeSlider.setValue(int(command["value"]))
+        elif name == "status":
+            return {
+                "path": self.current.path if self.current is not None else None,
+                "title": self.current.title if self.current is not None else None,
+                "position": self.player.position() if self.player is not None else 0,
+                "duration": self.player.duration() if self.player is not None else 0,
+                "playing": self.player is not None and self.player.isPlaying(),
+                "queue": len(self.queue),
+            }
+        else:
+            raise ValueError(f"commande inconnue : {name}")
+        return None
+
+    def cue(self, node, position=0):
+        """Charge une entrée sans lancer la lecture, à position (ms)."""
+        self.init_backend()
+        self.gapless.cue_entry(node, position)
+
+    def _next_entry(self):
+        """Entrée à enchaîner après la piste courante (selon l'ordre de lecture), ou None."""
+        return self.playOrder.next_entry()
+
+    # ordre de lecture
+    def set_shuffle(self, enabled):
+        self.playOrder.set_shuffle(enabled)
+        if self.shuffleBtn.isChecked() != enabled:
+            self.shuffleBtn.setChecked(enabled)
+        self._order_changed()
+
+    def set_repeat(self, mode):
+        self.playOrder.set_repeat(mode)
+        self._update_repeat_button()
+        self._order_changed()
+
+    def _cycle_repeat(self):
+        i = REPEAT_MODES.index(self.playOrder.repeat)
+        self.set_repeat(REPEAT_MODES[(i + 1) % len(REPEAT_MODES)])
+
+    def _update_repeat_button(self):
+        self.repeatBtn.setText(self.REPEAT_LABELS[self.playOrder.repeat])
+
+    def _order_changed(self):
+        # la piste préchargée n'est peut-être plus la suivante
+        if self.gapless is not None:
+            self.gapless.invalidate()
+
+    def _on_track_changed(self, node):
+        tracer.instant("trackChanged", "media", {"path": node.path})
+        self.current = node
+        self.playOrder.track_started(node)
+        self.perf.start_track(node.path)
+        source = node.path
+        if is_remote(source):
+            # forme d'onde et vignettes décodent tout le fichier : seulement
+            # pour un flux déjà téléchargé
+            source = self.offline.local_path(source)
+        self.positionSlider.set_source(source)
+        self._load_trickplay(source)
+        upcoming = self.playOrder.next_entry()
+        if upcoming is not None and is_remote(upcoming.path) and not self.offline.contains(upcoming.path):
+            self.streams.prefetch(upcoming.path)
+        self._update_visualizer()
+        self.trackChanged.emit(node)
+
+    # visualiseur
+    def _update_visualizer(self):
+        """Active le spectre pour une piste sans vidéo, tant que le widget est visible."""
+        widget = self.videoWidget
+        audio_only = self.current is not None and not (self.current.path or "").lower().endswith(VIDEO_EXTENSIONS)
+        shown = (audio_only and self.gapless is not None and widget.isVisible()
+                 and not widget.window().isMinimized() and not widget.visibleRegion().isEmpty())
+        widget.set_visualizer(audio_only)
+        self._set_spectrum_tap(shown)
+        self.spectrum.set_active(shown)
+
+    def _set_spectrum_tap(self, enabled):
+        """Branche (ou débranche) les tampons décodés sur le calcul du spectre."""
+        if enabled == self._spectrumTapped:
+            return
+        self._spectrumTapped = enabled
+        if self.audioEngine is not None:
+            # son déjà mixé par le moteur : le spectre suit ce qu'on entend
+            self.audioEngine.tap = self.spectrum.push if enabled else None
+            return
+        players = self.gapless.players
+        if not enabled:
+            for player in players:
+                player.setAudioBufferOutput(None)
+            return
+        if not self._spectrumOutputs:
+            from PySide6.QtMultimedia import QAudioBufferOutput, QAudioFormat
+            fmt = QAudioFormat()
+            fmt.setSampleRate(self.spectrum.analyzer.rate)
+            fmt.setChannelCount(2)
+            fmt.setSampleFormat(QAudioFormat.Float)
+            for player in players:
+                output = QAudioBufferOutput(fmt, self)
+                output.audioBufferReceived.connect(
+                    lambda buffer, p=player: p is self.player and self.spectrum.push(buffer_frames(buffer)))
+                self._spectrumOutputs.append(output)
+        for player, output in zip(players, self._spectrumOutputs):
+            player.setAudioBufferOutput(output)
+
+    def _load_trickplay(self, path):
+        """Planche de vignettes de path : depuis le cache, sinon calculée en arrière-plan."""
+        if self._trickplayWorker is not None:
+            self._trickplayWorker.stop()
+            self._trickplayWorker.deleteLater()
+            self._trickplayWorker = None
+        self.trickplay.set_sprite(None)
+        if not path or not path.lower().endswith(VIDEO_EXTENSIONS):
+            return
+        sprite = load_sprite(path)
+        if sprite is not None:
+            self.trickplay.set_sprite(sprite)
+            return
+        self._trickplayWorker = TrickplayWorker(path, self)
+        self._trickplayWorker.spriteReady.connect(self._on_sprite_ready)
+        self._trickplayWorker.start(QThread.LowestPriority)
+
+    def _on_sprite_ready(self, path, sprite):
+        if sprite is not None and self.current is not None and self.current.path == path:
+            self.trickplay.set_sprite(sprite)
+
+    def _on_active_player_changed(self, player):
+        self.player = player
+        self.audio = self.gapless.active_output
+        self.positionSlider.setRange(0, max(0, player.duration()))
+        self._on_position_changed(player.position())
+
+    def _on_position_changed(self, position):
+        if self._playStarted is not None and position > 0:
+            ms = (time.perf_counter() - self._playStarted) * 1000.0
+            self._playStarted = None
+            self.perf.on_first_audio(ms)
+            self.firstAudioMeasured.emit(ms)
+        # pas pendant que l'utilisateur déplace le curseur
+        if not self.positionSlider.isSliderDown():
+            self.positionSlider.setValue(position)
+
+    def _seek(self, position):
+        if self.player is not None:
+            if self.audioEngine is not None:
+                # le son déjà reçu précède la nouvelle position
+                self.audioEngine.flush(self.gapless.players.index(self.player))
+            self.player.setPosition(position)
 
     def _on_video_double_clicked(self):
         """Basculer la vidéo en plein écran (fenêtre dédiée) ou revenir en mode normal."""
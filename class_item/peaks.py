@@ -0,0 +1,200 @@
+"""Crêtes (min/max) d'un fichier audio pour l'aperçu de forme d'onde.
+
+Le décodage se fait en flux dans un thread dédié (QAudioDecoder) ; chaque
+tampon est réduit aussitôt, par numpy, en paires min/max par bloc de
+BLOCK frames. Le résultat final (BUCKETS colonnes, int8) est mis en cache
+sur disque, indexé par chemin, taille et date de modification.
+"""
+import os
+
+import numpy as np
+from PySide6.QtCore import QThread, QUrl, Signal
+
+from class_item.app_paths import cache_dir, file_key
+
+
+# frames par bloc élémentaire et nombre de colonnes conservées
+BLOCK = 256
+BUCKETS = 4096
+
+
+def reduce_peaks(mins, maxs, buckets):
+    """Regroupe des paires min/max en au plus buckets colonnes ; retourne (mins, maxs)."""
+    n = len(mins)
+    if n <= buckets:
+        return mins, maxs
+    edges = (np.arange(buckets, dtype=np.int64) * n) // buckets
+    return np.minimum.reduceat(mins, edges), np.maximum.reduceat(maxs, edges)
+
+
+def resample_peaks(peaks, width):
+    """Crêtes (2, N) ramenées à width colonnes (réduction ou répétition)."""
+    n = peaks.shape[1]
+    if n == 0 or width <= 0:
+        return np.zeros((2, max(0, width)), peaks.dtype)
+    if n >= width:
+        return np.stack(reduce_peaks(peaks[0], peaks[1], width))
+    return peaks[:, (np.arange(width) * n) // width]
+
+
+_SCALES = {"UInt8": 128.0, "Int16": 32768.0, "Int32": 2147483648.0, "Float": 1.0}
+_DTYPES = {"UInt8": np.uint8, "Int16": np.int16, "Int32": np.int32, "Float": np.float32}
+
+
+def to_frames(raw, sample_format, channels):
+    """Échantillons entrelacés (octets) -> tableau float32 (frames, channels) dans [-1, 1]."""
+    dtype = _DTYPES.get(sample_format)
+    if dtype is None or channels <= 0:
+        return np.empty((0, max(1, channels)), np.float32)
+    samples = np.frombuffer(raw, dtype)
+    data = samples.astype(np.float32)
+    if sample_format == "UInt8":
+        data -= 128.0
+    scale = _SCALES[sample_format]
+    if scale != 1.0:
+        data *= 1.0 / scale
+    frames = len(data) // channels
+    return data[:frames * channels].reshape(frames, channels)
+
+
+def buffer_frames(buffer):
+    """QAudioBuffer -> tableau float32 (frames, channels) ; sans copie s'il est déjà en float."""
+    f = buffer.format()
+    sample_format, channels = f.sampleFormat().name, f.channelCount()
+    if sample_format == "Float" and channels > 0:
+        data = np.frombuffer(buffer.constData(), np.float32)
+        return data[:len(data) - len(data) % channels].reshape(-1, channels)
+    return to_frames(buffer.constData(), sample_format, channels)
+
+
+def to_mono(raw, sample_format, channels):
+    """Échantillons entrelacés (octets) -> tableau float32 mono dans [-1, 1]."""
+    frames = to_frames(raw, sample_format, channels)
+    return frames[:, 0] if frames.shape[1] == 1 else frames.mean(axis=1)
+
+
+class PeakAccumulator:
+    """Réduction min/max au fil des tampons décodés, sans garder les échantillons."""
+
+    def __init__(self, block=BLOCK):
+        self.block = block
+        self._carry = np.empty(0, np.float32)
+        self._mins = []
+        self._maxs = []
+
+    def add(self, mono):
+        if len(self._carry):
+            mono = np.concatenate((self._carry, mono))
+        n = len(mono) - len(mono) % self.block
+        if n:
+            blocks = mono[:n].reshape(-1, self.block)
+            self._mins.append(blocks.min(axis=1))
+            self._maxs.append(blocks.max(axis=1))
+        self._carry = mono[n:].copy()
+
+    def finish(self, buckets=BUCKETS):
+        """Crêtes (2, <= buckets) en int8 (-127..127)."""
+        if len(self._carry):
+            self._mins.append(np.array([self._carry.min()], np.float32))
+            self._maxs.append(np.array([self._carry.max()], np.float32))
+            self._carry = np.empty(0, np.float32)
+        if not self._mins:
+            return np.zeros((2, 0), np.int8)
+        mins, maxs = reduce_peaks(np.concatenate(self._mins), np.concatenate(self._maxs), buckets)
+        peaks = np.stack((mins, maxs))
+        return np.clip(np.rint(peaks * 127.0), -127, 127).astype(np.int8)
+
+
+# cache disque
+def _cache_path(path):
+    key = file_key(path)
+    return None if key is None else os.path.join(cache_dir("peaks"), key + ".npy")
+
+
+def load_peaks(path):
+    """Crêtes en cache pour path, ou None."""
+    cached = _cache_path(path)
+    if cached is None:
+        return None
+    try:
+        peaks = np.load(cached, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    return peaks if peaks.ndim == 2 and peaks.shape[0] == 2 else None
+
+
+def save_peaks(path, peaks):
+    cached = _cache_path(path)
+    if cached is None:
+        return
+    tmp = cached + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            np.save(f, peaks, allow_pickle=False)
+        os.replace(tmp, cached)
+    except OSError as e:
+        print("peaks: écriture du cache impossible:", e)
+
+
+class PeakWorker(QThread):
+    """Décode path en flux et calcule ses crêtes ; émet peaksReady(path, peaks).
+
+    peaks vaut None si le fichier n'a pas de piste audio décodable.
+    """
+
+    peaksReady = Signal(str, object)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        self.quit()
+
+    def run(self):
+        from PySide6.QtMultimedia import QAudioDecoder, QAudioFormat
+        accumulator = PeakAccumulator()
+        failed = []
+
+        decoder = QAudioDecoder()
+        # mono flottant à fréquence réduite si le backend sait convertir
+        fmt = QAudioFormat()
+        fmt.setSampleFormat(QAudioFormat.Float)
+        fmt.setChannelCount(1)
+        fmt.setSampleRate(22050)
+        decoder.setAudioFormat(fmt)
+        decoder.setSource(QUrl.fromLocalFile(self.path))
+
+        def on_buffer():
+            while decoder.bufferAvailable() and not self._cancelled:
+                buffer = decoder.read()
+                f = buffer.format()
+                accumulator.add(to_mono(buffer.constData(), f.sampleFormat().name,
+                                        f.channelCount()))
+            if self._cancelled:
+                decoder.stop()
+                self.quit()
+
+        def on_error(*args):
+            failed.append(decoder.errorString())
+            self.quit()
+
+        decoder.bufferReady.connect(on_buffer)
+        decoder.finished.connect(self.quit)
+        decoder.error.connect(on_error)
+        decoder.start()
+        if not self._cancelled:
+            self.exec()
+        decoder.stop()
+
+        if self._cancelled:
+            return
+        peaks = accumulator.finish()
+        if failed and peaks.shape[1] == 0:
+            print("peaks:", self.path, failed[0])
+            self.peaksReady.emit(self.path, None)
+            return
+        save_peaks(self.path, peaks)
+        self.peaksReady.emit(self.path, peaks)
@@ -0,0 +1,164 @@
+import json
+import os
+import time
+from array import array
+
+from class_item.app_paths import data_dir
+
+
+class RollingStat:
+    """Fenêtre glissante de mesures (tableau pré-alloué, aucune allocation par ajout)."""
+
+    __slots__ = ("_values", "_index", "count", "total_count")
+
+    def __init__(self, window=240):
+        self._values = array("d", bytes(8 * window))
+        self._index = 0
+        self.count = 0
+        self.total_count = 0
+
+    def add(self, value):
+        values = self._values
+        values[self._index] = value
+        self._index = (self._index + 1) % len(values)
+        if self.count < len(values):
+            self.count += 1
+        self.total_count += 1
+
+    def summary(self):
+        """{"mean", "p95", "max", "n"} sur la fenêtre courante."""
+        if not self.count:
+            return {"mean": 0.0, "p95": 0.0, "max": 0.0, "n": 0}
+        values = sorted(self._values[:self.count])
+        return {
+            "mean": sum(values) / len(values),
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1],
+            "n": self.total_count,
+        }
+
+
+class PerfCounters:
+    """Compteurs de lecture et de rendu, par frame et par piste.
+
+    Les durées sont en millisecondes. Les mesures coûtent un appel à
+    time.perf_counter() et une écriture dans un tableau ; l'agrégation
+    (moyenne, p95) n'est faite qu'à l'affichage ou à l'export.
+    """
+
+    def __init__(self, window=240):
+        self.enabled = True
+        self.window = window
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_painted = 0
+        self.set_frame_ms = RollingStat(window)
+        self.convert_ms = RollingStat(window)
+        self.paint_ms = RollingStat(window)
+        # arrivée de la frame au sink -> fin du paint qui l'affiche
+        self.latency_ms = RollingStat(window)
+        # calcul du spectre (visualiseur), par image
+        self.spectrum_ms = RollingStat(window)
+        self.buffer_progress = 1.0
+        self.media_status = ""
+        self.tracks = []
+
+    def reset(self):
+        self.__init__(self.window)
+
+    # piste
+    def start_track(self, path):
+        self.tracks.append({
+            "path": path,
+            "started": time.time(),
+            "frames": 0,
+            "dropped": 0,
+            "stalls": 0,
+            "transition_ms": None,
+            # lancement de la lecture -> premier son (flux distants surtout)
+            "first_audio_ms": None,
+        })
+        del self.tracks[:-50]
+
+    def _track(self):
+        return self.tracks[-1] if self.tracks else None
+
+    def on_transition(self, ms):
+        track = self._track()
+        if track is not None:
+            track["transition_ms"] = ms
+
+    def on_first_audio(self, ms):
+        track = self._track()
+        if track is not None:
+            track["first_audio_ms"] = ms
+
+    def on_media_status(self, name):
+        self.media_status = name
+        track = self._track()
+        # BufferingMedia : assez de données pour continuer, pas une famine
+        if track is not None and name == "StalledMedia":
+            track["stalls"] += 1
+
+    def on_buffer_progress(self, progress):
+        self.buffer_progress = progress
+
+    # frames
+    def on_frame(self):
+        self.frames_received += 1
+        track = self._track()
+        if track is not None:
+            track["frames"] += 1
+
+    def on_dropped(self, count=1):
+        self.frames_dropped += count
+        track = self._track()
+        if track is not None:
+            track["dropped"] += count
+
+    def on_painted(self, paint_ms, latency_ms=None):
+        self.frames_painted += 1
+        self.paint_ms.add(paint_ms)
+        if latency_ms is not None:
+            self.latency_ms.add(latency_ms)
+
+    # restitution
+    def snapshot(self):
+        return {
+            "frames_received": self.frames_received,
+            "frames_dropped": self.frames_dropped,
+            "frames_painted": self.frames_painted,
+            "set_frame_ms": self.set_frame_ms.summary(),
+            "convert_ms": self.convert_ms.summary(),
+            "paint_ms": self.paint_ms.summary(),
+            "latency_ms": self.latency_ms.summary(),
+            "spectrum_ms": self.spectrum_ms.summary(),
+            "buffer_progress": self.buffer_progress,
+            "media_status": self.media_status,
+            "tracks": self.tracks,
+        }
+
+    def overlay_lines(self):
+        """Lignes de texte pour l'overlay de VideoWidget."""
+        s = self.snapshot()
+        lines = [
+            f"frames {s['frames_painted']}/{s['frames_received']}  perdues {s['frames_dropped']}",
+        ]
+        for key in ("set_frame_ms", "convert_ms", "paint_ms", "latency_ms", "spectrum_ms"):
+            st = s[key]
+            lines.append(f"{key[:-3]:9s} moy {st['mean']:6.2f}  p95 {st['p95']:6.2f}  max {st['max']:6.2f} ms")
+        lines.append(f"tampon {s['buffer_progress'] * 100:3.0f} %  {s['media_status']}")
+        track = self._track()
+        if track is not None and track["transition_ms"] is not None:
+            lines.append(f"transition {track['transition_ms']:.1f} ms")
+        if track is not None and track["first_audio_ms"] is not None:
+            lines.append(f"premier son {track['first_audio_ms']:.1f} ms")
+        return lines
+
+    def dump(self, path=None):
+        """Écrit les compteurs en JSON ; retourne le chemin du fichier."""
+        if path is None:
+            path = os.path.join(data_dir(), time.strftime("perf-%Y%m%d-%H%M%S.json"))
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
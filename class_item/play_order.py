@@ -0,0 +1,217 @@
+"""Ordre de lecture : séquentiel ou aléatoire, répétition d'une piste ou de la file.
+
+En aléatoire, chaque cycle tire les pistes sans remise. Tant que moins
+de la moitié de la file a été jouée, un tirage est un simple indice au
+hasard dans la file, rejeté s'il désigne une piste déjà jouée (moins de
+deux essais en moyenne). Au-delà, les pistes restantes sont rassemblées
+une fois dans un réservoir où chaque tirage est un échange avec le
+dernier élément suivi d'un pop. Le coût est donc O(1) amorti par piste,
+sans copie de la file au départ.
+
+Les pistes tirées forment un historique parcouru par previous/next. Les
+insertions et suppressions dans la file ne modifient pas l'ordre déjà
+tiré, et un générateur initialisé par seed donne un ordre reproductible.
+"""
+import random
+
+from class_item.song_queue import QueueListener
+
+
+REPEAT_OFF = "off"
+REPEAT_ONE = "one"
+REPEAT_ALL = "all"
+REPEAT_MODES = (REPEAT_OFF, REPEAT_ALL, REPEAT_ONE)
+
+
+class PlayOrder(QueueListener):
+    """Choisit la piste suivante / précédente dans une Queue.
+
+    next_entry() et previous_entry() ne font que consulter (appels
+    répétés : même réponse) ; track_started() enregistre la piste
+    effectivement lancée.
+    """
+
+    # entrées d'historique conservées derrière la piste courante
+    MAX_HISTORY = 1000
+
+    def __init__(self, queue, seed=None):
+        self.queue = queue
+        self.shuffle = False
+        self.repeat = REPEAT_OFF
+        self._rng = random.Random(seed)
+        self.current = None
+        # aléatoire : pistes tirées dans l'ordre, _cursor sur la courante
+        self._history = []
+        self._cursor = -1
+        # pistes tirées pendant le cycle en cours
+        self._played = set()
+        # réservoir des pistes restantes (None tant qu'il n'est pas constitué)
+        self._pool = None
+        self._pool_pos = {}
+        queue.subscribe(self)
+
+    # réglages
+    def set_shuffle(self, enabled):
+        if enabled == self.shuffle:
+            return
+        self.shuffle = enabled
+        self._new_cycle()
+        if self.current is not None and self.current in self.queue:
+            self._history = [self.current]
+            self._cursor = 0
+            self._played.add(self.current)
+
+    def set_repeat(self, mode):
+        if mode not in REPEAT_MODES:
+            raise ValueError(f"mode de répétition inconnu : {mode}")
+        self.repeat = mode
+
+    def seed(self, seed):
+        self._rng.seed(seed)
+
+    # navigation
+    def next_entry(self, auto=True):
+        """Piste à lire après la courante, ou None.
+
+        auto : enchaînement automatique (fin de piste) ; seul ce cas
+        respecte la répétition d'une piste.
+        """
+        current = self.current if self.current in self.queue else None
+        if auto and self.repeat == REPEAT_ONE and current is not None:
+            return current
+        if not self.shuffle:
+            return self._sequential(current, 1)
+        ahead = self._forward()
+        if ahead is not None:
+            return ahead
+        node = self._draw()
+        if node is not None:
+            self._history.append(node)
+        return node
+
+    def previous_entry(self):
+        """Piste lue avant la courante (aléatoire : historique), ou None."""
+        current = self.current if self.current in self.queue else None
+        if not self.shuffle:
+            return self._sequential(current, -1)
+        i = self._cursor - 1
+        while i >= 0 and self._history[i] not in self.queue:
+            i -= 1
+        return self._history[i] if i >= 0 else None
+
+    def track_started(self, node):
+        """À appeler quand node devient la piste courante."""
+        self.current = node
+        if not self.shuffle:
+            return
+        history = self._history
+        c = self._cursor
+        if 0 <= c < len(history) and history[c] is node:
+            return
+        if c + 1 < len(history) and history[c + 1] is node:
+            self._cursor = c + 1
+        elif 0 <= c - 1 < len(history) and history[c - 1] is node:
+            self._cursor = c - 1
+        else:
+            # piste choisie à la main : insérée juste après la courante,
+            # les pistes déjà tirées restent à suivre
+            history.insert(c + 1, node)
+            self._cursor = c + 1
+            self._take(node)
+        if self._cursor > 2 * self.MAX_HISTORY:
+            drop = self._cursor - self.MAX_HISTORY
+            del history[:drop]
+            self._cursor -= drop
+
+    # séquentiel
+    def _sequential(self, current, step):
+        n = len(self.queue)
+        if n == 0:
+            return None
+        if current is None:
+            return self.queue[0] if step > 0 else None
+        i = self.queue.index_of(current) + step
+        if 0 <= i < n:
+            return self.queue[i]
+        return self.queue[i % n] if self.repeat == REPEAT_ALL else None
+
+    # aléatoire
+    def _forward(self):
+        """Piste déjà tirée après la courante (retirées de la file : oubliées)."""
+        i = self._cursor + 1
+        history = self._history
+        while i < len(history) and history[i] not in self.queue:
+            del history[i]
+        return history[i] if i < len(history) else None
+
+    def _new_cycle(self):
+        self._played = set()
+        self._pool = None
+        self._pool_pos = {}
+
+    def _take(self, node):
+        """Retire node des pistes restantes du cycle."""
+        self._played.add(node)
+        if self._pool is not None and node in self._pool_pos:
+            self._pool_remove(node)
+
+    def _pool_remove(self, node):
+        pool, pos = self._pool, self._pool_pos
+        i = pos.pop(node)
+        last = pool.pop()
+        if last is not node:
+            pool[i] = last
+            pos[last] = i
+
+    def _draw(self):
+        """Tire une piste non encore jouée dans le cycle (nouveau cycle si besoin)."""
+        queue = self.queue
+        n = len(queue)
+        if n == 0:
+            return None
+        if len(self._played) >= n:
+            if self.repeat != REPEAT_ALL:
+                return None
+            # nouveau cycle : la piste courante ne revient pas tout de suite
+            self._new_cycle()
+            if self.current in queue and n > 1:
+                self._played.add(self.current)
+        if self._pool is None and 2 * len(self._played) < n:
+            while True:
+                node = queue[self._rng.randrange(n)]
+                if node not in self._played:
+                    self._played.add(node)
+                    return node
+        if self._pool is None:
+            self._pool = [node for node in queue if node not in self._played]
+            self._pool_pos = {node: i for i, node in enumerate(self._pool)}
+        pool = self._pool
+        if not pool:
+            return None
+        i = self._rng.randrange(len(pool))
+        node = pool[i]
+        self._pool_remove(node)
+        self._played.add(node)
+        return node
+
+    # notifications de la Queue
+    def queue_inserted(self, first, count):
+        if self._pool is not None:
+            for node in self.queue[first:first + count]:
+                self._pool_pos[node] = len(self._pool)
+                self._pool.append(node)
+
+    def queue_about_to_remove(self, first, last):
+        for node in self.queue[first:last + 1]:
+            self._played.discard(node)
+            if self._pool is not None and node in self._pool_pos:
+                self._pool_remove(node)
+
+    def queue_reset(self):
+        queue = self.queue
+        current = self._history[self._cursor] if 0 <= self._cursor < len(self._history) else None
+        self._history = [node for node in self._history if node in queue]
+        self._cursor = self._history.index(current) if current in self._history else len(self._history) - 1
+        self._played = {node for node in self._played if node in queue}
+        self._pool = None
+        self._pool_pos = {}
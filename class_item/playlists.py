@@ -0,0 +1,328 @@
+"""Import et export de playlists M3U/M3U8, PLS et XSPF.
+
+Les fichiers sont lus en flux (ligne à ligne, iterparse pour XSPF) : la
+mémoire ne dépend pas de la taille de la playlist. Les chemins relatifs
+sont résolus par rapport au dossier de la playlist ; l'existence des
+fichiers est vérifiée sur le contenu des dossiers, lu une fois et gardé
+en cache (correction de la casse et des séparateurs Windows au passage).
+Les URL http(s) sont gardées telles quelles (lecture en flux).
+"""
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from urllib.parse import quote, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from PySide6.QtCore import QThread, Signal
+
+from class_item.http_stream import is_remote, url_title
+from class_item.library_scanner import read_metadata
+
+
+PLAYLIST_EXTENSIONS = (".m3u", ".m3u8", ".pls", ".xspf")
+
+
+class PathResolver:
+    """Résout les chemins d'une playlist en chemins absolus existants."""
+
+    # dossiers dont le contenu est gardé en cache
+    MAX_DIRS = 256
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self._dirs = OrderedDict()
+        # dossier demandé -> dossier réel (casse corrigée) ou None
+        self._real = {}
+
+    def _listing(self, directory):
+        """{nom en minuscules: nom réel} du dossier, ou None s'il n'existe pas."""
+        listing = self._dirs.get(directory)
+        if listing is not None:
+            self._dirs.move_to_end(directory)
+            return listing or None
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            names = None
+        listing = {name.lower(): name for name in names} if names is not None else {}
+        # les noms exacts priment sur une variante de casse
+        if names is not None:
+            for name in names:
+                listing[name] = name
+        self._dirs[directory] = listing
+        if len(self._dirs) > self.MAX_DIRS:
+            self._dirs.popitem(last=False)
+        return listing or None
+
+    def resolve(self, location):
+        """Chemin absolu du fichier désigné par location (ou URL distante), ou None."""
+        if is_remote(location):
+            return location
+        if "://" in location:
+            parts = urlsplit(location)
+            if parts.scheme != "file":
+                return None
+            location = unquote(parts.path)
+        elif os.sep != "\\":
+            location = location.replace("\\", "/")
+        path = os.path.normpath(os.path.join(self.base_dir, os.path.expanduser(location)))
+        directory, name = os.path.split(path)
+        directory = self._real_dir(directory)
+        if directory is None:
+            return None
+        real = self._lookup(directory, name)
+        return os.path.join(directory, real) if real is not None else None
+
+    def _lookup(self, directory, name):
+        listing = self._listing(directory)
+        if listing is None:
+            return None
+        return listing.get(name) or listing.get(name.lower())
+
+    def _real_dir(self, directory):
+        """Dossier existant correspondant à directory, à la casse près."""
+        if self._listing(directory) is not None:
+            return directory
+        real = self._real.get(directory, False)
+        if real is not False:
+            return real
+        parent, name = os.path.split(directory)
+        real = None
+        if parent != directory:
+            parent = self._real_dir(parent)
+            found = self._lookup(parent, name) if parent is not None else None
+            if found is not None:
+                real = os.path.join(parent, found)
+        if len(self._real) >= self.MAX_DIRS:
+            self._real.clear()
+        self._real[directory] = real
+        return real
+
+
+# lecture en flux : chaque itérateur produit des tuples (location, titre ou None, artiste ou None)
+def _split_title(text):
+    """« Artiste - Titre » -> (titre, artiste)."""
+    artist, sep, title = text.partition(" - ")
+    return (title.strip(), artist.strip()) if sep else (text.strip(), None)
+
+
+def iter_m3u(f):
+    title = artist = None
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            if line.upper().startswith("#EXTINF:"):
+                _, _, text = line.partition(",")
+                title, artist = _split_title(text) if text else (None, None)
+            continue
+        yield line, title, artist
+        title = artist = None
+
+
+def _pls_entry(entry):
+    title, artist = _split_title(entry["title"]) if entry.get("title") else (None, None)
+    return entry["file"], title, artist
+
+
+def iter_pls(f):
+    current, entry = None, {}
+    for line in f:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        lowered = key.lower()
+        for field in ("file", "title"):
+            if lowered.startswith(field) and lowered[len(field):].isdigit():
+                number = int(lowered[len(field):])
+                if number != current:
+                    # entrées numérotées dans l'ordre : la précédente est complète
+                    if entry.get("file"):
+                        yield _pls_entry(entry)
+                    current, entry = number, {}
+                entry[field] = value.strip()
+                break
+    if entry.get("file"):
+        yield _pls_entry(entry)
+
+
+def iter_xspf(source):
+    # éléments ouverts : le parent de chaque piste lue en est vidé
+    stack = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag.rsplit("}", 1)[-1] != "track":
+            continue
+        fields = {child.tag.rsplit("}", 1)[-1]: (child.text or "").strip() for child in elem}
+        if fields.get("location"):
+            yield fields["location"], fields.get("title") or None, fields.get("creator") or None
+        # libère les pistes déjà lues
+        if stack:
+            stack[-1].clear()
+
+
+def iter_playlist(path):
+    """Entrées (location, titre, artiste) de la playlist path, en flux."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xspf":
+        yield from iter_xspf(path)
+        return
+    with open(path, "rb") as f:
+        lines = _decode_lines(f)
+        yield from (iter_pls(lines) if ext == ".pls" else iter_m3u(lines))
+
+
+def _decode_lines(f):
+    """Lignes d'un fichier binaire : UTF-8, ou latin-1 (vieux .m3u) si invalide."""
+    for raw in f:
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            line = raw.decode("latin-1")
+        yield line.lstrip("\ufeff")
+
+
+class PlaylistImporter(QThread):
+    """Lit une playlist en arrière-plan et la livre par lots.
+
+    batchReady(list) transporte des tuples (title, artist, album, path) pour
+    Queue.extend ; le consommateur appelle ack() après chaque lot, au plus
+    MAX_IN_FLIGHT lots sont en attente (mémoire bornée). La lecture se
+    termine par done(ajoutées, ignorées), ou par failed(message) si la
+    playlist n'a pas pu être lue jusqu'au bout (les lots déjà lus sont livrés).
+    """
+
+    batchReady = Signal(list)
+    # (entrées ajoutées, entrées ignorées : fichiers introuvables ou URL non http(s))
+    progress = Signal(int, int)
+    done = Signal(int, int)
+    failed = Signal(str)
+
+    MAX_IN_FLIGHT = 4
+
+    def __init__(self, path, batch_size=1000, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.batch_size = batch_size
+        self._cancel = threading.Event()
+        self._slots = threading.Semaphore(self.MAX_IN_FLIGHT)
+
+    def cancel(self):
+        self._cancel.set()
+        self._slots.release()
+
+    def ack(self):
+        self._slots.release()
+
+    def run(self):
+        resolver = PathResolver(os.path.dirname(os.path.abspath(self.path)))
+        added = skipped = 0
+        batch = []
+        try:
+            for location, title, artist in iter_playlist(self.path):
+                if self._cancel.is_set():
+                    return
+                path = resolver.resolve(location)
+                if path is None:
+                    skipped += 1
+                    continue
+                if title:
+                    batch.append((title, artist or "", "", path))
+                elif is_remote(path):
+                    batch.append((url_title(path), "", "", path))
+                else:
+                    try:
+                        batch.append((*read_metadata(path), path))
+                    except Exception:
+                        batch.append((os.path.splitext(os.path.basename(path))[0], "", "", path))
+                if len(batch) >= self.batch_size:
+                    added += len(batch)
+                    if not self._send(batch):
+                        return
+                    batch = []
+                    self.progress.emit(added, skipped)
+        except (OSError, ET.ParseError) as e:
+            print("playlist:", self.path, e)
+            if batch:
+                self._send(batch)
+            self.failed.emit(str(e))
+            return
+        if batch:
+            added += len(batch)
+            self._send(batch)
+        self.done.emit(added, skipped)
+
+    def _send(self, batch):
+        self._slots.acquire()
+        if self._cancel.is_set():
+            return False
+        self.batchReady.emit(batch)
+        return True
+
+
+# export
+def _location(path, base_dir):
+    """Chemin relatif au dossier de la playlist s'il s'y trouve, sinon absolu."""
+    if is_remote(path):
+        return path
+    rel = os.path.relpath(path, base_dir) if base_dir else path
+    return path if rel.startswith(os.pardir) else rel
+
+
+def write_playlist(path, entries):
+    """Écrit entries (NodeSong ou tuples title, artist, album, path) dans path.
+
+    Le format suit l'extension (.m3u8 par défaut) ; l'écriture est en flux.
+    Retourne le nombre d'entrées écrites.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    base_dir = os.path.dirname(os.path.abspath(path))
+    count = 0
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            if ext == ".pls":
+                f.write("[playlist]\n")
+            elif ext == ".xspf":
+                f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<playlist version="1" xmlns="http://xspf.org/ns/0/">\n<trackList>\n')
+            else:
+                f.write("#EXTM3U\n")
+            for entry in entries:
+                if isinstance(entry, tuple):
+                    title, artist, album, media = entry
+                else:
+                    title, artist, album, media = entry.title, entry.artist, entry.album, entry.path
+                if not media:
+                    continue
+                count += 1
+                label = f"{artist} - {title}" if artist else (title or "")
+                if ext == ".pls":
+                    f.write(f"File{count}={_location(media, base_dir)}\nTitle{count}={label}\n")
+                elif ext == ".xspf":
+                    uri = escape(media) if is_remote(media) else "file://" + quote(os.path.abspath(media))
+                    f.write(f"<track><location>{uri}</location>")
+                    for tag, value in (("title", title), ("creator", artist), ("album", album)):
+                        if value:
+                            f.write(f"<{tag}>{escape(value)}</{tag}>")
+                    f.write("</track>\n")
+                else:
+                    f.write(f"#EXTINF:-1,{label}\n{_location(media, base_dir)}\n")
+            if ext == ".pls":
+                f.write(f"NumberOfEntries={count}\nVersion=2\n")
+            elif ext == ".xspf":
+                f.write("</trackList>\n</playlist>\n")
+        os.replace(tmp, path)
+    except BaseException:
+        # écriture interrompue (disque plein, droits…) : pas de .tmp laissé derrière
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return count
@@ -0,0 +1,256 @@
+"""Index de recherche en mémoire (titre, artiste, album).
+
+Les textes sont normalisés (minuscules, sans accents ni ligatures) et
+découpés en mots. Chaque mot distinct a sa liste d'entrées ; le
+vocabulaire est lui-même indexé par trigrammes et par préfixes d'un ou
+deux caractères. Un mot de la requête trouve les mots du vocabulaire qui
+le contiennent (ou qui commencent par lui s'il est très court) ; les
+ensembles d'entrées sont réunis puis intersectés en C (set). Une requête
+qui prolonge la précédente (frappe suivante) repart des résultats
+précédents.
+"""
+import heapq
+import itertools
+import unicodedata
+
+from class_item.song_queue import QueueListener
+
+
+def _build_fold_table():
+    table = {}
+    for code in range(0xC0, 0x250):
+        char = chr(code)
+        base = "".join(c for c in unicodedata.normalize("NFKD", char) if not unicodedata.combining(c))
+        if base != char:
+            table[code] = base.casefold()
+    table.update({ord("œ"): "oe", ord("Œ"): "oe", ord("æ"): "ae", ord("Æ"): "ae",
+                  ord("ß"): "ss", ord("’"): "'"})
+    return table
+
+
+_FOLD = _build_fold_table()
+
+
+def normalize(text):
+    """« Éléonore Cœur » -> « eleonore coeur » (insensible à la casse et aux accents)."""
+    folded = text.casefold().translate(_FOLD)
+    if folded.isascii():
+        return folded
+    # caractères hors de la table : décomposition complète
+    return "".join(c for c in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(c))
+
+
+def _trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """Recherche par mots sur des entrées (clé, titre, artiste, album).
+
+    Les clés sont quelconques (chemin de fichier, nœud de la file…) ; add()
+    et remove() mettent l'index à jour incrémentalement.
+    """
+
+    # au-delà, les résultats ne sont pas classés (coût proportionnel à leur nombre)
+    RANK_LIMIT = 5000
+    # réunir un ensemble de n entrées coûte bien moins que vérifier n / VERIFY_RATIO candidats
+    VERIFY_RATIO = 50
+
+    def __init__(self):
+        self._ids = itertools.count()
+        self._id_of = {}
+        # id -> (clé, titre normalisé, texte complet normalisé)
+        self._docs = {}
+        # mot -> ids des entrées qui le contiennent
+        self._postings = {}
+        # trigramme / préfixe court -> mots du vocabulaire
+        self._trigram = {}
+        self._prefix = {}
+        # dernière recherche : (génération, requête, ids correspondants)
+        self._generation = 0
+        self._last = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key):
+        return key in self._id_of
+
+    # mise à jour
+    def add(self, key, title, artist="", album=""):
+        if key in self._id_of:
+            self.remove(key)
+        doc_id = next(self._ids)
+        text = " ".join(normalize(s) for s in (title, artist, album) if s)
+        self._id_of[key] = doc_id
+        self._docs[doc_id] = (key, normalize(title or ""), text)
+        for word in set(text.split()):
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = set()
+                self._add_word(word)
+            ids.add(doc_id)
+        self._generation += 1
+
+    def _add_word(self, word):
+        for gram in _trigrams(word):
+            self._trigram.setdefault(gram, set()).add(word)
+        for prefix in {word[:1], word[:2]}:
+            self._prefix.setdefault(prefix, set()).add(word)
+
+    def _remove_word(self, word):
+        for table, grams in ((self._trigram, _trigrams(word)), (self._prefix, {word[:1], word[:2]})):
+            for gram in grams:
+                words = table.get(gram)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del table[gram]
+
+    def update(self, rows):
+        """rows : tuples (clé, titre, artiste, album)."""
+        for key, title, artist, album in rows:
+            self.add(key, title, artist, album)
+
+    def remove(self, key):
+        doc_id = self._id_of.pop(key, None)
+        if doc_id is None:
+            return
+        _, _, text = self._docs.pop(doc_id)
+        for word in set(text.split()):
+            ids = self._postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(doc_id)
+            if not ids:
+                del self._postings[word]
+                self._remove_word(word)
+        self._generation += 1
+
+    def remove_many(self, keys):
+        for key in keys:
+            self.remove(key)
+
+    def clear(self):
+        self.__init__()
+
+    # recherche
+    def _words_matching(self, token):
+        """Mots du vocabulaire qui contiennent token (qui commencent par token s'il fait moins de 3 caractères)."""
+        if len(token) < 3:
+            return self._prefix.get(token, ())
+        sets = []
+        for gram in _trigrams(token):
+            words = self._trigram.get(gram)
+            if words is None:
+                return ()
+            sets.append(words)
+        sets.sort(key=len)
+        words = sets[0].intersection(*sets[1:])
+        if len(token) > 3:
+            # les trigrammes ne garantissent pas la sous-chaîne complète
+            words = [w for w in words if token in w]
+        return words
+
+    def _doc_matches(self, doc_id, tokens):
+        words = self._docs[doc_id][2].split()
+        for token in tokens:
+            if len(token) < 3:
+                if not any(w.startswith(token) for w in words):
+                    return False
+            elif not any(token in w for w in words):
+                return False
+        return True
+
+    def _matches(self, tokens, limit, within=None):
+        """Ids correspondant à tous les tokens (parmi within si donné) ; (ids, complet).
+
+        Les tokens sont traités du plus sélectif au moins sélectif : les
+        ensembles d'entrées sont réunis et intersectés en C tant que c'est
+        moins coûteux que de vérifier les candidats restants un par un. Pour
+        une requête très large, on s'arrête après limit entrées
+        (complet = False).
+        """
+        postings = self._postings
+        groups = []
+        for token in tokens:
+            lists = [postings[w] for w in self._words_matching(token)]
+            groups.append((sum(map(len, lists)), token, lists))
+        groups.sort(key=lambda g: g[0])
+        matches = within
+        if matches is None:
+            size, token, lists = groups.pop(0)
+            if size > self.RANK_LIMIT:
+                others = [g[1] for g in groups]
+                found = {}
+                for ids in lists:
+                    for doc_id in ids:
+                        if doc_id not in found and self._doc_matches(doc_id, others):
+                            found[doc_id] = None
+                            if len(found) >= limit:
+                                return found.keys(), False
+                return set(found), True
+            matches = set().union(*lists)
+        while groups and groups[0][0] <= self.VERIFY_RATIO * len(matches):
+            matches = matches.intersection(set().union(*groups.pop(0)[2]))
+        if groups:
+            others = [g[1] for g in groups]
+            matches = {doc_id for doc_id in matches if self._doc_matches(doc_id, others)}
+        return matches, True
+
+    def search(self, query, limit=50):
+        """Clés des entrées dont chaque mot de query est contenu dans un mot (au plus limit)."""
+        q = normalize(query).strip()
+        tokens = q.split()
+        if not tokens:
+            return []
+        last = self._last
+        if last is not None and last[0] == self._generation and q.startswith(last[1]) \
+                and min(len(t) for t in last[1].split()) >= 3:
+            # frappe suivante : les résultats ne peuvent que se restreindre
+            matches, complete = self._matches(tokens, limit, last[2])
+        else:
+            matches, complete = self._matches(tokens, limit)
+        self._last = (self._generation, q, matches) if complete and len(matches) <= self.RANK_LIMIT else None
+
+        docs = self._docs
+        if not complete or len(matches) > self.RANK_LIMIT:
+            # requête très large : pas de classement
+            return [docs[doc_id][0] for doc_id in itertools.islice(matches, limit)]
+
+        first = tokens[0]
+
+        def rank(doc_id):
+            _, title, text = docs[doc_id]
+            if title.startswith(first):
+                return (0, len(text), doc_id)
+            if text.startswith(first) or f" {first}" in text:
+                return (1, len(text), doc_id)
+            return (2, len(text), doc_id)
+
+        return [docs[doc_id][0] for doc_id in heapq.nsmallest(limit, matches, key=rank)]
+
+
+class QueueSearch(QueueListener):
+    """SearchIndex tenu à jour avec une Queue ; les clés sont les nœuds."""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.index = SearchIndex()
+        self.queue_reset()
+        queue.subscribe(self)
+
+    def search(self, query, limit=50):
+        return self.index.search(query, limit)
+
+    def queue_inserted(self, first, count):
+        for node in self.queue[first:first + count]:
+            self.index.add(node, node.title, node.artist, node.album)
+
+    def queue_about_to_remove(self, first, last):
+        self.index.remove_many(self.queue[first:last + 1])
+
+    def queue_reset(self):
+        self.index.clear()
+        for node in self.queue:
+            self.index.add(node, node.title, node.artist, node.album)
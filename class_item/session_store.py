@@ -0,0 +1,194 @@
+import json
+import os
+import struct
+import zlib
+
+from class_item.app_paths import data_dir
+from class_item.song_queue import QueueListener
+
+
+# en-tête de chaque enregistrement : longueur et CRC32 de la charge utile
+_HEADER = struct.Struct("<II")
+
+# opérations (premier octet de la charge utile)
+OP_SNAPSHOT = b"S"   # [[title, artist, album, path], ...]
+OP_INSERT = b"I"     # [first, [[title, artist, album, path], ...]]
+OP_REMOVE = b"R"     # [first, last]
+OP_MOVE = b"M"       # [first, count, destination]
+OP_CLEAR = b"C"      # null
+OP_STATE = b"P"      # {"current": int, "position": int, "volume": int, ...}
+
+
+def default_session_path():
+    return os.path.join(data_dir(), "session.log")
+
+
+def _entry(node):
+    return [node.title, node.artist, node.album, node.path]
+
+
+class SessionStore(QueueListener):
+    """Journal de session en ajout seul : file de lecture et état du lecteur.
+
+    Chaque modification de la Queue ajoute un petit enregistrement
+    (longueur, CRC32, opération, JSON) en fin de fichier. Au démarrage le
+    journal est rejoué ; un enregistrement tronqué ou corrompu (arrêt
+    brutal pendant une écriture) marque la fin du journal valide. compact()
+    réécrit un instantané dans un fichier temporaire puis le substitue
+    atomiquement à l'ancien journal : au démarrage, et dès que le journal
+    dépasse COMPACT_RATIO fois l'instantané pendant l'exécution.
+    """
+
+    # compacter dès que le journal dépasse ce ratio de l'instantané (+ COMPACT_SLACK)
+    COMPACT_RATIO = 2.0
+    COMPACT_SLACK = 65536
+
+    def __init__(self, path=None):
+        self.path = path or default_session_path()
+        self._file = None
+        self._queue = None
+        self.state = {}
+        self._snapshot_bytes = 0
+        # taille actuelle du journal
+        self._log_bytes = 0
+
+    # lecture
+    def _records(self, data):
+        offset = 0
+        end = len(data)
+        while offset + _HEADER.size <= end:
+            length, crc = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            payload = data[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc or not payload:
+                break
+            yield payload[:1], payload[1:]
+            offset = start + length
+        self._valid_bytes = offset
+
+    def restore(self, queue):
+        """Rejoue le journal dans queue (vide) ; retourne l'état du lecteur."""
+        self._valid_bytes = 0
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        entries = []
+        state = {}
+        snapshot_bytes = 0
+        for op, body in self._records(data):
+            try:
+                args = json.loads(body)
+            except ValueError:
+                break
+            if op == OP_SNAPSHOT:
+                entries = args
+                snapshot_bytes = len(body)
+            elif op == OP_INSERT:
+                first, rows = args
+                entries[first:first] = rows
+            elif op == OP_REMOVE:
+                first, last = args
+                del entries[first:last + 1]
+            elif op == OP_MOVE:
+                first, count, destination = args
+                block = entries[first:first + count]
+                del entries[first:first + count]
+                to = destination - count if destination > first else destination
+                entries[to:to] = block
+            elif op == OP_CLEAR:
+                entries = []
+            elif op == OP_STATE:
+                state.update(args)
+        queue.extend(tuple(e) for e in entries)
+        self.state = state
+        self._snapshot_bytes = snapshot_bytes
+        self._log_bytes = len(data)
+
+        # fin corrompue ou journal trop long : repartir d'un instantané propre
+        if self._valid_bytes != self._log_bytes or self._too_long():
+            self.compact(queue)
+        return state
+
+    def _too_long(self):
+        return self._log_bytes > self.COMPACT_RATIO * self._snapshot_bytes + self.COMPACT_SLACK
+
+    # écriture
+    def attach(self, queue):
+        """Ouvre le journal en ajout et suit les modifications de queue."""
+        self._queue = queue
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._log_bytes = self._file.tell()
+        queue.subscribe(self)
+
+    def close(self):
+        if self._queue is not None:
+            self._queue.unsubscribe(self)
+            self._queue = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, op, args):
+        if self._file is None:
+            return
+        payload = op + json.dumps(args, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        self._log_bytes += _HEADER.size + len(payload)
+        if op == OP_SNAPSHOT:
+            # la file repart de cet instantané (comme au rejeu)
+            self._snapshot_bytes = len(payload) - 1
+        elif op == OP_CLEAR:
+            self._snapshot_bytes = 0
+        # longue session (déplacements, suppressions…) : le journal reste borné
+        if self._queue is not None and self._too_long():
+            self.compact(self._queue)
+
+    def save_state(self, **state):
+        """Enregistre (partiellement) l'état du lecteur."""
+        changed = {k: v for k, v in state.items() if self.state.get(k) != v}
+        if changed:
+            self.state.update(changed)
+            self._append(OP_STATE, changed)
+
+    def compact(self, queue):
+        """Réécrit le journal sous forme d'un instantané unique (écriture atomique)."""
+        reopen = self._file is not None
+        if reopen:
+            self._file.close()
+            self._file = None
+        tmp = self.path + ".tmp"
+        snapshot = json.dumps([_entry(n) for n in queue], separators=(",", ":"),
+                              ensure_ascii=False).encode("utf-8")
+        with open(tmp, "wb") as f:
+            for op, body in ((OP_SNAPSHOT, snapshot),
+                             (OP_STATE, json.dumps(self.state).encode("utf-8"))):
+                payload = op + body
+                f.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+            log_bytes = f.tell()
+        os.replace(tmp, self.path)
+        self._snapshot_bytes = len(snapshot)
+        self._log_bytes = log_bytes
+        if reopen:
+            self._file = open(self.path, "ab")
+
+    # notifications de la Queue
+    def queue_inserted(self, first, count):
+        self._append(OP_INSERT, [first, [_entry(n) for n in self._queue[first:first + count]]])
+
+    def queue_removed(self, first, last):
+        self._append(OP_REMOVE, [first, last])
+
+    def queue_moved(self, first, count, destination):
+        self._append(OP_MOVE, [first, count, destination])
+
+    def queue_reset(self):
+        if self._queue.is_empty():
+            self._append(OP_CLEAR, None)
+        else:
+            self._append(OP_SNAPSHOT, [_entry(n) for n in self._queue])
@@ -0,0 +1,254 @@
+class NodeSong:
+    """Entrée de la file ; l'objet lui-même sert de handle stable."""
+    __slots__ = ("title", "artist", "album", "path", "_queue", "_pos", "_stamp")
+
+    def __init__(self, title, artist, album, path=None):
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.path = path
+        self._queue = None
+        self._pos = -1
+        self._stamp = 0
+
+    def __repr__(self):
+        return f"NodeSong({self.title!r}, {self.artist!r}, {self.album!r})"
+
+
+class QueueListener:
+    """Observateur de Queue : chaque modification est encadrée par un appel
+    « about_to » avant et un appel après, comme les signaux de
+    QAbstractItemModel. Les positions sont celles d'avant la modification."""
+
+    def queue_about_to_insert(self, first, count):
+        pass
+
+    def queue_inserted(self, first, count):
+        pass
+
+    def queue_about_to_remove(self, first, last):
+        pass
+
+    def queue_removed(self, first, last):
+        pass
+
+    def queue_about_to_move(self, first, count, destination):
+        pass
+
+    def queue_moved(self, first, count, destination):
+        pass
+
+    def queue_about_to_reset(self):
+        pass
+
+    def queue_reset(self):
+        pass
+
+
+class Queue:
+    """File de lecture adossée à une liste : accès indexé en O(1).
+
+    Chaque NodeSong mémorise sa position au moment où elle a été connue.
+    Les insertions et suppressions ponctuelles ne renumérotent pas la
+    file : elles ajoutent un décalage (seuil, delta) au journal, que
+    index_of rejoue depuis l'estampille du nœud. Quand le journal devient
+    long (de l'ordre de la racine de la taille), ou après une opération en
+    masse, les positions sont recalculées en une passe.
+    """
+
+    # taille minimale du journal avant renumérotation complète
+    MAX_SHIFTS = 256
+    # au-delà de ce nombre de plages disjointes, remove_songs notifie un reset
+    MAX_REMOVE_RANGES = 32
+
+    def __init__(self):
+        self._songs = []
+        self._listeners = []
+        # journal des décalages depuis la dernière renumérotation
+        self._shifts = []
+        self._epoch = 0
+        self._stale = False
+
+    def subscribe(self, listener):
+        """Enregistre un QueueListener."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, name, *args):
+        for listener in self._listeners:
+            getattr(listener, name)(*args)
+
+    def is_empty(self):
+        return not self._songs
+
+    def __len__(self):
+        return len(self._songs)
+
+    def __iter__(self):
+        return iter(self._songs)
+
+    def __getitem__(self, index):
+        return self._songs[index]
+
+    def __contains__(self, node):
+        return getattr(node, "_queue", None) is self
+
+    @property
+    def origin(self):
+        """Première piste (ou None)."""
+        return self._songs[0] if self._songs else None
+
+    @property
+    def head(self):
+        """Dernière piste ajoutée en fin de file (ou None)."""
+        return self._songs[-1] if self._songs else None
+
+    def index_of(self, node):
+        """Position courante de node dans la file (ValueError si absent)."""
+        if node._queue is not self:
+            raise ValueError(f"{node!r} n'est pas dans la file")
+        if self._stale:
+            self._reindex()
+            return node._pos
+        pos = node._pos
+        clock = self._epoch + len(self._shifts)
+        if node._stamp != clock:
+            for threshold, delta in self._shifts[node._stamp - self._epoch:]:
+                if pos >= threshold:
+                    pos += delta
+            node._pos = pos
+            node._stamp = clock
+        return pos
+
+    def _reindex(self):
+        self._epoch += len(self._shifts)
+        self._shifts = []
+        epoch = self._epoch
+        for i, node in enumerate(self._songs):
+            node._pos = i
+            node._stamp = epoch
+        self._stale = False
+
+    def _shift(self, threshold, delta):
+        if self._stale:
+            return
+        if len(self._shifts) >= max(self.MAX_SHIFTS, int(len(self._songs) ** 0.5)):
+            self._stale = True
+        else:
+            self._shifts.append((threshold, delta))
+
+    def _new_node(self, title, artist, album, path):
+        node = NodeSong(title, artist, album, path)
+        node._queue = self
+        return node
+
+    def add_song(self, title, artist, album, path=None):
+        """Ajoute une piste en fin de file (O(1)) et retourne son NodeSong."""
+        node = self._new_node(title, artist, album, path)
+        first = len(self._songs)
+        node._pos = first
+        node._stamp = self._epoch + len(self._shifts)
+        self._notify("queue_about_to_insert", first, 1)
+        self._songs.append(node)
+        self._notify("queue_inserted", first, 1)
+        return node
+
+    def extend(self, entries):
+        """Ajoute en fin de file des tuples (title, artist, album[, path])."""
+        return self.insert_songs(len(self._songs), entries)
+
+    def insert_songs(self, position, entries):
+        """Insère des tuples (title, artist, album[, path]) à position."""
+        position = max(0, min(position, len(self._songs)))
+        nodes = [NodeSong(*e) for e in entries]
+        if not nodes:
+            return nodes
+        self._notify("queue_about_to_insert", position, len(nodes))
+        if position < len(self._songs):
+            self._shift(position, len(nodes))
+        clock = self._epoch + len(self._shifts)
+        for i, node in enumerate(nodes, position):
+            node._queue = self
+            node._pos = i
+            node._stamp = clock
+        self._songs[position:position] = nodes
+        self._notify("queue_inserted", position, len(nodes))
+        return nodes
+
+    def remove_song(self, node: NodeSong):
+        """Retire node sans parcourir la file pour le trouver."""
+        if node not in self:
+            return
+        i = self.index_of(node)
+        self._notify("queue_about_to_remove", i, i)
+        del self._songs[i]
+        node._queue = None
+        node._pos = -1
+        if i < len(self._songs):
+            self._shift(i + 1, -1)
+        self._notify("queue_removed", i, i)
+
+    def remove_songs(self, nodes):
+        """Retire un ensemble de pistes en une seule passe."""
+        gone = [n for n in nodes if n in self]
+        if not gone:
+            return
+        ranges = self._ranges(gone) if self._listeners else None
+        if ranges is not None and len(ranges) <= self.MAX_REMOVE_RANGES:
+            # plages contiguës, de la fin vers le début : positions stables
+            for first, last in reversed(ranges):
+                self._notify("queue_about_to_remove", first, last)
+                for n in self._songs[first:last + 1]:
+                    n._queue = None
+                    n._pos = -1
+                del self._songs[first:last + 1]
+                self._stale = True
+                self._notify("queue_removed", first, last)
+            return
+        self._notify("queue_about_to_reset")
+        for n in gone:
+            n._queue = None
+        self._songs = [n for n in self._songs if n._queue is self]
+        for n in gone:
+            n._pos = -1
+        self._stale = True
+        self._notify("queue_reset")
+
+    def _ranges(self, nodes):
+        """Plages [first, last] triées couvrant les positions de nodes."""
+        positions = sorted({self.index_of(n) for n in nodes})
+        ranges = []
+        for p in positions:
+            if ranges and ranges[-1][1] == p - 1:
+                ranges[-1][1] = p
+            else:
+                ranges.append([p, p])
+        return ranges
+
+    def move(self, first, count, destination):
+        """Déplace count pistes à partir de first devant la position destination
+        (exprimée avant le déplacement, comme QAbstractItemModel.moveRows)."""
+        if count <= 0 or first < 0 or first + count > len(self._songs):
+            return False
+        if first <= destination <= first + count:
+            return False
+        self._notify("queue_about_to_move", first, count, destination)
+        block = self._songs[first:first + count]
+        del self._songs[first:first + count]
+        to = destination - count if destination > first else destination
+        self._songs[to:to] = block
+        self._stale = True
+        self._notify("queue_moved", first, count, destination)
+        return True
+
+    def clear(self):
+        self._notify("queue_about_to_reset")
+        for node in self._songs:
+            node._queue = None
+            node._pos = -1
+        self._songs = []
+        self._shifts = []
+        self._stale = False
+        self._notify("queue_reset")
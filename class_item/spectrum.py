@@ -0,0 +1,193 @@
+"""Spectre du son en cours pour le visualiseur (pistes sans vidéo).
+
+Les tampons décodés sont ramenés en mono dans un anneau pré-alloué
+(thread GUI, coût d'une copie). Un thread dédié calcule, au plus FPS fois
+par seconde, la FFT fenêtrée (Hann) de toutes les fenêtres arrivées
+depuis le calcul précédent, en un seul rfft sur un tableau 2D ; la
+puissance moyenne est regroupée en barres sur une échelle de fréquences
+logarithmique, convertie en dB puis lissée (montée immédiate, descente
+progressive).
+"""
+import threading
+import time
+
+import numpy as np
+from PySide6.QtCore import QThread, QRectF, Signal, QCoreApplication
+from PySide6.QtGui import QColor
+
+
+def log_band_edges(n_fft, rate, bars, fmin=30.0, fmax=16000.0):
+    """Indices de début (raies de rfft) de bars bandes log entre fmin et fmax."""
+    fmax = min(fmax, rate / 2.0)
+    freqs = np.geomspace(fmin, fmax, bars + 1)
+    edges = np.floor(freqs * n_fft / rate).astype(np.intp)
+    return np.clip(edges, 1, n_fft // 2)
+
+
+def bar_colors(n):
+    """Dégradé du bleu (graves) au rouge (aigus)."""
+    return [QColor.fromHsvF(0.62 - 0.55 * i / max(1, n - 1), 0.75, 0.95) for i in range(n)]
+
+
+def paint_bars(painter, width, height, bars, colors):
+    """Peint les barres (valeurs dans [0, 1]) sur toute la largeur, depuis le bas."""
+    step = width / len(bars)
+    gap = min(2.0, step / 4)
+    usable = height * 0.9
+    for i, value in enumerate(bars.tolist()):
+        h = usable * value
+        if h >= 1.0:
+            painter.fillRect(QRectF(i * step + gap, height - h, step - gap, h), colors[i])
+
+
+class SpectrumAnalyzer:
+    """FFT par lots et barres log ; push() et compute() peuvent venir de threads différents."""
+
+    # plage affichée (dB relatifs à la pleine échelle) et descente des barres
+    FLOOR_DB = -70.0
+    FALL_DB_PER_S = 60.0
+
+    def __init__(self, rate=48000, bars=48, n_fft=2048, hop=1024, max_windows=16):
+        self.rate = rate
+        self.bars = bars
+        self.n_fft = n_fft
+        self.hop = hop
+        self.max_windows = max_windows
+        self._lock = threading.Lock()
+        # anneau mono : de quoi remplir max_windows fenêtres
+        self._capacity = n_fft + hop * max_windows
+        self._ring = np.zeros(self._capacity, np.float32)
+        self._written = 0
+        self._consumed = 0
+
+        window = np.hanning(n_fft).astype(np.float32)
+        self._window = window
+        # puissance d'une sinusoïde pleine échelle : 0 dB
+        self._norm = 4.0 / float(window.sum()) ** 2
+        edges = log_band_edges(n_fft, rate, bars)
+        self._starts = edges[:-1]
+        self._frames = np.empty((max_windows, n_fft), np.float32)
+        self._levels = np.full(bars, self.FLOOR_DB, np.float32)
+        self._last = None
+
+    def reset(self):
+        with self._lock:
+            self._written = 0
+            self._consumed = 0
+        self._levels[:] = self.FLOOR_DB
+        self._last = None
+
+    def push(self, frames):
+        """frames : tableau (n, canaux) ou (n,) d'échantillons dans [-1, 1]."""
+        mono = frames.mean(axis=1) if frames.ndim == 2 else frames
+        n = len(mono)
+        cap = self._capacity
+        if n > cap:
+            mono = mono[n - cap:]
+            n = cap
+        with self._lock:
+            start = self._written % cap
+            first = min(n, cap - start)
+            self._ring[start:start + first] = mono[:first]
+            if first < n:
+                self._ring[:n - first] = mono[first:]
+            self._written += n
+
+    def compute(self):
+        """Barres (float32 dans [0, 1]) des fenêtres nouvelles, ou None si rien n'est arrivé."""
+        n_fft, hop, cap = self.n_fft, self.hop, self._capacity
+        with self._lock:
+            written = self._written
+            # fenêtres se terminant après la dernière déjà analysée
+            first = max(self._consumed, written - cap + n_fft, n_fft)
+            count = (written - first) // hop + 1 if written >= first else 0
+            count = min(count, self.max_windows)
+            if count <= 0:
+                return None
+            end = written - (written - first) % hop
+            frames = self._frames[:count]
+            for i in range(count):
+                stop = end - (count - 1 - i) * hop
+                start = (stop - n_fft) % cap
+                if start + n_fft <= cap:
+                    frames[i] = self._ring[start:start + n_fft]
+                else:
+                    split = cap - start
+                    frames[i, :split] = self._ring[start:]
+                    frames[i, split:] = self._ring[:n_fft - split]
+            self._consumed = end + hop
+        frames *= self._window
+        spectrum = np.fft.rfft(frames, axis=1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).mean(axis=0)
+        bands = np.maximum.reduceat(power, self._starts) * self._norm
+        levels = 10.0 * np.log10(np.maximum(bands, 1e-12))
+
+        now = time.perf_counter()
+        fall = self.FALL_DB_PER_S * (now - self._last) if self._last is not None else 0.0
+        self._last = now
+        np.maximum(levels, self._levels - fall, out=self._levels)
+        np.maximum(self._levels, self.FLOOR_DB, out=self._levels)
+        return (self._levels - self.FLOOR_DB) / -self.FLOOR_DB
+
+
+class SpectrumWorker(QThread):
+    """Calcule les barres hors du thread GUI, au plus FPS fois par seconde.
+
+    Le rythme baisse si un calcul dépasse BUDGET (fraction d'un cœur) ;
+    inactif (set_active(False)), le thread dort sans rien calculer.
+    """
+
+    barsReady = Signal(object)
+
+    FPS = 30
+    BUDGET = 0.05
+
+    def __init__(self, rate=48000, bars=48, parent=None):
+        super().__init__(parent)
+        self.analyzer = SpectrumAnalyzer(rate, bars)
+        self._cond = threading.Condition()
+        self._active = False
+        self._stopping = False
+        # PerfCounters optionnel (durée de calcul)
+        self.perf = None
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def push(self, frames):
+        if self._active:
+            self.analyzer.push(frames)
+
+    def set_active(self, active):
+        with self._cond:
+            if active == self._active:
+                return
+            self._active = active
+            if not active:
+                self.analyzer.reset()
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        interval = 1.0 / self.FPS
+        while True:
+            with self._cond:
+                while not self._active and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+            start = time.perf_counter()
+            bars = self.analyzer.compute()
+            elapsed = time.perf_counter() - start
+            if bars is not None:
+                if self.perf is not None:
+                    self.perf.spectrum_ms.add(elapsed * 1000.0)
+                self.barsReady.emit(bars)
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(max(interval, elapsed / self.BUDGET) - elapsed)
@@ -0,0 +1,459 @@
+"""Lecture des tags (titre, artiste, album) sans décoder le média.
+
+Le fichier est projeté en mémoire (mmap) et seuls les octets des
+structures de tags sont lus : en-tête et fin de fichier pour ID3, boîtes
+MP4, éléments EBML (Matroska), chunks RIFF (WAV, AVI). Les données audio
+et vidéo (mdat, Cluster, movi…) sont sautées grâce à leur taille, sans
+être touchées.
+"""
+import mmap
+import os
+import struct
+
+
+def read_tags(path, cover=False):
+    """Retourne {"title", "artist", "album", "albumartist"} (clés présentes seulement).
+
+    Avec cover=True, les octets de l'image de pochette intégrée (JPEG, PNG…)
+    sont ajoutés sous la clé "cover" s'il y en a une.
+    """
+    tags = {}
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return tags
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return tags
+    try:
+        head = buf[:12]
+        if head[:3] == b"ID3":
+            _id3v2(buf, 0, tags, cover)
+            _id3v1(buf, tags)
+        elif head[:4] == b"RIFF":
+            _riff(buf, tags, cover)
+        elif head[:4] == _EBML_MAGIC:
+            _matroska(buf, tags, cover)
+        elif head[4:8] == b"ftyp":
+            _mp4(buf, tags, cover)
+        else:
+            _id3v1(buf, tags)
+    except Exception:
+        # structure tronquée ou invalide (fichier abîmé, contenu arbitraire) :
+        # on garde ce qui a été lu, sans jamais faire échouer l'appelant
+        pass
+    finally:
+        buf.close()
+    return tags
+
+
+def read_cover(path):
+    """Octets de la pochette intégrée à path, ou None."""
+    return read_tags(path, cover=True).get("cover")
+
+
+def _set(tags, key, value):
+    value = value.split("\x00", 1)[0].strip()
+    if value and key not in tags:
+        tags[key] = value
+
+
+def _latin1_or_utf8(raw):
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1")
+
+
+# ---------------------------------------------------------------- ID3
+
+_ID3V22_FRAMES = {b"TT2": "title", b"TP1": "artist", b"TAL": "album", b"TP2": "albumartist"}
+_ID3V23_FRAMES = {b"TIT2": "title", b"TPE1": "artist", b"TALB": "album", b"TPE2": "albumartist"}
+
+
+def _synchsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _id3_text(data):
+    if not data:
+        return ""
+    encoding, raw = data[0], data[1:]
+    if encoding == 0:
+        return raw.decode("latin-1")
+    if encoding == 1:
+        return raw.decode("utf-16", "replace")
+    if encoding == 2:
+        return raw.decode("utf-16-be", "replace")
+    if encoding == 3:
+        return raw.decode("utf-8", "replace")
+    return ""
+
+
+def _id3_picture(data, v22):
+    """(type d'image, octets) d'une trame APIC (PIC en 2.2)."""
+    encoding = data[0]
+    if v22:
+        picture_type, pos = data[4], 5
+    else:
+        mime_end = data.index(b"\x00", 1)
+        picture_type, pos = data[mime_end + 1], mime_end + 2
+    # description terminée par un ou deux octets nuls selon l'encodage
+    if encoding in (1, 2):
+        end = data.index(b"\x00\x00", pos)
+        while (end - pos) % 2:
+            end = data.index(b"\x00\x00", end + 1)
+        pos = end + 2
+    else:
+        pos = data.index(b"\x00", pos) + 1
+    return picture_type, data[pos:]
+
+
+def _id3v2(buf, offset, tags, cover=False):
+    """Tag ID3v2.2/2.3/2.4 commençant à offset ; seules les trames utiles sont lues."""
+    if buf[offset:offset + 3] != b"ID3":
+        return
+    major, flags = buf[offset + 3], buf[offset + 5]
+    if major not in (2, 3, 4):
+        return
+    pos = offset + 10
+    end = min(len(buf), pos + _synchsafe(buf[offset + 6:offset + 10]))
+    if flags & 0x80 and major < 4:
+        # désynchronisation de tout le tag (2.2/2.3) : on travaille sur une copie
+        buf = buf[pos:end].replace(b"\xff\x00", b"\xff")
+        pos, end = 0, len(buf)
+    if flags & 0x40 and major >= 3:
+        if major == 3:
+            pos += struct.unpack_from(">I", buf, pos)[0] + 4
+        else:
+            pos += _synchsafe(buf[pos:pos + 4])
+
+    if major == 2:
+        frames, header, id_len = _ID3V22_FRAMES, 6, 3
+    else:
+        frames, header, id_len = _ID3V23_FRAMES, 10, 4
+    picture_id = (b"PIC" if major == 2 else b"APIC") if cover else None
+    front = False
+    while pos + header <= end:
+        frame_id = buf[pos:pos + id_len]
+        if frame_id[0] == 0:
+            break  # remplissage
+        if major == 2:
+            size = int.from_bytes(buf[pos + 3:pos + 6], "big")
+            frame_flags = 0
+        elif major == 3:
+            size, frame_flags = struct.unpack_from(">IH", buf, pos + 4)
+        else:
+            size = _synchsafe(buf[pos + 4:pos + 8])
+            frame_flags = struct.unpack_from(">H", buf, pos + 8)[0]
+        pos += header
+        if size <= 0 or pos + size > end:
+            break
+        key = frames.get(frame_id)
+        if frame_id == picture_id and not front:
+            key = "cover"
+        if key is not None and (key not in tags or key == "cover"):
+            data = buf[pos:pos + size]
+            if major == 3:
+                if frame_flags & 0x00C0:  # compression, chiffrement
+                    data = b""
+                elif frame_flags & 0x0020:  # identifiant de groupe
+                    data = data[1:]
+            elif major == 4:
+                if frame_flags & 0x000C:
+                    data = b""
+                else:
+                    if frame_flags & 0x0040:
+                        data = data[1:]
+                    if frame_flags & 0x0001:  # longueur des données
+                        data = data[4:]
+                    if frame_flags & 0x0002 or flags & 0x80:
+                        data = data.replace(b"\xff\x00", b"\xff")
+            if key != "cover":
+                _set(tags, key, _id3_text(data))
+            elif data:
+                try:
+                    picture_type, picture = _id3_picture(data, major == 2)
+                except (IndexError, ValueError):
+                    picture_type, picture = 0, b""
+                # la première image, remplacée par la couverture (type 3) si elle suit
+                if picture and ("cover" not in tags or picture_type == 3):
+                    tags["cover"] = picture
+                    front = picture_type == 3
+        pos += size
+
+
+def _id3v1(buf, tags):
+    """Tag ID3v1 (128 derniers octets) : complète les champs manquants."""
+    if len(buf) < 128:
+        return
+    tail = buf[-128:]
+    if tail[:3] != b"TAG":
+        return
+    for key, start in (("title", 3), ("artist", 33), ("album", 63)):
+        _set(tags, key, tail[start:start + 30].decode("latin-1"))
+
+
+# ---------------------------------------------------------------- MP4
+
+_MP4_ITEMS = {b"\xa9nam": "title", b"\xa9ART": "artist", b"\xa9alb": "album", b"aART": "albumartist"}
+
+
+def _boxes(buf, start, end):
+    """(type, début des données, fin) des boîtes MP4 entre start et end."""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _child(buf, start, end, kind):
+    for k, s, e in _boxes(buf, start, end):
+        if k == kind:
+            return s, e
+    return None
+
+
+def _mp4(buf, tags, cover=False):
+    moov = _child(buf, 0, len(buf), b"moov")
+    if moov is None:
+        return
+    udta = _child(buf, *moov, b"udta")
+    meta = _child(buf, *udta, b"meta") if udta else _child(buf, *moov, b"meta")
+    if meta is None:
+        return
+    start, end = meta
+    # boîte "pleine" (version + flags) sauf dans certains fichiers QuickTime
+    if buf[start + 4:start + 8] != b"hdlr":
+        start += 4
+    ilst = _child(buf, start, end, b"ilst")
+    if ilst is None:
+        return
+    for kind, s, e in _boxes(buf, *ilst):
+        key = _MP4_ITEMS.get(kind)
+        if cover and kind == b"covr":
+            key = "cover"
+        if key is None:
+            continue
+        data = _child(buf, s, e, b"data")
+        if data is None:
+            continue
+        ds, de = data
+        value_type = struct.unpack_from(">I", buf, ds)[0] & 0xFFFFFF
+        raw = buf[ds + 8:de]
+        if key == "cover":
+            # 13 : JPEG, 14 : PNG, 27 : BMP
+            if value_type in (13, 14, 27) and raw and "cover" not in tags:
+                tags["cover"] = raw
+        elif value_type == 1:
+            _set(tags, key, raw.decode("utf-8", "replace"))
+        elif value_type == 2:
+            _set(tags, key, raw.decode("utf-16-be", "replace"))
+
+
+# ---------------------------------------------------------------- Matroska
+
+_EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+_SEGMENT = 0x18538067
+_SEEKHEAD = 0x114D9B74
+_SEEK = 0x4DBB
+_SEEK_ID = 0x53AB
+_SEEK_POSITION = 0x53AC
+_INFO = 0x1549A966
+_INFO_TITLE = 0x7BA9
+_TAGS = 0x1254C367
+_TAG = 0x7373
+_TARGETS = 0x63C0
+_TARGET_TYPE_VALUE = 0x68CA
+_SIMPLE_TAG = 0x67C8
+_TAG_NAME = 0x45A3
+_TAG_STRING = 0x4487
+_CLUSTER = 0x1F43B675
+_ATTACHMENTS = 0x1941A469
+_ATTACHED_FILE = 0x61A7
+_FILE_NAME = 0x466E
+_FILE_MIME_TYPE = 0x4660
+_FILE_DATA = 0x465C
+
+
+def _ebml_header(buf, pos):
+    """(id, début des données, taille ou None si inconnue)."""
+    first = buf[pos]
+    length = 9 - first.bit_length()
+    if length > 4:
+        raise ValueError("identifiant EBML invalide")
+    element_id = int.from_bytes(buf[pos:pos + length], "big")
+    pos += length
+    first = buf[pos]
+    length = 9 - first.bit_length()
+    if length > 8:
+        raise ValueError("taille EBML invalide")
+    mask = 0xFF >> length
+    size = first & mask
+    unknown = size == mask
+    for b in buf[pos + 1:pos + length]:
+        size = (size << 8) | b
+        unknown = unknown and b == 0xFF
+    return element_id, pos + length, None if unknown else size
+
+
+def _elements(buf, start, end):
+    """(id, début, fin) des éléments EBML entre start et end.
+
+    Un élément de taille inconnue (flux en direct) s'étend jusqu'à la fin
+    de son parent ; le parcours s'arrête après lui.
+    """
+    pos = start
+    while pos < end:
+        element_id, data, size = _ebml_header(buf, pos)
+        if size is None:
+            yield element_id, data, end
+            return
+        yield element_id, data, min(data + size, end)
+        pos = data + size
+
+
+def _matroska(buf, tags, cover=False):
+    segment = None
+    for element_id, s, e in _elements(buf, 0, len(buf)):
+        if element_id == _SEGMENT:
+            segment = (s, e)
+            break
+    if segment is None:
+        return
+    seg_start, seg_end = segment
+    seeks = []
+    visited = set()
+    info_title = []
+    levels = {}
+    wanted = (_INFO, _TAGS, _ATTACHMENTS) if cover else (_INFO, _TAGS)
+
+    def parse(element_id, s, e):
+        visited.add(s)
+        if element_id == _SEEKHEAD:
+            for cid, cs, ce in _elements(buf, s, e):
+                if cid != _SEEK:
+                    continue
+                target = position = None
+                for fid, fs, fe in _elements(buf, cs, ce):
+                    if fid == _SEEK_ID:
+                        target = int.from_bytes(buf[fs:fe], "big")
+                    elif fid == _SEEK_POSITION:
+                        position = int.from_bytes(buf[fs:fe], "big")
+                if target in wanted and position is not None:
+                    seeks.append(seg_start + position)
+        elif element_id == _INFO:
+            for cid, cs, ce in _elements(buf, s, e):
+                if cid == _INFO_TITLE:
+                    info_title.append(buf[cs:ce].decode("utf-8", "replace"))
+        elif element_id == _TAGS:
+            for cid, cs, ce in _elements(buf, s, e):
+                if cid == _TAG:
+                    _matroska_tag(buf, cs, ce, levels)
+        elif element_id == _ATTACHMENTS:
+            for cid, cs, ce in _elements(buf, s, e):
+                if cid == _ATTACHED_FILE:
+                    _matroska_attachment(buf, cs, ce, tags)
+
+    # parcours séquentiel ; les Clusters sont sautés grâce à leur taille, ou
+    # on s'arrête au premier si le SeekHead indique où sont les tags
+    for element_id, s, e in _elements(buf, seg_start, seg_end):
+        if element_id == _CLUSTER and seeks:
+            break
+        if element_id == _SEEKHEAD or element_id in wanted:
+            parse(element_id, s, e)
+    for pos in seeks:
+        if pos >= len(buf):
+            continue
+        element_id, s, size = _ebml_header(buf, pos)
+        if s not in visited and element_id in wanted and size is not None:
+            parse(element_id, s, min(s + size, len(buf)))
+
+    track = levels.get(30, {})
+    album = levels.get(50, {})
+    _set(tags, "title", track.get("TITLE", ""))
+    _set(tags, "title", info_title[0] if info_title else "")
+    _set(tags, "title", album.get("TITLE", ""))
+    _set(tags, "artist", track.get("ARTIST", ""))
+    _set(tags, "artist", album.get("ARTIST", ""))
+    _set(tags, "album", album.get("ALBUM", ""))
+    if "TITLE" in track:
+        _set(tags, "album", album.get("TITLE", ""))
+    _set(tags, "albumartist", album.get("ALBUM_ARTIST", ""))
+
+
+def _matroska_attachment(buf, start, end, tags):
+    name = mime = ""
+    data = None
+    for fid, fs, fe in _elements(buf, start, end):
+        if fid == _FILE_NAME:
+            name = buf[fs:fe].decode("utf-8", "replace").lower()
+        elif fid == _FILE_MIME_TYPE:
+            mime = buf[fs:fe].decode("ascii", "replace")
+        elif fid == _FILE_DATA:
+            data = (fs, fe)
+    if data is None or not mime.startswith("image/"):
+        return
+    # convention Matroska : cover.jpg / cover.png pour la pochette
+    if "cover" not in tags or name.startswith("cover."):
+        tags["cover"] = buf[data[0]:data[1]]
+
+
+def _matroska_tag(buf, start, end, levels):
+    level = 50  # niveau par défaut d'un Tag sans TargetTypeValue
+    values = {}
+    for cid, cs, ce in _elements(buf, start, end):
+        if cid == _TARGETS:
+            for fid, fs, fe in _elements(buf, cs, ce):
+                if fid == _TARGET_TYPE_VALUE:
+                    level = int.from_bytes(buf[fs:fe], "big")
+        elif cid == _SIMPLE_TAG:
+            name = value = None
+            for fid, fs, fe in _elements(buf, cs, ce):
+                if fid == _TAG_NAME:
+                    name = buf[fs:fe].decode("utf-8", "replace").upper()
+                elif fid == _TAG_STRING:
+                    value = buf[fs:fe].decode("utf-8", "replace")
+            if name and value:
+                values.setdefault(name, value)
+    bucket = levels.setdefault(level, {})
+    for name, value in values.items():
+        bucket.setdefault(name, value)
+
+
+# ---------------------------------------------------------------- RIFF
+
+_RIFF_INFO = {b"INAM": "title", b"IART": "artist", b"IPRD": "album"}
+
+
+def _riff(buf, tags, cover=False):
+    end = min(len(buf), 8 + struct.unpack_from("<I", buf, 4)[0])
+    _riff_chunks(buf, 12, end, tags, cover)
+
+
+def _riff_chunks(buf, start, end, tags, cover=False):
+    pos = start
+    while pos + 8 <= end:
+        chunk_id, size = struct.unpack_from("<4sI", buf, pos)
+        s = pos + 8
+        e = min(s + size, end)
+        if chunk_id == b"LIST" and buf[s:s + 4] == b"INFO":
+            sub = s + 4
+            while sub + 8 <= e:
+                sub_id, sub_size = struct.unpack_from("<4sI", buf, sub)
+                key = _RIFF_INFO.get(sub_id)
+                if key is not None:
+                    _set(tags, key, _latin1_or_utf8(buf[sub + 8:min(sub + 8 + sub_size, e)]))
+                sub += 8 + sub_size + (sub_size & 1)
+        elif chunk_id in (b"id3 ", b"ID3 "):
+            _id3v2(buf, s, tags, cover)
+        pos = s + size + (size & 1)
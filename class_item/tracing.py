@@ -0,0 +1,152 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+
+from class_item.app_paths import data_dir
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_cat", "_args", "_start")
+
+    def __init__(self, tracer, name, cat, args):
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._tracer.complete(self._name, self._cat, self._start,
+                              time.perf_counter_ns() - self._start, self._args)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Traces d'exécution en mémoire, exportables au format Chrome/Perfetto.
+
+    Les événements sont écrits dans un tampon circulaire de taille fixe :
+    les plus anciens sont écrasés. Désactivé, chaque point de trace se
+    réduit à un test de self.enabled.
+    """
+
+    def __init__(self, capacity=65536, enabled=False):
+        self.enabled = enabled
+        self.capacity = capacity
+        self._events = [None] * capacity
+        # next() sur itertools.count est atomique sous le GIL
+        self._counter = itertools.count()
+        self._written = 0
+        self._thread_names = {}
+        self._pid = os.getpid()
+
+    def clear(self):
+        self._events = [None] * self.capacity
+        self._counter = itertools.count()
+        self._written = 0
+
+    def _record(self, event):
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        i = next(self._counter)
+        self._events[i % self.capacity] = event + (tid,)
+        self._written = i + 1
+
+    # points de trace
+    def begin(self, name, cat="app", args=None):
+        """Début d'une tranche (à fermer par end() sur le même thread)."""
+        if self.enabled:
+            self._record(("B", name, cat, time.perf_counter_ns(), 0, args))
+
+    def end(self, name, cat="app", args=None):
+        if self.enabled:
+            self._record(("E", name, cat, time.perf_counter_ns(), 0, args))
+
+    def instant(self, name, cat="app", args=None):
+        if self.enabled:
+            self._record(("i", name, cat, time.perf_counter_ns(), 0, args))
+
+    def complete(self, name, cat, start_ns, duration_ns, args=None):
+        if self.enabled:
+            self._record(("X", name, cat, start_ns, duration_ns, args))
+
+    def span(self, name, cat="app", args=None):
+        """Gestionnaire de contexte : with tracer.span("paint", "video"): ..."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, cat, args)
+
+    # export
+    def events(self):
+        """Événements encore présents dans le tampon, du plus ancien au plus récent."""
+        written = self._written
+        if written <= self.capacity:
+            return [e for e in self._events[:written] if e is not None]
+        start = written % self.capacity
+        return [e for e in self._events[start:] + self._events[:start] if e is not None]
+
+    def to_chrome(self):
+        out = []
+        for ph, name, cat, ts, dur, args, tid in self.events():
+            event = {"ph": ph, "name": name, "cat": cat, "ts": ts / 1000.0,
+                     "pid": self._pid, "tid": tid}
+            if ph == "X":
+                event["dur"] = dur / 1000.0
+            elif ph == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            out.append(event)
+        for tid, name in self._thread_names.items():
+            out.append({"ph": "M", "name": "thread_name", "pid": self._pid,
+                        "tid": tid, "args": {"name": name}})
+        return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path=None):
+        """Écrit le tampon en JSON (chrome://tracing, ui.perfetto.dev) ; retourne le chemin."""
+        if path is None:
+            path = os.path.join(data_dir(), time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        with open(path, "w") as f:
+            json.dump(self.to_chrome(), f)
+        return path
+
+
+# instance partagée ; MYMP3_TRACE=1 active la trace dès le démarrage
+tracer = Tracer(enabled=os.environ.get("MYMP3_TRACE", "") not in ("", "0"))
+
+
+def traced(cat="app", name=None):
+    """Décorateur : enregistre chaque appel comme une tranche complète."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.complete(label, cat, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,199 @@
+"""Vignettes de prévisualisation (« trickplay ») pour la recherche dans une vidéo.
+
+Un TrickplayWorker parcourt la vidéo à intervalle régulier et assemble
+des vignettes basse résolution dans une seule image (planche JPEG),
+accompagnée d'un index JSON. Les deux fichiers sont mis en cache, indexés
+par l'empreinte du fichier source ; le survol de la barre de position ne
+fait plus qu'un calcul de rectangle dans la planche.
+"""
+import json
+import os
+
+from PySide6.QtCore import Qt, QRect, QThread, QTimer, QUrl, Signal, QCoreApplication
+from PySide6.QtGui import QImage, QPainter
+
+from class_item.app_paths import cache_dir, file_key
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi")
+
+
+class TrickplaySprite:
+    """Planche de vignettes et son index (intervalle, taille des cases, colonnes)."""
+
+    def __init__(self, image, interval_ms, tile_w, tile_h, columns, count):
+        self.image = image
+        self.interval_ms = interval_ms
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.columns = columns
+        self.count = count
+
+    def tile_rect(self, position_ms):
+        """Rectangle, dans image, de la vignette la plus proche de position_ms."""
+        i = min(self.count - 1, max(0, round(position_ms / self.interval_ms)))
+        row, col = divmod(i, self.columns)
+        return QRect(col * self.tile_w, row * self.tile_h, self.tile_w, self.tile_h)
+
+    def index(self):
+        return {"interval_ms": self.interval_ms, "tile_w": self.tile_w, "tile_h": self.tile_h,
+                "columns": self.columns, "count": self.count}
+
+
+def _cache_paths(path):
+    key = file_key(path)
+    if key is None:
+        return None
+    base = os.path.join(cache_dir("trickplay"), key)
+    return base + ".jpg", base + ".json"
+
+
+def load_sprite(path):
+    """Planche en cache pour la vidéo path, ou None."""
+    paths = _cache_paths(path)
+    if paths is None or not os.path.exists(paths[1]):
+        return None
+    try:
+        with open(paths[1], "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    image = QImage(paths[0])
+    if image.isNull():
+        return None
+    return TrickplaySprite(image, **index)
+
+
+def save_sprite(path, sprite):
+    paths = _cache_paths(path)
+    if paths is None:
+        return
+    image_path, index_path = paths
+    # planche d'abord : l'index n'existe que si la planche est complète
+    if not sprite.image.save(image_path + ".tmp.jpg", "JPG", 80):
+        return
+    os.replace(image_path + ".tmp.jpg", image_path)
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(sprite.index(), f)
+    os.replace(index_path + ".tmp", index_path)
+
+
+class TrickplayWorker(QThread):
+    """Extrait les vignettes de path ; émet spriteReady(path, sprite ou None).
+
+    Un QMediaPlayer muet, en pause, est positionné successivement sur
+    chaque instant voulu ; la première image reçue après chaque saut (image
+    clé la plus proche) est réduite et copiée dans sa case.
+    """
+
+    spriteReady = Signal(str, object)
+
+    TILE_W = 160
+    TILE_H = 90
+    COLUMNS = 10
+    MAX_TILES = 200
+    MIN_INTERVAL_MS = 5000
+    # vidéos plus courtes : pas de planche
+    MIN_DURATION_MS = 60000
+    FRAME_TIMEOUT_MS = 3000
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._cancelled = False
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def cancel(self):
+        self._cancelled = True
+        self.quit()
+
+    def stop(self):
+        self.cancel()
+        self.wait()
+
+    def run(self):
+        from PySide6.QtMultimedia import QMediaPlayer, QVideoSink
+        player = QMediaPlayer()
+        sink = QVideoSink()
+        player.setVideoSink(sink)
+        timeout = QTimer()
+        timeout.setSingleShot(True)
+        job = {"targets": [], "next": 0, "waiting": False, "sprite": None, "painter": None}
+
+        def seek_next():
+            if self._cancelled or job["next"] >= len(job["targets"]):
+                self.quit()
+                return
+            job["waiting"] = True
+            player.setPosition(job["targets"][job["next"]])
+            timeout.start(self.FRAME_TIMEOUT_MS)
+
+        def on_status(status):
+            if status == QMediaPlayer.LoadedMedia and job["sprite"] is None:
+                duration = player.duration()
+                if duration < self.MIN_DURATION_MS or not player.hasVideo():
+                    self.quit()
+                    return
+                interval = max(self.MIN_INTERVAL_MS, -(-duration // self.MAX_TILES))
+                job["targets"] = list(range(0, duration, interval))
+                job["interval"] = interval
+                rows = -(-len(job["targets"]) // self.COLUMNS)
+                sprite = QImage(self.COLUMNS * self.TILE_W, rows * self.TILE_H, QImage.Format_RGB32)
+                sprite.fill(Qt.black)
+                job["sprite"] = sprite
+                job["painter"] = QPainter(sprite)
+                # en pause, chaque setPosition() produit une image
+                player.pause()
+                seek_next()
+            elif status == QMediaPlayer.InvalidMedia:
+                self.quit()
+
+        def on_frame(frame):
+            if not job["waiting"] or not frame.isValid():
+                return
+            target = job["targets"][job["next"]]
+            # image antérieure au saut demandé : une image en retard du saut
+            # précédent (vers target - interval) ne doit pas remplir cette case
+            if frame.startTime() // 1000 < target - job["interval"] // 2:
+                return
+            job["waiting"] = False
+            timeout.stop()
+            image = frame.toImage()
+            if not image.isNull():
+                tile = image.scaled(self.TILE_W, self.TILE_H, Qt.KeepAspectRatio, Qt.FastTransformation)
+                row, col = divmod(job["next"], self.COLUMNS)
+                x = col * self.TILE_W + (self.TILE_W - tile.width()) // 2
+                y = row * self.TILE_H + (self.TILE_H - tile.height()) // 2
+                job["painter"].drawImage(x, y, tile)
+            job["next"] += 1
+            seek_next()
+
+        def on_timeout():
+            # pas d'image à temps : case laissée noire
+            job["waiting"] = False
+            job["next"] += 1
+            seek_next()
+
+        player.mediaStatusChanged.connect(on_status)
+        player.errorOccurred.connect(lambda *args: self.quit())
+        sink.videoFrameChanged.connect(on_frame)
+        timeout.timeout.connect(on_timeout)
+        player.setSource(QUrl.fromLocalFile(self.path))
+        if not self._cancelled:
+            self.exec()
+        timeout.stop()
+        player.stop()
+        if job["painter"] is not None:
+            job["painter"].end()
+
+        if self._cancelled:
+            return
+        if job["sprite"] is None or job["next"] < len(job["targets"]):
+            self.spriteReady.emit(self.path, None)
+            return
+        sprite = TrickplaySprite(job["sprite"], job["interval"], self.TILE_W, self.TILE_H,
+                                 self.COLUMNS, len(job["targets"]))
+        save_sprite(self.path, sprite)
+        self.spriteReady.emit(self.path, sprite)
@@ -0,0 +1,74 @@
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtWidgets import QWidget
+
+
+def grab_drawer(widget):
+    """Rendu de widget dans un QPixmap, même s'il n'a encore jamais été affiché."""
+    widget.ensurePolished()
+    if widget.layout() is not None:
+        widget.layout().activate()
+    return widget.grab()
+
+
+class DrawerSnapshot(QWidget):
+    """Image figée d'un tiroir, déplacée à sa place pendant une animation.
+
+    Le widget ne contient aucun enfant : le déplacer ou changer sa largeur
+    ne provoque ni calcul de layout ni repaint du contenu réel du tiroir.
+    Si sa largeur diffère de celle de l'image, la bande de droite (bord,
+    barre de défilement) reste collée au bord droit et la partie centrale
+    est rognée ou prolongée par sa dernière colonne de pixels.
+    """
+
+    EDGE = 24
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self._pixmap = QPixmap()
+        self.hide()
+
+    def capture(self, widget):
+        """Fige widget et prend sa place (position, taille) ; widget est masqué."""
+        if not widget.isVisible():
+            # showEvent : les pages paresseuses sont construites avant la capture
+            widget.show()
+        self._pixmap = grab_drawer(widget)
+        self.setGeometry(widget.geometry())
+        self.show()
+        self.raise_()
+        widget.hide()
+
+    def release(self, widget, visible):
+        """Rend la main au vrai tiroir, placé à la position actuelle de l'image."""
+        widget.move(self.pos())
+        widget.setVisible(visible)
+        if visible:
+            widget.raise_()
+        self.hide()
+        self._pixmap = QPixmap()
+
+    def paintEvent(self, event):
+        pm = self._pixmap
+        if pm.isNull():
+            return
+        painter = QPainter(self)
+        dpr = pm.devicePixelRatio()
+        pw = pm.width() / dpr
+        ph = pm.height() / dpr
+        w = self.width()
+        if w == pw:
+            painter.drawPixmap(0, 0, pm)
+            return
+        edge = min(self.EDGE, pw / 2, w / 2)
+        left = min(w, pw) - edge
+
+        def src(x, width):
+            return QRectF(x * dpr, 0, width * dpr, ph * dpr)
+
+        painter.drawPixmap(QRectF(0, 0, left, ph), pm, src(0, left))
+        if w > pw:
+            # prolonge la dernière colonne de la partie gauche
+            painter.drawPixmap(QRectF(left, 0, w - edge - left, ph), pm, src(left - 1, 1))
+        painter.drawPixmap(QRectF(w - edge, 0, edge, ph), pm, src(pw - edge, edge))
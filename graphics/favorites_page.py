@@ -0,0 +1,172 @@
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                                QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView,
+                                QAbstractItemView)
+
+from class_item.downloads import OnlineFavorites
+from class_item.http_stream import is_remote, url_title
+
+
+class FavoritesPage(QWidget):
+    """Page « Favoris en ligne » : flux favoris, téléchargés pour l'écoute hors ligne."""
+
+    # url du favori à lire (double-clic / « Lire »)
+    playRequested = Signal(str)
+
+    HEADERS = ("Titre", "État")
+
+    def __init__(self, downloads, parent=None, db_path=None):
+        super().__init__(parent)
+        self.downloads = downloads
+        self.cache = downloads.cache
+        self.favorites = OnlineFavorites(db_path)
+        self._rows = {}
+
+        self.urlEdit = QLineEdit(self)
+        self.urlEdit.setPlaceholderText("https://…/piste.mp3")
+        self.urlEdit.setClearButtonEnabled(True)
+        self.urlEdit.returnPressed.connect(self._on_add)
+        self.addBtn = QPushButton("Ajouter", self)
+        self.addBtn.clicked.connect(self._on_add)
+        self.playBtn = QPushButton("Lire", self)
+        self.playBtn.clicked.connect(self._on_play)
+        self.downloadBtn = QPushButton("Télécharger", self)
+        self.downloadBtn.clicked.connect(self._on_download)
+        self.removeBtn = QPushButton("Retirer", self)
+        self.removeBtn.clicked.connect(self._on_remove)
+        self.statusLabel = QLabel("", self)
+
+        top = QHBoxLayout()
+        top.setContentsMargins(0, 0, 0, 0)
+        top.addWidget(self.urlEdit, 1)
+        top.addWidget(self.addBtn)
+
+        self.table = QTableWidget(0, len(self.HEADERS), self)
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.table.doubleClicked.connect(self._on_play)
+
+        bottom = QHBoxLayout()
+        bottom.setContentsMargins(0, 0, 0, 0)
+        bottom.addWidget(self.playBtn)
+        bottom.addWidget(self.downloadBtn)
+        bottom.addWidget(self.removeBtn)
+        bottom.addWidget(self.statusLabel, 1)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(bottom)
+
+        downloads.progress.connect(self._on_progress)
+        downloads.finished.connect(self._on_finished)
+        downloads.failed.connect(self._on_failed)
+
+        # favoris connus ; les téléchargements interrompus reprennent, pas
+        # ceux des copies évincées (elles évinceraient à leur tour les autres)
+        for url, title, sha256 in self.favorites.entries():
+            self._append_row(url, title)
+            self._sync(url, sha256)
+        self._update_status()
+
+    def _append_row(self, url, title):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        item = QTableWidgetItem(title)
+        item.setData(Qt.UserRole, url)
+        item.setToolTip(url)
+        self.table.setItem(row, 0, item)
+        self.table.setItem(row, 1, QTableWidgetItem(""))
+        self._rows[url] = item
+
+    def _set_state(self, url, text):
+        item = self._rows.get(url)
+        if item is not None:
+            self.table.item(item.row(), 1).setText(text)
+
+    def _sync(self, url, sha256=None, requested=False):
+        """Copie locale présente, sinon téléchargement (re)lancé.
+
+        Une copie évincée du cache n'est retéléchargée que sur demande (requested).
+        """
+        if self.cache.contains(url):
+            self._set_state(url, "Hors ligne")
+        elif self.downloads.is_active(url):
+            self._set_state(url, "En attente")
+        elif self.cache.was_evicted(url) and not requested:
+            self._set_state(url, "Évincé du cache")
+        else:
+            self.downloads.download(url, sha256)
+            self._set_state(url, "En attente")
+
+    def _update_status(self):
+        used = self.cache.total_size() / 1024 ** 2
+        cap = self.cache.max_bytes / 1024 ** 2
+        self.statusLabel.setText(f"Cache : {used:.0f} / {cap:.0f} Mo")
+
+    def _selected_urls(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.table.item(row, 0).data(Qt.UserRole) for row in rows]
+
+    # actions
+    def add_favorite(self, url, title=None, sha256=None):
+        """Ajoute url aux favoris et lance son téléchargement."""
+        if url not in self._rows:
+            title = title or url_title(url)
+            self.favorites.add(url, title, sha256)
+            self._append_row(url, title)
+        self._sync(url, sha256, requested=True)
+
+    def _on_add(self):
+        url = self.urlEdit.text().strip()
+        if not is_remote(url):
+            self.statusLabel.setText("Adresse http:// ou https:// attendue.")
+            return
+        self.urlEdit.clear()
+        self.add_favorite(url)
+
+    def _on_play(self):
+        urls = self._selected_urls()
+        if urls:
+            # la copie locale est choisie à la lecture si elle existe
+            self.playRequested.emit(urls[0])
+
+    def _on_download(self):
+        expected = {url: sha256 for url, _, sha256 in self.favorites.entries()}
+        for url in self._selected_urls():
+            self._sync(url, expected.get(url), requested=True)
+
+    def _on_remove(self):
+        for url in self._selected_urls():
+            self.downloads.cancel(url, discard=True)
+            self.cache.remove(url)
+            self.favorites.remove(url)
+            item = self._rows.pop(url)
+            self.table.removeRow(item.row())
+        self._update_status()
+
+    # téléchargements
+    def _on_progress(self, url, done, total):
+        if total > 0:
+            self._set_state(url, f"{done * 100 // total} %")
+        else:
+            self._set_state(url, f"{done // 1024 ** 2} Mo")
+
+    def _on_finished(self, url, path):
+        self._set_state(url, "Hors ligne")
+        # l'éviction a pu retirer d'autres copies
+        for other in self._rows:
+            if other != url and self.cache.was_evicted(other):
+                self._set_state(other, "Évincé du cache")
+        self._update_status()
+
+    def _on_failed(self, url, message):
+        self._set_state(url, "Erreur")
+        item = self._rows.get(url)
+        if item is not None:
+            self.table.item(item.row(), 1).setToolTip(message)
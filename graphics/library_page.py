@@ -0,0 +1,304 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, QTimer, Signal
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                                QLabel, QTableView, QHeaderView, QFileDialog,
+                                QAbstractItemView, QLineEdit)
+
+from class_item.library_scanner import LibraryIndex, LibraryScanner
+from class_item.duplicates import DuplicateFinder
+from class_item.search_index import SearchIndex
+
+
+class LibraryModel(QAbstractTableModel):
+    """Modèle tabulaire de la bibliothèque, alimenté par lots.
+
+    Un SearchIndex suit les ajouts et suppressions ; set_filter() restreint
+    l'affichage aux résultats d'une recherche.
+    """
+
+    HEADERS = ("Titre", "Artiste", "Album")
+    # côté des vignettes (pixels), inférieur à la hauteur de ligne
+    ICON_SIZE = 20
+
+    def __init__(self, parent=None, artwork=None):
+        super().__init__(parent)
+        # lignes : listes [path, title, artist, album]
+        self._rows = []
+        self._row_of = {}
+        # filtre actif : indices des lignes affichées (None = toutes)
+        self._view = None
+        self._view_pos = {}
+        self.search = SearchIndex()
+        # ArtworkService optionnel : vignette dans la colonne du titre
+        self.artwork = artwork
+        self._placeholder = QImage(self.ICON_SIZE, self.ICON_SIZE, QImage.Format_ARGB32_Premultiplied)
+        self._placeholder.fill(Qt.transparent)
+        if artwork is not None:
+            artwork.artworkReady.connect(self._on_artwork_ready)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._view is None else len(self._view)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[self._source_row(index.row())]
+        if role == Qt.DisplayRole:
+            return row[index.column() + 1]
+        if role == Qt.ToolTipRole:
+            return row[0]
+        if role == Qt.DecorationRole and index.column() == 0 and self.artwork is not None:
+            image = self.artwork.image(row[0], self.ICON_SIZE)
+            return self._placeholder if image is None else image
+        return None
+
+    def _on_artwork_ready(self, path, size):
+        row = self._view_row(self._row_of.get(path))
+        if size == self.ICON_SIZE and row is not None:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def path_at(self, row):
+        return self._rows[self._source_row(row)][0]
+
+    # filtre
+    def _source_row(self, row):
+        return row if self._view is None else self._view[row]
+
+    def _view_row(self, row):
+        if row is None or self._view is None:
+            return row
+        return self._view_pos.get(row)
+
+    def set_filter(self, paths):
+        """N'affiche que paths, dans cet ordre ; None rétablit la liste complète."""
+        self.beginResetModel()
+        if paths is None:
+            self._view = None
+            self._view_pos = {}
+        else:
+            self._view = [self._row_of[p] for p in paths if p in self._row_of]
+            self._view_pos = {row: i for i, row in enumerate(self._view)}
+        self.endResetModel()
+
+    def is_filtered(self):
+        return self._view is not None
+
+    def track_count(self):
+        return len(self._rows)
+
+    def add_rows(self, rows):
+        """Ajoute ou met à jour des tuples (path, title, artist, album)."""
+        new_rows = []
+        for path, title, artist, album in rows:
+            i = self._row_of.get(path)
+            if i is None:
+                new_rows.append([path, title, artist, album])
+            else:
+                self._rows[i] = [path, title, artist, album]
+                i = self._view_row(i)
+                if i is not None:
+                    self.dataChanged.emit(self.index(i, 0), self.index(i, len(self.HEADERS) - 1))
+        self.search.update(rows)
+        if new_rows and self._view is not None:
+            # hors filtre : les nouvelles lignes apparaîtront à la prochaine recherche
+            for offset, row in enumerate(new_rows):
+                self._row_of[row[0]] = len(self._rows) + offset
+            self._rows.extend(new_rows)
+        elif new_rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            for offset, row in enumerate(new_rows):
+                self._row_of[row[0]] = first + offset
+            self._rows.extend(new_rows)
+            self.endInsertRows()
+
+    def remove_paths(self, paths):
+        gone = {p for p in paths if p in self._row_of}
+        if not gone:
+            return
+        self.search.remove_many(gone)
+        self.beginResetModel()
+        shown = None if self._view is None else [self._rows[i][0] for i in self._view]
+        self._rows = [r for r in self._rows if r[0] not in gone]
+        self._row_of = {r[0]: i for i, r in enumerate(self._rows)}
+        if shown is not None:
+            self._view = [self._row_of[p] for p in shown if p in self._row_of]
+            self._view_pos = {row: i for i, row in enumerate(self._view)}
+        self.endResetModel()
+
+
+class LibraryPage(QWidget):
+    """Page « Bibliothèque » : dossiers surveillés et liste des pistes indexées."""
+
+    # chemin du fichier à lire (double-clic)
+    trackActivated = Signal(str)
+
+    # nombre maximal de résultats affichés pour une recherche
+    SEARCH_LIMIT = 500
+
+    def __init__(self, parent=None, index_path=None, artwork=None):
+        super().__init__(parent)
+        self._index_path = index_path
+        self._scanner = None
+        self._finder = None
+
+        self.addFolderBtn = QPushButton("Ajouter un dossier…", self)
+        self.addFolderBtn.clicked.connect(self._on_add_folder)
+        # affiche les fichiers au contenu identique, groupe par groupe
+        self.duplicatesBtn = QPushButton("Doublons", self)
+        self.duplicatesBtn.setCheckable(True)
+        self.duplicatesBtn.toggled.connect(self._on_duplicates_toggled)
+        self.statusLabel = QLabel("", self)
+        self.searchEdit = QLineEdit(self)
+        self.searchEdit.setPlaceholderText("Rechercher…")
+        self.searchEdit.setClearButtonEnabled(True)
+        self.searchEdit.textChanged.connect(self._on_search_edited)
+        # pendant un scan, la recherche en cours est relancée au plus toutes les 150 ms
+        self._researchTimer = QTimer(self)
+        self._researchTimer.setSingleShot(True)
+        self._researchTimer.setInterval(150)
+        self._researchTimer.timeout.connect(self._apply_search)
+
+        top = QHBoxLayout()
+        top.setContentsMargins(0, 0, 0, 0)
+        top.addWidget(self.addFolderBtn)
+        top.addWidget(self.duplicatesBtn)
+        top.addWidget(self.statusLabel, 1)
+        top.addWidget(self.searchEdit, 1)
+
+        self.model = LibraryModel(self, artwork)
+        self.view = QTableView(self)
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # hauteur de ligne fixe : pas de mesure par ligne sur de gros volumes
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(22)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.view.doubleClicked.connect(self._on_double_clicked)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(self.view, 1)
+
+    def rescan(self, extra_roots=()):
+        """(Re)lance le scan des racines connues, plus extra_roots."""
+        index = LibraryIndex(self._index_path)
+        try:
+            roots = index.roots()
+        finally:
+            index.close()
+        roots.extend(r for r in extra_roots if r not in roots)
+        if not roots:
+            return
+        self.stop_scan()
+        self._scanner = LibraryScanner(roots, index_path=self._index_path, parent=self)
+        self._scanner.batchReady.connect(self.model.add_rows)
+        self._scanner.removed.connect(self.model.remove_paths)
+        self._scanner.batchReady.connect(self._on_library_changed)
+        self._scanner.removed.connect(self._on_library_changed)
+        self._scanner.progress.connect(self._on_progress)
+        self._scanner.finished.connect(self._on_scan_finished)
+        self.statusLabel.setText("Analyse…")
+        self._scanner.start(QThread.LowPriority)
+
+    def stop_scan(self):
+        if self._scanner is not None and self._scanner.isRunning():
+            self._scanner.cancel()
+            self._scanner.wait()
+
+    def _on_add_folder(self):
+        path = QFileDialog.getExistingDirectory(self, "Ajouter un dossier")
+        if path:
+            self.rescan([path])
+
+    def _on_progress(self, seen, reread):
+        self.statusLabel.setText(f"Analyse… {seen} fichiers ({reread} relus)")
+
+    def _on_scan_finished(self):
+        self.statusLabel.setText(f"{self.model.track_count()} pistes")
+
+    def _apply_search(self):
+        if self.duplicatesBtn.isChecked():
+            return
+        query = self.searchEdit.text()
+        if query.strip():
+            self.model.set_filter(self.model.search.search(query, self.SEARCH_LIMIT))
+        elif self.model.is_filtered():
+            self.model.set_filter(None)
+
+    def _on_search_edited(self):
+        if self.duplicatesBtn.isChecked():
+            # nouvelle recherche : on quitte la vue des doublons
+            self.duplicatesBtn.blockSignals(True)
+            self.duplicatesBtn.setChecked(False)
+            self.duplicatesBtn.blockSignals(False)
+            self.stop_duplicates()
+        self._apply_search()
+
+    def _on_library_changed(self, *args):
+        if self.model.is_filtered() and not self._researchTimer.isActive():
+            self._researchTimer.start()
+
+    # doublons
+    def _on_duplicates_toggled(self, checked):
+        self.stop_duplicates()
+        if not checked:
+            self._apply_search()
+            self.statusLabel.setText(f"{self.model.track_count()} pistes")
+            return
+        self._finder = DuplicateFinder(index_path=self._index_path, parent=self)
+        self._finder.progress.connect(self._on_duplicates_progress)
+        self._finder.groupsReady.connect(self._on_duplicates_ready)
+        self._finder.failed.connect(self._on_duplicates_failed)
+        self._finder.finished.connect(self._on_duplicates_finished)
+        self.statusLabel.setText("Doublons…")
+        self._finder.start(QThread.LowPriority)
+
+    def stop_duplicates(self):
+        if self._finder is not None:
+            self._finder.groupsReady.disconnect(self._on_duplicates_ready)
+            self._finder.failed.disconnect(self._on_duplicates_failed)
+            if self._finder.isRunning():
+                self._finder.cancel()
+                self._finder.wait()
+            self._finder = None
+
+    def _on_duplicates_progress(self, stage, done, total):
+        self.statusLabel.setText(f"Doublons… {stage} {done}/{total}")
+
+    def _on_duplicates_finished(self):
+        # aussi après une erreur : plus aucune référence à l'objet détruit
+        finder = self.sender()
+        if finder is self._finder:
+            self._finder = None
+        finder.deleteLater()
+
+    def _on_duplicates_failed(self, message):
+        self.duplicatesBtn.blockSignals(True)
+        self.duplicatesBtn.setChecked(False)
+        self.duplicatesBtn.blockSignals(False)
+        self.statusLabel.setText(f"Doublons : échec de la recherche ({message})")
+
+    def _on_duplicates_ready(self, groups):
+        paths = [path for group in groups for path in group]
+        self.model.set_filter(paths)
+        extra = len(paths) - len(groups)
+        self.statusLabel.setText(f"{len(groups)} groupes de doublons ({extra} copies en trop)")
+
+    def _on_double_clicked(self, index):
+        if index.isValid():
+            self.trackActivated.emit(self.model.path_at(index.row()))
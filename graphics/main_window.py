@@ -1,15 +1,45 @@
-from PySide6.QtCore import Qt, QPoint, QPropertyAnimation, QEasingCurve, QAbstractAnimation
+import os
+
+from PySide6.QtCore import Qt, QPoint, QPropertyAnimation, QEasingCurve, QAbstractAnimation, QTimer, Signal
+from PySide6.QtGui import QKeySequence, QShortcut
 from PySide6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout,
                                 QVBoxLayout, QGridLayout, QPushButton,
                                 QLineEdit, QStackedWidget, QTableWidget,
                                 QComboBox, QHeaderView, QLabel, QSpacerItem,
-                                QSizePolicy, QFormLayout, QListWidget, QGraphicsOpacityEffect
+                                QSizePolicy, QFormLayout, QListWidget, QGraphicsOpacityEffect,
+                                QListView, QAbstractItemView, QFileDialog
                                 )
 from class_item.media_player import MediaPlayer
 from graphics.stacked_cutom import StackedCustom
+from graphics.library_page import LibraryPage
+from graphics.online_page import OnlinePage
+from graphics.favorites_page import FavoritesPage
+from graphics.queue_model import QueueModel, QueueSearchModel
+from graphics.drawer_snapshot import DrawerSnapshot
+from class_item.session_store import SessionStore
+from class_item.artwork import ArtworkService
+from class_item.tracing import tracer, traced
+
+
+_STYLE_PATH = "graphics/style.qss"
+_style_cache = None
+
+
+def load_style():
+    """Contenu de style.qss, lu une seule fois par processus."""
+    global _style_cache
+    if _style_cache is None:
+        with open(_STYLE_PATH, "r") as styleFile:
+            _style_cache = styleFile.read()
+    return _style_cache
 
 
 class MainWindow(QMainWindow):
+    # émis une fois, à la fin du premier paint de la fenêtre
+    firstPainted = Signal()
+    # émis une fois le backend multimédia créé
+    backendReady = Signal()
+
     def __init__(self):
         super().__init__(parent=None)
 
@@ -20,8 +50,35 @@ class MainWindow(QMainWindow):
 
         self.myStyleSheet()
 
+        # les tiroirs (et leurs animations) sont construits à leur première ouverture
+        self._drawer_width = 350
+        self.menuYAxer = 10
+        self._anim_full_duration = 750  # durée en ms pour un trajet complet
+        self.menuDrawer = None
+        self.menuIsOpening = False
+        self.menuIsMoving = False
+        self._queue_height = 150 # Hauteur plus réaliste pour une liste
+        self.queue_duration = 300 # Un peu plus lent pour être visible
+        self.queueDrawer = None
+        self.queueIsOpening = False
+        self.queueIsMoving = False
+        self.libraryPage = None
+        # pochettes et vignettes (workers et cache disque démarrés à la première demande)
+        self.artwork = ArtworkService(self)
+        # animations des tiroirs sur une image figée : aucun relayout par tick,
+        # un seul à la fin de l'animation
+        self.snapshotAnimations = True
+        self._menuSnapshot = None
+        self._queueSnapshot = None
+        self._first_paint_done = False
+
         self.__buildCentralWidget()
-        self.__buildQueueDrawer()
+        self.__restoreSession()
+
+        # trace d'exécution : Ctrl+Maj+T active/désactive, Ctrl+Maj+E exporte
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self, self._toggle_tracing)
+        QShortcut(QKeySequence("Ctrl+Shift+E"), self,
+                  lambda: print("trace écrite dans", tracer.export_chrome()))
 
         #self.__menuBar() >> si je cree une barre de menu
 
@@ -31,18 +88,45 @@ class MainWindow(QMainWindow):
         self.mediaPlayer.menuBtn.clicked.connect(self.toggleMenuDrawer)
         self.mediaPlayer.queueBtn.clicked.connect(self.toggleQueueDrawer)
 
-        self.__buildMenuDrawer()
         self.centralWidget().layout().addWidget(self.mediaPlayer)
 
+    def __restoreSession(self):
+        # file de lecture, piste, volume et tiroirs de la session précédente
+        self.session = SessionStore()
+        queue = self.mediaPlayer.queue
+        state = self.session.restore(queue)
+        self.session.attach(queue)
+        if "volume" in state:
+            self.mediaPlayer.volumeSlider.setValue(state["volume"])
+        current = state.get("current", -1)
+        self._restored_track = None
+        if 0 <= current < len(queue):
+            self._restored_track = (queue[current], state.get("position", 0))
+        self._restored_drawers = (state.get("menu_open", False), state.get("queue_open", False))
+
+        # sauvegardes : à chaque changement, et la position toutes les 5 s
+        self.mediaPlayer.volumeSlider.valueChanged.connect(self._save_session_state)
+        self.mediaPlayer.trackChanged.connect(self._save_session_state)
+        self._sessionTimer = QTimer(self)
+        self._sessionTimer.setInterval(5000)
+        self._sessionTimer.timeout.connect(self._save_session_state)
+        self._sessionTimer.start()
+
+    def _save_session_state(self, *args):
+        mp = self.mediaPlayer
+        current = mp.queue.index_of(mp.current) if mp.current in mp.queue else -1
+        self.session.save_state(
+            current=current,
+            position=mp.player.position() if mp.player is not None else 0,
+            volume=mp.volumeSlider.value(),
+            menu_open=self.menuIsOpening,
+            queue_open=self.queueIsOpening,
+        )
+
     def __buildMenuDrawer(self):
         central = self.centralWidget()
         # drawer en tant que widget enfant du central (positionné manuellement)
-        self._drawer_width = 350
-        self.menuYAxer = 10
-        self._anim_full_duration = 750  # durée en ms pour un trajet complet
         self.menuDrawer = QWidget(parent=central)
-        self.menuIsOpening = False
-        self.menuIsMoving = False
         self.menuDrawer.setFixedWidth(self._drawer_width)
         self.menuDrawer.setFixedHeight(self.mediaPlayer.videoWidget.height())
         # position initiale (hors de la zone centrale, coordonnées locales)
@@ -54,28 +138,42 @@ class MainWindow(QMainWindow):
         self.menuDrawerAnim.finished.connect(self._on_menuDrawerAnim_finished)
         # update queue width progressively while the menu animates
         self.menuDrawerAnim.valueChanged.connect(self._on_menuDrawerAnim_valueChanged)
+        self._menuSnapshot = DrawerSnapshot(central)
 
         self.menuDrawerLayout = QVBoxLayout(self.menuDrawer)
     
+        # pages construites à la première activation de leur onglet
         self.stackedWidget = StackedCustom(self.menuDrawer, tab_height=30)
-        self.stackedWidget.add_page(QWidget(), "En ligne")
-        self.stackedWidget.add_page(QWidget(), "Bibliothèque")
-        self.stackedWidget.add_page(QWidget(), "Favoris en ligne")
+        self.stackedWidget.add_page(self.__buildOnlinePage, "En ligne")
+        self.stackedWidget.add_page(self.__buildLibraryPage, "Bibliothèque")
+        self.stackedWidget.add_page(self.__buildFavoritesPage, "Favoris en ligne")
         self.stackedWidget._top_layout.addStretch()
-        self.stackedWidget.add_page(QWidget(), "Paramètres")
-
-        self.stackedWidget.stack.widget(0).setLayout(QVBoxLayout())
-        self.stackedWidget.stack.widget(0).layout().addWidget(QLabel("Contenu En ligne"))
+        self.stackedWidget.add_page(QWidget, "Paramètres")
 
         self.menuDrawerLayout.addWidget(self.stackedWidget)
 
+    def __buildOnlinePage(self):
+        self.onlinePage = OnlinePage(streams=self.mediaPlayer.streams)
+        self.onlinePage.playRequested.connect(self.mediaPlayer.play_url)
+        self.onlinePage.enqueueRequested.connect(lambda url: self.mediaPlayer.enqueue_urls([url]))
+        self.mediaPlayer.firstAudioMeasured.connect(self.onlinePage.show_first_audio)
+        return self.onlinePage
+
+    def __buildFavoritesPage(self):
+        self.favoritesPage = FavoritesPage(self.mediaPlayer.downloads)
+        self.favoritesPage.playRequested.connect(self.mediaPlayer.play_url)
+        return self.favoritesPage
+
+    def __buildLibraryPage(self):
+        self.libraryPage = LibraryPage(artwork=self.artwork)
+        self.libraryPage.trackActivated.connect(self.mediaPlayer.play_file)
+        # scan incrémental des dossiers connus
+        QTimer.singleShot(0, self.libraryPage.rescan)
+        return self.libraryPage
+
     def __buildQueueDrawer(self):
         central = self.centralWidget()
         # drawer en bas (overlay venant du bas vers le haut)
-        self._queue_height = 150 # Hauteur plus réaliste pour une liste
-        self.queue_duration = 300 # Un peu plus lent pour être visible
-        self.queueIsOpening = False
-        self.queueIsMoving = False
         self.queueDrawer = QWidget(parent=central)
         self.queueDrawer.setFixedHeight(self._queue_height)
         
@@ -87,27 +185,104 @@ class MainWindow(QMainWindow):
         self.queueDrawerAnim.setEasingCurve(QEasingCurve.InOutQuad)
         self.queueDrawerAnim.setDuration(self.queue_duration)
         self.queueDrawerAnim.finished.connect(self._on_queueDrawerAnim_finished)
+        self._queueSnapshot = DrawerSnapshot(central)
 
         # layout et contenu (ex : liste réordonnable pour le scratch)
         self.queueLayout = QVBoxLayout(self.queueDrawer)
         self.queueLayout.setContentsMargins(4, 4, 4, 4)
-        self.queueList = QListWidget(self.queueDrawer)
-        self.queueList.setSelectionMode(QListWidget.SingleSelection)
+        # vue virtualisée directement branchée sur la file du lecteur
+        self.queueModel = QueueModel(self.mediaPlayer.queue, self, artwork=self.artwork)
+        self.queueSearchModel = QueueSearchModel(self.mediaPlayer.queue, self)
+        self.queueSearchEdit = QLineEdit(self.queueDrawer)
+        self.queueSearchEdit.setPlaceholderText("Rechercher dans la file…")
+        self.queueSearchEdit.setClearButtonEnabled(True)
+        self.queueSearchEdit.textChanged.connect(self._on_queue_search)
+        self.queueImportBtn = QPushButton("Importer…", self.queueDrawer)
+        self.queueImportBtn.clicked.connect(self._on_import_playlist)
+        self.queueExportBtn = QPushButton("Exporter…", self.queueDrawer)
+        self.queueExportBtn.clicked.connect(self._on_export_playlist)
+        queueTools = QHBoxLayout()
+        queueTools.addWidget(self.queueSearchEdit, 1)
+        queueTools.addWidget(self.queueImportBtn)
+        queueTools.addWidget(self.queueExportBtn)
+        self.queueLayout.addLayout(queueTools)
+        self.queueList = QListView(self.queueDrawer)
+        self.queueList.setModel(self.queueModel)
+        self.queueList.setUniformItemSizes(True)
+        self.queueList.setSelectionMode(QAbstractItemView.SingleSelection)
         self.queueList.setDragEnabled(True)
         self.queueList.setAcceptDrops(True)
-        self.queueList.setDragDropMode(QListWidget.InternalMove)
+        self.queueList.setDropIndicatorShown(True)
+        self.queueList.setDragDropMode(QAbstractItemView.InternalMove)
+        self.queueList.setDefaultDropAction(Qt.MoveAction)
+        self.queueList.doubleClicked.connect(
+            lambda index: self.mediaPlayer.play_node(index.model().node_at(index.row())))
         self.queueLayout.addWidget(self.queueList)
+        # progression et résultat des imports de playlists
+        self.queueStatusLabel = QLabel(self.mediaPlayer.importStatusText, self.queueDrawer)
+        self.mediaPlayer.importStatus.connect(self.queueStatusLabel.setText)
+        self.queueLayout.addWidget(self.queueStatusLabel)
+
+    _PLAYLIST_FILTER = "Playlists (*.m3u *.m3u8 *.pls *.xspf);;Tous fichiers (*)"
+
+    def _on_import_playlist(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importer une playlist", filter=self._PLAYLIST_FILTER)
+        if path:
+            self.mediaPlayer.import_playlist(path)
+
+    def _on_export_playlist(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter la file", "file.m3u8",
+                                              filter=self._PLAYLIST_FILTER)
+        if not path:
+            return
+        try:
+            count = self.mediaPlayer.export_queue(path)
+        except OSError as e:
+            print("export impossible:", e)
+            self.queueStatusLabel.setText(f"Export impossible ({e})")
+            return
+        self.queueStatusLabel.setText(f"File exportée : {count} pistes dans {os.path.basename(path)}")
 
+    def _on_queue_search(self, text):
+        # requête vide : retour à la file complète (réordonnable)
+        if text.strip():
+            self.queueSearchModel.set_query(text)
+            model = self.queueSearchModel
+        else:
+            model = self.queueModel
+        if self.queueList.model() is not model:
+            self.queueList.setModel(model)
+
+    def run_command(self, command):
+        """Commande du socket de contrôle ; « open » et « raise » ramènent la fenêtre devant."""
+        if command["cmd"] in ("open", "raise"):
+            if self.isMinimized():
+                self.showNormal()
+            self.raise_()
+            self.activateWindow()
+            if command["cmd"] == "raise":
+                return None
+        return self.mediaPlayer.run_command(command)
+
+    def _toggle_tracing(self):
+        tracer.enabled = not tracer.enabled
+        print("trace", "activée" if tracer.enabled else "désactivée")
+
+    @traced("ui")
     def toggleMenuDrawer(self):
+        if self.menuDrawer is None:
+            self.__buildMenuDrawer()
+            self.resize_queue()
         central = self.centralWidget()
         cw = central.width()
         drawer_w = self._drawer_width
 
-        # position actuelle (coordonnées locales du parent)
-        current = self.menuDrawer.pos()
+        # position actuelle (coordonnées locales du parent) du widget animé
+        current = self.menuDrawerAnim.targetObject().pos()
 
         if self.menuDrawerAnim.state() == QAbstractAnimation.Running:
             self.menuDrawerAnim.stop()
+            tracer.end("menuDrawer.animation", "ui")
 
         if not self.menuIsOpening:
             self.menuIsOpening = True
@@ -123,6 +298,18 @@ class MainWindow(QMainWindow):
 
         self.menuIsMoving = True
 
+        if self.snapshotAnimations:
+            # le menu glisse sous forme d'image ; la file, si elle est ouverte,
+            # est figée aussi puisque sa largeur suit le menu
+            if not self._menuSnapshot.isVisible():
+                self._menuSnapshot.capture(self.menuDrawer)
+            self._menuSnapshot.raise_()
+            if self.queueDrawer is not None and self.queueDrawer.isVisible():
+                self._queueSnapshot.capture(self.queueDrawer)
+            self.menuDrawerAnim.setTargetObject(self._menuSnapshot)
+        else:
+            self.menuDrawerAnim.setTargetObject(self.menuDrawer)
+
         # calculer distance restante et adapter la durée
         remaining = abs(end.x() - start.x())
         duration = max(60, int(self._anim_full_duration * (remaining / drawer_w)))
@@ -130,9 +317,16 @@ class MainWindow(QMainWindow):
         self.menuDrawerAnim.setDuration(duration)
         self.menuDrawerAnim.setStartValue(start)
         self.menuDrawerAnim.setEndValue(end)
+        tracer.begin("menuDrawer.animation", "ui", {"opening": self.menuIsOpening})
         self.menuDrawerAnim.start()
+        self._save_session_state()
 
+    @traced("ui")
     def toggleQueueDrawer(self):
+        if self.queueDrawer is None:
+            self.__buildQueueDrawer()
+            self.resize_queue()
+            self._place_queue_drawer()
         central = self.centralWidget()
         
         # Calcul de la position Y cible (au dessus des contrôles si possible)
@@ -143,11 +337,13 @@ class MainWindow(QMainWindow):
 
         target_y = central.height() - self.queueDrawer.height() - controls_h - self.menuYAxer
         
-        # position actuelle
-        current = self.queueDrawer.pos()
+        # position actuelle du widget animé
+        moving = self.queueDrawerAnim.targetObject()
+        current = moving.pos()
 
         if self.queueDrawerAnim.state() == QAbstractAnimation.Running:
             self.queueDrawerAnim.stop()
+            tracer.end("queueDrawer.animation", "ui")
 
         if not self.queueIsOpening:
             self.queueIsOpening = True
@@ -158,10 +354,18 @@ class MainWindow(QMainWindow):
         else:
             self.queueIsOpening = False
             start = current
-            end = QPoint(-self.queueDrawer.width(), target_y)
+            end = QPoint(-moving.width(), target_y)
 
         self.queueIsMoving = True
 
+        if self.snapshotAnimations:
+            if not self._queueSnapshot.isVisible():
+                self._queueSnapshot.capture(self.queueDrawer)
+            self._queueSnapshot.raise_()
+            self.queueDrawerAnim.setTargetObject(self._queueSnapshot)
+        else:
+            self.queueDrawerAnim.setTargetObject(self.queueDrawer)
+
         remaining = abs(end.x() - start.x())
         full_dist = self.queueDrawer.width()
         duration = max(60, int(self.queue_duration * (remaining / full_dist)))
@@ -169,72 +373,134 @@ class MainWindow(QMainWindow):
         self.queueDrawerAnim.setDuration(duration)
         self.queueDrawerAnim.setStartValue(start)
         self.queueDrawerAnim.setEndValue(end)
+        tracer.begin("queueDrawer.animation", "ui", {"opening": self.queueIsOpening})
         self.queueDrawerAnim.start()
+        self._save_session_state()
 
     def myStyleSheet(self):
-        open("graphics/style.qss", "r").read()
-        with open("graphics/style.qss", "r") as styleFile:
-            style = styleFile.read()
-            self.setStyleSheet(style)
+        self.setStyleSheet(load_style())
 
     def _on_menuDrawerAnim_finished(self):
+        tracer.end("menuDrawer.animation", "ui")
+        self.menuIsMoving = False
+        if self._menuSnapshot.isVisible():
+            self._settle_snapshots()
+            return
         if not self.menuIsOpening:
             self.menuDrawer.hide()
-        self.menuIsMoving = False
         self.resize_queue()
 
+    @traced("ui")
     def _on_menuDrawerAnim_valueChanged(self, value):
         # value: QPoint position of the menu drawer during animation
         try:
             menu_x = value.x()
         except Exception:
             return
+        new_w = max(100, menu_x - (self.menuYAxer * 2))
+        # file figée : seule l'image change de largeur, sans layout
+        if self._queueSnapshot is not None and self._queueSnapshot.isVisible():
+            if self._queueSnapshot.width() != new_w:
+                self._queueSnapshot.resize(new_w, self._queueSnapshot.height())
         # only adjust if queue exists and is visible
-        if hasattr(self, "queueDrawer") and self.queueDrawer.isVisible():
-            available_w = menu_x - (self.menuYAxer * 2)
-            new_w = max(100, available_w)
+        elif self.queueDrawer is not None and self.queueDrawer.isVisible():
             # avoid unnecessary layout updates
             if self.queueDrawer.width() != new_w:
                 self.queueDrawer.setFixedWidth(new_w)
 
     def _on_queueDrawerAnim_finished(self):
+        tracer.end("queueDrawer.animation", "ui")
+        self.queueIsMoving = False
+        if self._queueSnapshot.isVisible():
+            self._settle_snapshots()
+            return
         if not self.queueIsOpening:
             self.queueDrawer.hide()
-        self.queueIsMoving = False
+
+    def _settle_snapshots(self):
+        # fin des animations : les vrais tiroirs reprennent la place des images
+        # et la largeur de la file est recalculée une seule fois
+        if self.menuIsMoving or self.queueIsMoving:
+            return
+        with tracer.span("drawers.relayout", "ui"):
+            if self._menuSnapshot is not None and self._menuSnapshot.isVisible():
+                self._menuSnapshot.release(self.menuDrawer, self.menuIsOpening)
+            if self._queueSnapshot is not None and self._queueSnapshot.isVisible():
+                self._queueSnapshot.release(self.queueDrawer, self.queueIsOpening)
+            self.resize_queue()
 
     def resize_queue(self):
+        if self.queueDrawer is None:
+            return
         central = self.centralWidget()
         # On calcule l'espace disponible à gauche du menu (qu'il soit visible ou en mouvement)
-        menu_x = self.menuDrawer.x() if self.menuDrawer.isVisible() else central.width()
+        visible = self.menuDrawer is not None and self.menuDrawer.isVisible()
+        menu_x = self.menuDrawer.x() if visible else central.width()
         available_w = menu_x - (self.menuYAxer * 2)
         self.queueDrawer.setFixedWidth(max(100, available_w))
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            # le backend multimédia est créé juste après le premier affichage
+            QTimer.singleShot(0, self._on_first_paint)
+
+    def _on_first_paint(self):
+        self.firstPainted.emit()
+        self.mediaPlayer.init_backend()
+        if self._restored_track is not None:
+            self.mediaPlayer.cue(*self._restored_track)
+        menu_open, queue_open = self._restored_drawers
+        if menu_open and not self.menuIsOpening:
+            self.toggleMenuDrawer()
+        if queue_open and not self.queueIsOpening:
+            self.toggleQueueDrawer()
+        self.backendReady.emit()
+
+    def closeEvent(self, event):
+        # ne pas détruire un thread de scan en cours d'exécution
+        self.mediaPlayer.stop_import()
+        if self.libraryPage is not None:
+            self.libraryPage.stop_scan()
+            self.libraryPage.stop_duplicates()
+        self._sessionTimer.stop()
+        self._save_session_state()
+        self.session.compact(self.mediaPlayer.queue)
+        self.session.close()
+        super().closeEvent(event)
+
+    @traced("ui")
     def resizeEvent(self, event):
         super().resizeEvent(event)
         central = self.centralWidget()
         cw = central.width()
-        ch = central.height()
 
-        # Update dimensions
-        self.menuDrawer.setFixedHeight(self.mediaPlayer.videoWidget.height())
-        
-        # Repositionner sans mapToGlobal (car drawer est enfant de central)
-        if not self.menuIsMoving:
-            if self.menuIsOpening:
-                self.menuDrawer.move(cw - self._drawer_width - self.menuYAxer, self.menuYAxer)
-            else:
-                self.menuDrawer.move(cw, self.menuYAxer)
+        if self.menuDrawer is not None:
+            # Update dimensions
+            self.menuDrawer.setFixedHeight(self.mediaPlayer.videoWidget.height())
+
+            # Repositionner sans mapToGlobal (car drawer est enfant de central)
+            if not self.menuIsMoving:
+                if self.menuIsOpening:
+                    self.menuDrawer.move(cw - self._drawer_width - self.menuYAxer, self.menuYAxer)
+                else:
+                    self.menuDrawer.move(cw, self.menuYAxer)
         
         self.resize_queue()
+        self._place_queue_drawer()
+
+    def _place_queue_drawer(self):
+        if self.queueDrawer is None or self.queueIsMoving:
+            return
+        ch = self.centralWidget().height()
+        try:
+            controls_h = max(0, self.mediaPlayer.height() - self.mediaPlayer.videoWidget.height())
+        except:
+            controls_h = 80
         
-        if not self.queueIsMoving:
-            try:
-                controls_h = max(0, self.mediaPlayer.height() - self.mediaPlayer.videoWidget.height())
-            except:
-                controls_h = 80
-            
-            target_y = ch - self.queueDrawer.height() - controls_h - self.menuYAxer
-            if self.queueIsOpening:
-                self.queueDrawer.move(self.menuYAxer, target_y)
-            else:
-                self.queueDrawer.move(-self.queueDrawer.width(), target_y)
+        target_y = ch - self.queueDrawer.height() - controls_h - self.menuYAxer
+        if self.queueIsOpening:
+            self.queueDrawer.move(self.menuYAxer, target_y)
+        else:
+            self.queueDrawer.move(-self.queueDrawer.width(), target_y)
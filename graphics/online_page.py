@@ -0,0 +1,68 @@
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit
+
+from class_item.http_stream import is_remote
+
+
+class OnlinePage(QWidget):
+    """Page « En ligne » : lecture d'un flux HTTP(S) à partir de son URL."""
+
+    # url à lire tout de suite / à ajouter en fin de file
+    playRequested = Signal(str)
+    enqueueRequested = Signal(str)
+
+    def __init__(self, parent=None, streams=None):
+        super().__init__(parent)
+        # StreamService optionnel : statistiques de connexions affichées
+        self.streams = streams
+
+        self.urlEdit = QLineEdit(self)
+        self.urlEdit.setPlaceholderText("https://…/piste.mp3")
+        self.urlEdit.setClearButtonEnabled(True)
+        self.urlEdit.returnPressed.connect(self._on_play)
+        self.playBtn = QPushButton("Lire", self)
+        self.playBtn.clicked.connect(self._on_play)
+        self.enqueueBtn = QPushButton("Ajouter à la file", self)
+        self.enqueueBtn.clicked.connect(self._on_enqueue)
+        self.statusLabel = QLabel("", self)
+        self.statusLabel.setWordWrap(True)
+
+        top = QHBoxLayout()
+        top.setContentsMargins(0, 0, 0, 0)
+        top.addWidget(self.urlEdit, 1)
+        top.addWidget(self.playBtn)
+        top.addWidget(self.enqueueBtn)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(self.statusLabel)
+        layout.addStretch(1)
+
+    def _url(self):
+        url = self.urlEdit.text().strip()
+        if not is_remote(url):
+            self.statusLabel.setText("Adresse http:// ou https:// attendue.")
+            return None
+        return url
+
+    def _on_play(self):
+        url = self._url()
+        if url is not None:
+            self.statusLabel.setText("Chargement…")
+            self.playRequested.emit(url)
+
+    def _on_enqueue(self):
+        url = self._url()
+        if url is not None:
+            self.enqueueRequested.emit(url)
+            self.urlEdit.clear()
+            self.statusLabel.setText("Ajouté à la file.")
+
+    def show_first_audio(self, ms):
+        """Délai jusqu'au premier son de la dernière lecture lancée."""
+        text = f"Premier son en {ms:.0f} ms"
+        if self.streams is not None:
+            pool = self.streams.pool
+            text += f" — {pool.requests} requêtes, {pool.connections_opened} connexions"
+        self.statusLabel.setText(text)
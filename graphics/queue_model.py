@@ -0,0 +1,221 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QImage
+
+from class_item.song_queue import QueueListener
+from class_item.search_index import QueueSearch
+
+
+def node_label(node):
+    return f"{node.title} — {node.artist}" if node.artist else node.title
+
+
+class QueueModel(QAbstractListModel, QueueListener):
+    """Modèle de liste branché directement sur une Queue.
+
+    Les lignes sont exposées par tranches (canFetchMore / fetchMore) et
+    chaque modification de la file se traduit par un seul signal de plage
+    de lignes ; les modifications au-delà des lignes déjà exposées ne
+    produisent aucun signal.
+    """
+
+    # nombre de lignes exposées à chaque fetchMore
+    FETCH_BATCH = 256
+    NodeRole = Qt.UserRole + 1
+    # côté des vignettes (pixels)
+    ICON_SIZE = 32
+
+    def __init__(self, queue, parent=None, artwork=None):
+        QAbstractListModel.__init__(self, parent)
+        self.queue = queue
+        self._loaded = min(len(queue), self.FETCH_BATCH)
+        self._pending = None
+        queue.subscribe(self)
+        # ArtworkService optionnel ; nœuds affichés en attente de leur vignette
+        self.artwork = artwork
+        self._waiting = {}
+        self._placeholder = QImage(self.ICON_SIZE, self.ICON_SIZE, QImage.Format_ARGB32_Premultiplied)
+        self._placeholder.fill(Qt.transparent)
+        if artwork is not None:
+            artwork.artworkReady.connect(self._on_artwork_ready)
+
+    # lecture
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        node = self.queue[index.row()]
+        if role == Qt.DisplayRole:
+            return node_label(node)
+        if role == Qt.ToolTipRole:
+            return node.path
+        if role == Qt.DecorationRole and self.artwork is not None and node.path:
+            image = self.artwork.image(node.path, self.ICON_SIZE)
+            if image is None:
+                self._waiting.setdefault(node.path, set()).add(node)
+                return self._placeholder
+            return image
+        if role == self.NodeRole:
+            return node
+        return None
+
+    def node_at(self, row):
+        return self.queue[row]
+
+    def _on_artwork_ready(self, path, size):
+        if size != self.ICON_SIZE:
+            return
+        for node in self._waiting.pop(path, ()):
+            if node in self.queue:
+                row = self.queue.index_of(node)
+                if row < self._loaded:
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def canFetchMore(self, parent=QModelIndex()):
+        # pas pendant une modification en cours de notification
+        return (not parent.isValid() and self._pending is None
+                and self._loaded < len(self.queue))
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        count = min(self.FETCH_BATCH, len(self.queue) - self._loaded)
+        if count <= 0:
+            return
+        self._pending = count
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+        self._pending = None
+
+    # glisser-déposer (InternalMove)
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def moveRows(self, sourceParent, sourceRow, count, destinationParent, destinationChild):
+        if sourceParent.isValid() or destinationParent.isValid():
+            return False
+        # la file notifie le modèle (queue_about_to_move / queue_moved)
+        return self.queue.move(sourceRow, count, destinationChild)
+
+    # notifications de la Queue
+    def queue_about_to_insert(self, first, count):
+        if first < self._loaded:
+            shown = count
+        elif self._loaded == len(self.queue):
+            # tout était exposé : n'exposer qu'une tranche des nouvelles lignes
+            shown = min(count, self.FETCH_BATCH)
+        else:
+            shown = 0
+        self._pending = shown
+        if shown:
+            self.beginInsertRows(QModelIndex(), first, first + shown - 1)
+
+    def queue_inserted(self, first, count):
+        if self._pending:
+            self._loaded += self._pending
+            self.endInsertRows()
+        self._pending = None
+
+    def queue_about_to_remove(self, first, last):
+        last = min(last, self._loaded - 1)
+        self._pending = last - first + 1 if first <= last else 0
+        if self._pending:
+            self.beginRemoveRows(QModelIndex(), first, last)
+
+    def queue_removed(self, first, last):
+        if self._pending:
+            self._loaded -= self._pending
+            self.endRemoveRows()
+        self._pending = None
+
+    def queue_about_to_move(self, first, count, destination):
+        if first + count <= self._loaded and destination <= self._loaded:
+            self._pending = self.beginMoveRows(QModelIndex(), first, first + count - 1,
+                                               QModelIndex(), destination)
+        else:
+            # déplacement depuis/vers des lignes non exposées
+            self._pending = "reset"
+            self.beginResetModel()
+
+    def queue_moved(self, first, count, destination):
+        if self._pending == "reset":
+            self.endResetModel()
+        elif self._pending:
+            self.endMoveRows()
+        self._pending = None
+
+    def queue_about_to_reset(self):
+        self._pending = "reset"
+        self.beginResetModel()
+
+    def queue_reset(self):
+        self._loaded = min(len(self.queue), max(self._loaded, self.FETCH_BATCH))
+        self.endResetModel()
+        self._pending = None
+
+
+class QueueSearchModel(QAbstractListModel, QueueListener):
+    """Résultats d'une recherche dans la file (lecture seule).
+
+    L'index (QueueSearch) suit la file ; les nœuds retirés de la file
+    disparaissent aussi des résultats affichés.
+    """
+
+    NodeRole = QueueModel.NodeRole
+    # nombre maximal de résultats affichés
+    LIMIT = 200
+
+    def __init__(self, queue, parent=None):
+        QAbstractListModel.__init__(self, parent)
+        self.queue = queue
+        self.search = QueueSearch(queue)
+        self._nodes = []
+        queue.subscribe(self)
+
+    def set_query(self, query):
+        self.beginResetModel()
+        self._nodes = self.search.search(query, self.LIMIT)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._nodes)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = self._nodes[index.row()]
+        if role == Qt.DisplayRole:
+            return node_label(node)
+        if role == Qt.ToolTipRole:
+            return node.path
+        if role == self.NodeRole:
+            return node
+        return None
+
+    def node_at(self, row):
+        return self._nodes[row]
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable if index.isValid() else Qt.NoItemFlags
+
+    def _drop(self, nodes):
+        gone = set(nodes)
+        kept = [n for n in self._nodes if n not in gone]
+        if len(kept) != len(self._nodes):
+            self.beginResetModel()
+            self._nodes = kept
+            self.endResetModel()
+
+    def queue_about_to_remove(self, first, last):
+        self._drop(self.queue[first:last + 1])
+
+    def queue_reset(self):
+        self._drop([n for n in self._nodes if n not in self.queue])
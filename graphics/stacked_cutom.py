@@ -9,6 +9,7 @@ class StackedCustom(QWidget):
     Usage :
       sc = StackedCustom(parent)
       sc.add_page(widget, title)
+      sc.add_page(lambda: MaPage(), title)  # page construite à la première activation
       sc.set_pages([w1, w2], ["T1", "T2"])  # optionnel
       sc.set_current(1)
     """
@@ -39,6 +40,9 @@ class StackedCustom(QWidget):
 
         # tracking
         self._buttons = []
+        # fabriques des pages pas encore construites : {index: callable}
+        self._factories = {}
+        self._building = False
 
         # synchroniser l'état boutons quand la page change
         self.stack.currentChanged.connect(self._on_current_changed)
@@ -47,8 +51,17 @@ class StackedCustom(QWidget):
             self.set_pages(page_widgets, titles)
 
     def add_page(self, widget, title=None):
-        """Ajoute une page et crée le bouton correspondant. Retourne l'index."""
+        """Ajoute une page et crée le bouton correspondant. Retourne l'index.
+
+        widget peut être une fabrique (callable sans argument) : la page n'est
+        alors construite que lorsque son onglet est activé pour la première fois.
+        """
+        factory = None
+        if callable(widget) and not isinstance(widget, QWidget):
+            factory, widget = widget, QWidget()
         idx = self.stack.addWidget(widget)
+        if factory is not None:
+            self._factories[idx] = factory
         btn_text = title or f"Page {idx + 1}"
         btn = QPushButton(btn_text, self._top)
         btn.setCheckable(True)
@@ -69,6 +82,34 @@ class StackedCustom(QWidget):
 
         return idx
 
+    def page(self, index: int):
+        """Widget de la page index, construit au besoin."""
+        self._ensure_built(index)
+        return self.stack.widget(index)
+
+    def is_built(self, index: int) -> bool:
+        return index not in self._factories
+
+    def _ensure_built(self, index: int):
+        factory = self._factories.pop(index, None)
+        if factory is None:
+            return
+        placeholder = self.stack.widget(index)
+        current = self.stack.currentIndex()
+        self._building = True
+        try:
+            self.stack.insertWidget(index, factory())
+            self.stack.removeWidget(placeholder)
+            self.stack.setCurrentIndex(current)
+        finally:
+            self._building = False
+        placeholder.deleteLater()
+
+    def showEvent(self, event):
+        # la page courante est construite au premier affichage
+        self._ensure_built(self.stack.currentIndex())
+        super().showEvent(event)
+
     def set_pages(self, widgets, titles=None):
         """Remplace les pages existantes par la liste fournie."""
         # vider boutons et pages
@@ -81,6 +122,7 @@ class StackedCustom(QWidget):
             w = self.stack.widget(0)
             self.stack.removeWidget(w)
             w.setParent(None)
+        self._factories = {}
 
         if titles is None:
             titles = [None] * len(widgets)
@@ -91,6 +133,8 @@ class StackedCustom(QWidget):
     def set_current(self, index: int):
         """Sélectionne la page index et met à jour le bouton coché."""
         if 0 <= index < self.stack.count():
+            if self.isVisible():
+                self._ensure_built(index)
             self.stack.setCurrentIndex(index)
             btn = self._btn_group.button(index)
             if btn:
@@ -100,6 +144,10 @@ class StackedCustom(QWidget):
         return self.stack.currentIndex()
 
     def _on_current_changed(self, index: int):
+        if self._building:
+            return
+        if self.isVisible():
+            self._ensure_built(index)
         # mettre à jour l'état checked du bouton
         btn = self._btn_group.button(index)
         if btn:
@@ -119,6 +167,9 @@ class StackedCustom(QWidget):
             w = self.stack.widget(index)
             self.stack.removeWidget(w)
             w.setParent(None)
+            # ré-indexer les fabriques en attente
+            self._factories = {i - (i > index): f
+                               for i, f in self._factories.items() if i != index}
             # ré-indexer button ids
             for i, b in enumerate(self._buttons):
                 self._btn_group.setId(b, i)
\ No newline at end of file
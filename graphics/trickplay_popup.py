@@ -0,0 +1,43 @@
+from PySide6.QtCore import Qt, QRect, QPoint
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtWidgets import QWidget
+
+
+class TrickplayPopup(QWidget):
+    """Vignette flottante affichée au-dessus de la barre de position.
+
+    La planche entière est convertie une fois en QPixmap ; afficher une
+    autre vignette ne fait que changer le rectangle source.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.ToolTip | Qt.FramelessWindowHint)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self._sprite = None
+        self._pixmap = QPixmap()
+        self._source = QRect()
+
+    def set_sprite(self, sprite):
+        self._sprite = sprite
+        self._pixmap = QPixmap.fromImage(sprite.image) if sprite is not None else QPixmap()
+        if sprite is None:
+            self.hide()
+        else:
+            self.setFixedSize(sprite.tile_w, sprite.tile_h)
+
+    def show_at(self, position_ms, anchor):
+        """Affiche la vignette de position_ms centrée au-dessus de anchor (coordonnées globales)."""
+        if self._sprite is None:
+            return
+        rect = self._sprite.tile_rect(position_ms)
+        if rect != self._source:
+            self._source = rect
+            self.update()
+        self.move(anchor - QPoint(self.width() // 2, self.height() + 8))
+        if not self.isVisible():
+            self.show()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(self.rect(), self._pixmap, self._source)
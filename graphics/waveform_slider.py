@@ -0,0 +1,171 @@
+from PySide6.QtCore import Qt, QRect, QLineF, QPoint, QThread, QCoreApplication, Signal
+from PySide6.QtGui import QPainter, QPixmap, QColor, QPen
+from PySide6.QtWidgets import QAbstractSlider
+
+from class_item.peaks import load_peaks, resample_peaks, PeakWorker
+
+
+class WaveformSlider(QAbstractSlider):
+    """Barre de position affichant la forme d'onde du morceau.
+
+    La forme d'onde est dessinée une fois (par taille de widget) dans deux
+    pixmaps, partie lue et partie restante ; un changement de position ne
+    repeint que la bande comprise entre l'ancien et le nouveau curseur.
+    Les crêtes viennent du cache disque ou d'un PeakWorker.
+    """
+
+    # survol : valeur sous le pointeur et point d'ancrage (haut du widget,
+    # coordonnées globales) pour une vignette de prévisualisation
+    hovered = Signal(int, QPoint)
+    hoverLeft = Signal()
+
+    PLAYED_COLOR = QColor("#4fc3f7")
+    REMAINING_COLOR = QColor("#5a5a5a")
+    CURSOR_COLOR = QColor("#ffffff")
+
+    def __init__(self, parent=None, height=40):
+        super().__init__(parent)
+        self.setOrientation(Qt.Horizontal)
+        self.setFixedHeight(height)
+        self.setFocusPolicy(Qt.ClickFocus)
+        self.setMouseTracking(True)
+        self._path = None
+        self._peaks = None
+        self._worker = None
+        self._played = QPixmap()
+        self._remaining = QPixmap()
+        self._cursor_x = 0
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    # source
+    def set_source(self, path):
+        """Affiche la forme d'onde de path (calculée en arrière-plan si besoin)."""
+        if path == self._path:
+            return
+        self._path = path
+        self.stop()
+        self._set_peaks(None)
+        if not path:
+            return
+        peaks = load_peaks(path)
+        if peaks is not None:
+            self._set_peaks(peaks)
+            return
+        self._worker = PeakWorker(path, self)
+        self._worker.peaksReady.connect(self._on_peaks_ready)
+        self._worker.start(QThread.LowPriority)
+
+    def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker.wait()
+            self._worker = None
+
+    def _on_peaks_ready(self, path, peaks):
+        if path == self._path:
+            self._set_peaks(peaks)
+
+    def _set_peaks(self, peaks):
+        self._peaks = peaks
+        self._render()
+        self.update()
+
+    # géométrie
+    def _x_for(self, value):
+        span = self.maximum() - self.minimum()
+        if span <= 0:
+            return 0
+        return round((value - self.minimum()) * (self.width() - 1) / span)
+
+    def _value_for(self, x):
+        span = self.maximum() - self.minimum()
+        x = min(max(0, x), self.width() - 1)
+        return self.minimum() + round(x * span / max(1, self.width() - 1))
+
+    def sliderChange(self, change):
+        x = self._x_for(self.value())
+        if change == QAbstractSlider.SliderValueChange:
+            # ne repeindre que la bande entre l'ancien et le nouveau curseur
+            if x != self._cursor_x:
+                left, right = min(x, self._cursor_x), max(x, self._cursor_x)
+                self._cursor_x = x
+                self.update(QRect(left - 1, 0, right - left + 3, self.height()))
+            return
+        self._cursor_x = x
+        super().sliderChange(change)
+
+    # rendu
+    def _render(self):
+        w, h = self.width(), self.height()
+        if w <= 0 or h <= 0:
+            return
+        lines = None
+        if self._peaks is not None and self._peaks.shape[1]:
+            # une ligne verticale min -> max par colonne de pixels
+            cols = resample_peaks(self._peaks, w)
+            mid = h / 2.0
+            scale = (h / 2.0 - 1) / 127.0
+            tops = (mid - cols[1] * scale).tolist()
+            bottoms = (mid - cols[0] * scale + 1).tolist()
+            lines = [QLineF(x + 0.5, t, x + 0.5, b) for x, (t, b) in enumerate(zip(tops, bottoms))]
+        pixmaps = []
+        for color in (self.PLAYED_COLOR, self.REMAINING_COLOR):
+            pm = QPixmap(w, h)
+            pm.fill(Qt.transparent)
+            painter = QPainter(pm)
+            if lines is None:
+                painter.fillRect(QRect(0, h // 2 - 1, w, 2), color)
+            else:
+                painter.setPen(QPen(color, 1))
+                painter.drawLines(lines)
+            painter.end()
+            pixmaps.append(pm)
+        self._played, self._remaining = pixmaps
+
+    def resizeEvent(self, event):
+        self._render()
+        self._cursor_x = self._x_for(self.value())
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = event.rect()
+        h = self.height()
+        cx = self._cursor_x
+        played = rect.intersected(QRect(0, 0, cx, h))
+        remaining = rect.intersected(QRect(cx, 0, self.width() - cx, h))
+        if not played.isEmpty():
+            painter.drawPixmap(played, self._played, played)
+        if not remaining.isEmpty():
+            painter.drawPixmap(remaining, self._remaining, remaining)
+        if self.maximum() > self.minimum() and rect.left() <= cx <= rect.right():
+            painter.fillRect(QRect(cx, 0, 1, h), self.CURSOR_COLOR)
+
+    # souris : clic ou glisser = déplacement direct à la position pointée
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton or self.maximum() <= self.minimum():
+            return super().mousePressEvent(event)
+        self.setSliderDown(True)
+        self.setSliderPosition(self._value_for(int(event.position().x())))
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        x = int(event.position().x())
+        if self.isSliderDown():
+            self.setSliderPosition(self._value_for(x))
+        if self.maximum() > self.minimum():
+            x = min(max(0, x), self.width() - 1)
+            self.hovered.emit(self._value_for(x), self.mapToGlobal(QPoint(x, 0)))
+        event.accept()
+
+    def leaveEvent(self, event):
+        self.hoverLeft.emit()
+        super().leaveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self.isSliderDown() and event.button() == Qt.LeftButton:
+            self.setSliderPosition(self._value_for(int(event.position().x())))
+            self.setSliderDown(False)
+            event.accept()
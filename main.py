@@ -1,12 +1,63 @@
+import json
+import os
 import sys
+import time
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication
-from graphics.main_window import MainWindow
+from class_item.http_stream import is_remote
+from class_item.instance_server import InstanceServer, send_commands
+
+
+def install_startup_probe(app, window, path):
+    """Écrit dans path les instants (time.time) du premier affichage et du
+    backend prêt, puis quitte : utilisé par benchmarks/bench_startup.py."""
+    marks = {"main": time.time()}
+
+    def mark(name):
+        marks[name] = time.time()
+
+    def done():
+        mark("backend_ready")
+        with open(path, "w") as f:
+            json.dump(marks, f)
+        app.quit()
+
+    window.firstPainted.connect(lambda: mark("first_paint"))
+    window.backendReady.connect(done)
+
+
+def startup_command(argv):
+    """Commande équivalente aux arguments : ouvrir les fichiers, sinon ramener la fenêtre."""
+    # flux HTTP(S) transmis tels quels, comme dans MediaPlayer.run_command
+    paths = [a if is_remote(a) else os.path.abspath(a) for a in argv[1:] if not a.startswith("-")]
+    return {"cmd": "open", "paths": paths} if paths else {"cmd": "raise"}
 
 
 if __name__ == "__main__":
+    probe = os.environ.get("MYMP3_STARTUP_PROBE")
+    # instance unique, sauf pour les mesures de démarrage ou sur demande
+    single = not probe and "--new-instance" not in sys.argv
+    command = startup_command(sys.argv)
+    if single and send_commands([command]) is not None:
+        sys.exit(0)
+
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    # importée après la remise à une instance existante : un second
+    # lancement ne charge pas l'interface
+    from graphics.main_window import MainWindow
     mainWindow = MainWindow()
 
+    if single:
+        server = InstanceServer(mainWindow.run_command, app)
+        if not server.listen() and send_commands([command]) is not None:
+            # une autre instance a démarré entre-temps
+            sys.exit(0)
+
+    if probe:
+        install_startup_probe(app, mainWindow, probe)
+
     mainWindow.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    if command["cmd"] == "open" and command["paths"]:
+        QTimer.singleShot(0, lambda: mainWindow.run_command(command))
+    sys.exit(app.exec())